@@ -0,0 +1,14 @@
+"""
+Imports cluster-checker.py as the module cluster_checker. The script name is not a module name, the benchmarks and the
+worker processes they start (the parallel log scan) import it by this name.
+"""
+import importlib.util
+import os
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cluster-checker.py')
+
+spec = importlib.util.spec_from_file_location(__name__, SCRIPT)
+checker = importlib.util.module_from_spec(spec)
+sys.modules[__name__] = checker
+spec.loader.exec_module(checker)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Generates synthetic supportconfig reports to benchmark cluster-checker.py on reports of any size.
+
+A report has ha.txt (crm_mon, corosync.conf, sbd and cib.xml sections plus filler log sections up to the requested size),
+rpm.txt, basic-environment.txt, network.txt and messages.txt (syslog lines with a few known issues, of the requested size),
+for a SAP Hana, ASCS/ERS or NFS cluster.
+--resources adds that many extra primitives (with a location constraint each) to the cib on top of the resources
+of the topology, the output is the same for the same arguments.
+
+usage: python3 benchmarks/generate_scc.py OUTPUT_DIR --topology saphana --resources 200 --ha-size 20 --rpms 2000 --messages-size 300 [--archive]
+"""
+import argparse
+import os
+import random
+import tarfile
+
+TOPOLOGIES = ('saphana', 'ascsers', 'nfs')
+SECTION_HEADERS = {'file': '#==[ Configuration File ]===========================#', 'command': '#==[ Command ]======================================#',
+                   'log': '#==[ Log File ]=====================================#'}
+NODES = ('node1', 'node2')
+
+COROSYNC_CONF = '''totem {
+	version: 2
+	secauth: on
+	crypto_hash: sha1
+	crypto_cipher: aes256
+	cluster_name: hacluster
+	clear_node_high_bit: yes
+	token: 30000
+	token_retransmits_before_loss_const: 10
+	join: 60
+	consensus: 36000
+	max_messages: 20
+	interface {
+		ringnumber: 0
+		mcastport: 5405
+		ttl: 1
+	}
+	transport: udpu
+}
+logging {
+	fileline: off
+	to_stderr: no
+	to_logfile: no
+	logfile: /var/log/cluster/corosync.log
+	to_syslog: yes
+	debug: off
+	timestamp: on
+	logger_subsys {
+		subsys: QUORUM
+		debug: off
+	}
+}
+nodelist {
+	node {
+		ring0_addr: 10.0.0.6
+		nodeid: 1
+	}
+	node {
+		ring0_addr: 10.0.0.7
+		nodeid: 2
+	}
+}
+quorum {
+	provider: corosync_votequorum
+	expected_votes: 2
+	two_node: 1
+}
+'''
+
+SBD_CONFIG = '''SBD_DEVICE="/dev/disk/by-id/scsi-36001405a"
+SBD_PACEMAKER=yes
+SBD_STARTMODE=always
+SBD_WATCHDOG_DEV=/dev/watchdog
+SBD_WATCHDOG_TIMEOUT=5
+'''
+
+SBD_DUMP = '''==Dumping header on disk /dev/disk/by-id/scsi-36001405a
+Header version     : 2.1
+UUID               : 541bdcea-16af-44a4-8ab9-6a98602e65ca
+Number of slots    : 255
+Sector size        : 512
+Timeout (watchdog) : 60
+Timeout (allocate) : 2
+Timeout (loop)     : 1
+Timeout (msgwait)  : 120
+==Header on disk /dev/disk/by-id/scsi-36001405a is dumped
+'''
+
+# packages the checks look for, with a version that passes the rules
+CHECKED_PACKAGES = {
+    '15': {'fence-agents': '4.9.0+git.1624456340.8d746be9-150300.3.5.1', 'resource-agents': '4.8.0+git30.d0077df0-150300.8.20.1',
+           'python3-azure-core': '1.23.1-150100.3.9.1', 'python3-azure-identity': '1.10.0-150100.3.3.1',
+           'python3-azure-mgmt-compute': '26.1.0-150100.3.9.1', 'cloud-netconfig-azure': '1.5-3.17.1'},
+    '12': {'fence-agents': '4.9.0+git.1624456340.8d746be9-3.41.3', 'resource-agents': '4.8.0+git30.d0077df0-8.22.1',
+           'python-azure-core': '1.23.1-2.9.1', 'python-azure-identity': '1.10.0-2.3.1',
+           'python-azure-mgmt-compute': '26.1.0-2.9.1', 'cloud-netconfig-azure': '1.5-3.17.1'},
+}
+
+
+def section(kind, name, content):
+    return f'{SECTION_HEADERS[kind]}\n# {name}\n{content.rstrip()}\n\n'
+
+def nvpairs(owner_id, kind, values):
+    pairs = ''.join(f'            <nvpair name="{name}" value="{value}" id="{owner_id}-{kind}-{name}"/>\n' for name, value in values.items())
+    return f'          <{kind} id="{owner_id}-{kind}">\n{pairs}          </{kind}>\n'
+
+def operations(owner_id, ops):
+    """
+    ops is a list of (name, interval, timeout, role), timeout or role None when not set
+    """
+    lines = []
+    for name, interval, timeout, role in ops:
+        attrs = f'name="{name}" interval="{interval}"'
+        if timeout is not None:
+            attrs += f' timeout="{timeout}"'
+        if role is not None:
+            attrs += f' role="{role}"'
+        lines.append(f'            <op {attrs} id="{owner_id}-{name}-{interval}{"-" + role if role else ""}"/>\n')
+    return f'          <operations>\n{"".join(lines)}          </operations>\n'
+
+def primitive(resource_id, agent, params=None, ops=None):
+    resource_class, _, agent_type = agent.rpartition(':')
+    provider = ''
+    if resource_class.count(':'):
+        resource_class, provider = resource_class.split(':')
+    xml = f'        <primitive id="{resource_id}" class="{resource_class}"' + (f' provider="{provider}"' if provider else '') + f' type="{agent_type}">\n'
+    if params:
+        xml += nvpairs(resource_id, 'instance_attributes', params)
+    if ops:
+        xml += operations(resource_id, ops)
+    return xml + '        </primitive>\n'
+
+def wrapper(tag, resource_id, children, meta=None):
+    xml = f'      <{tag} id="{resource_id}">\n'
+    if meta:
+        xml += nvpairs(resource_id, 'meta_attributes', meta)
+    return xml + children + f'      </{tag}>\n'
+
+
+def sapHanaResources():
+    topology = primitive('rsc_SAPHanaTopology_HN1_HDB03', 'ocf:suse:SAPHanaTopology', {'SID': 'HN1', 'InstanceNumber': '03'},
+        [('monitor', '10', '600', None), ('start', '0', '600', None), ('stop', '0', '300', None)])
+    hana = primitive('rsc_SAPHana_HN1_HDB03', 'ocf:suse:SAPHana', {'SID': 'HN1', 'InstanceNumber': '03', 'PREFER_SITE_TAKEOVER': 'true',
+        'DUPLICATE_PRIMARY_TIMEOUT': '7200', 'AUTOMATED_REGISTER': 'false'},
+        [('start', '0', '3600', None), ('stop', '0', '3600', None), ('promote', '0', '3600', None), ('monitor', '60', '700', 'Master'), ('monitor', '61', '700', 'Slave')])
+    ip_group = (primitive('rsc_ip_HN1_HDB03', 'ocf:heartbeat:IPaddr2', {'ip': '10.0.0.13'}, [('monitor', '10', '20', None)]) +
+        primitive('rsc_nc_HN1_HDB03', 'ocf:heartbeat:azure-lb', {'port': '62503'}))
+    resources = (primitive('rsc_st_azure', 'stonith:fence_azure_arm', {'pcmk_delay_max': '15'}) +
+        wrapper('clone', 'cln_SAPHanaTopology_HN1_HDB03', topology, {'clone-node-max': '1', 'interleave': 'true'}) +
+        wrapper('master', 'msl_SAPHana_HN1_HDB03', hana, {'clone-max': '2', 'clone-node-max': '1', 'interleave': 'true', 'notify': 'true', 'is-managed': 'true'}) +
+        wrapper('group', 'g_ip_HN1_HDB03', ip_group))
+    constraints = ('      <rsc_colocation id="col_saphana_ip_HN1_HDB03" score="4000" rsc="g_ip_HN1_HDB03" rsc-role="Started" with-rsc="msl_SAPHana_HN1_HDB03" with-rsc-role="Master"/>\n'
+        '      <rsc_order id="ord_SAPHana_HN1_HDB03" kind="Optional" first="cln_SAPHanaTopology_HN1_HDB03" then="msl_SAPHana_HN1_HDB03"/>\n')
+    return resources, constraints
+
+def sapInstanceGroup(label, instance, fs_device, params):
+    return wrapper('group', f'g-NW1_{label}',
+        primitive(f'fs_NW1_{label}', 'ocf:heartbeat:Filesystem', {'device': fs_device, 'directory': f'/usr/sap/NW1/{instance}', 'fstype': 'nfs4'},
+            [('start', '0', '60s', None), ('stop', '0', '60s', None), ('monitor', '20s', '40s', None)]) +
+        primitive(f'nc_NW1_{label}', 'ocf:heartbeat:anything', {'binfile': '/usr/bin/socat', 'cmdline_options': '-U TCP-LISTEN:62000,backlog=10,fork,reuseaddr /dev/null'},
+            [('monitor', '10', '20s', None)]) +
+        primitive(f'rsc_sap_NW1_{instance}', 'ocf:heartbeat:SAPInstance', params, [('monitor', '11', '60', None)]))
+
+def ascsErsResources():
+    resources = (primitive('stonith-sbd', 'stonith:external/sbd') +
+        sapInstanceGroup('ASCS', 'ASCS00', '10.0.0.4:/NW1/ASCS', {'InstanceName': 'NW1_ASCS00_nw1-ascs', 'START_PROFILE': '/sapmnt/NW1/profile/NW1_ASCS00_nw1-ascs', 'AUTOMATIC_RECOVER': 'false'}) +
+        sapInstanceGroup('ERS', 'ERS01', '10.0.0.4:/NW1/ERS', {'InstanceName': 'NW1_ERS01_nw1-aers', 'START_PROFILE': '/sapmnt/NW1/profile/NW1_ERS01_nw1-aers', 'AUTOMATIC_RECOVER': 'false', 'IS_ERS': 'true'}))
+    constraints = ('      <rsc_colocation id="col_sap_NW1_no_both" score="-5000" rsc="g-NW1_ERS" with-rsc="g-NW1_ASCS"/>\n'
+        '      <rsc_order id="ord_sap_NW1_first_start_ascs" kind="Optional" first="rsc_sap_NW1_ASCS00" then="rsc_sap_NW1_ERS01" symmetrical="false"/>\n')
+    return resources, constraints
+
+def nfsResources():
+    resources = (primitive('stonith-sbd', 'stonith:external/sbd') +
+        wrapper('master', 'ms-drbd_NW1_nfs', primitive('drbd_NW1_nfs', 'ocf:linbit:drbd', {'drbd_resource': 'NW1-nfs'}, [('monitor', '15', '20', 'Master'), ('monitor', '30', '20', 'Slave')]),
+            {'master-max': '1', 'master-node-max': '1', 'clone-max': '2', 'clone-node-max': '1', 'notify': 'true', 'interleave': 'true'}) +
+        wrapper('clone', 'cl-nfsserver', primitive('nfsserver', 'systemd:nfs-server', ops=[('monitor', '30s', None, None)])) +
+        wrapper('group', 'g-NW1_nfs',
+            primitive('fs_NW1_sapmnt', 'ocf:heartbeat:Filesystem', {'device': '/dev/drbd0', 'directory': '/srv/nfs/NW1', 'fstype': 'xfs'}, [('monitor', '10s', None, None)]) +
+            primitive('exportfs_NW1', 'ocf:heartbeat:exportfs', {'directory': '/srv/nfs/NW1', 'options': 'rw,no_root_squash,crossmnt', 'clientspec': '*', 'fsid': '1',
+                'wait_for_leasetime_on_stop': 'true'}, [('monitor', '30s', None, None)]) +
+            primitive('nc_NW1_nfs', 'ocf:heartbeat:azure-lb', {'port': '61000'})))
+    constraints = ('      <rsc_colocation id="col-NW1_nfs_on_drbd" score="INFINITY" rsc="g-NW1_nfs" with-rsc="ms-drbd_NW1_nfs" with-rsc-role="Master"/>\n'
+        '      <rsc_order id="o-NW1_drbd_before_nfs" score="INFINITY" first="ms-drbd_NW1_nfs" first-action="promote" then="g-NW1_nfs" then-action="start"/>\n')
+    return resources, constraints
+
+def statusXml(extra_resources):
+    """
+    The status section of a running cluster, the operation history of every extra resource on every node,
+    it grows with the resources like on real clusters where it is most of the cib
+    """
+    node_states = []
+    for node_id, node in enumerate(NODES, 1):
+        lrm_resources = ''.join(f'          <lrm_resource id="rsc_extra_{i}" type="IPaddr2" class="ocf" provider="heartbeat">\n'
+            f'            <lrm_rsc_op id="rsc_extra_{i}_last_0" operation_key="rsc_extra_{i}_start_0" operation="start" crm-debug-origin="do_update_resource" crm_feature_set="3.2.0" '
+            f'transition-key="{i}:1:0:0" transition-magic="0:0;{i}:1:0:0" exit-reason="" on_node="{node}" call-id="{i * 2 + 1}" rc-code="0" op-status="0" interval="0" exec-time="50" queue-time="0"/>\n'
+            f'            <lrm_rsc_op id="rsc_extra_{i}_monitor_10000" operation_key="rsc_extra_{i}_monitor_10000" operation="monitor" crm-debug-origin="do_update_resource" crm_feature_set="3.2.0" '
+            f'transition-key="{i}:2:0:0" transition-magic="0:0;{i}:2:0:0" exit-reason="" on_node="{node}" call-id="{i * 2 + 2}" rc-code="0" op-status="0" interval="10000" exec-time="20" queue-time="0"/>\n'
+            '          </lrm_resource>\n' for i in range(extra_resources))
+        node_states.append(f'    <node_state id="{node_id}" uname="{node}" in_ccm="true" crmd="online" crm-debug-origin="do_update_resource" join="member" expected="member">\n'
+            f'      <lrm id="{node_id}">\n        <lrm_resources>\n{lrm_resources}        </lrm_resources>\n      </lrm>\n    </node_state>\n')
+    return f'  <status>\n{"".join(node_states)}  </status>\n'
+
+def cibXml(topology, extra_resources):
+    resources, constraints = {'saphana': sapHanaResources, 'ascsers': ascsErsResources, 'nfs': nfsResources}[topology]()
+    for i in range(extra_resources):
+        resources += primitive(f'rsc_extra_{i}', 'ocf:heartbeat:IPaddr2', {'ip': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}', 'cidr_netmask': '24'},
+            [('monitor', '10', '20', None), ('start', '0', '20', None), ('stop', '0', '20', None)])
+        constraints += f'      <rsc_location id="loc_extra_{i}" rsc="rsc_extra_{i}" node="{NODES[i % 2]}" score="100"/>\n'
+    nodes = ''.join(f'      <node id="{i + 1}" uname="{node}"/>\n' for i, node in enumerate(NODES))
+    return (f'<cib crm_feature_set="3.2.0" validate-with="pacemaker-3.2" epoch="{30 + extra_resources}" num_updates="0" admin_epoch="0">\n'
+        '  <configuration>\n    <crm_config>\n      <cluster_property_set id="cib-bootstrap-options">\n'
+        '        <nvpair name="stonith-enabled" value="true" id="cib-bootstrap-options-stonith-enabled"/>\n'
+        '        <nvpair name="stonith-timeout" value="144s" id="cib-bootstrap-options-stonith-timeout"/>\n'
+        '        <nvpair name="cluster-name" value="hacluster" id="cib-bootstrap-options-cluster-name"/>\n'
+        '      </cluster_property_set>\n    </crm_config>\n'
+        f'    <nodes>\n{nodes}    </nodes>\n'
+        f'    <resources>\n{resources}    </resources>\n'
+        f'    <constraints>\n{constraints}    </constraints>\n'
+        f'  </configuration>\n{statusXml(extra_resources)}</cib>\n')
+
+def fillerLog(rng, size):
+    """
+    Pacemaker log lines, about size bytes of them
+    """
+    lines = []
+    written = 0
+    daemons = ('pacemaker-controld', 'pacemaker-schedulerd', 'pacemaker-execd', 'corosync', 'pacemaker-fenced')
+    while written < size:
+        line = (f'Oct 18 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d} {NODES[rng.randint(0, 1)]} {rng.choice(daemons)}[{rng.randint(1000, 9999)}]:  notice: '
+            f'Result of monitor operation for rsc_extra_{rng.randint(0, 999)} on {NODES[rng.randint(0, 1)]}: ok | rc=0 call={rng.randint(1, 99999)} exit-reason=\'\' cib-update={rng.randint(1, 9999)}')
+        lines.append(line)
+        written += len(line) + 1
+    return '\n'.join(lines) + '\n'
+
+MESSAGES_BLOCK_SIZE = 4 * 1024 * 1024 # messages.txt repeats a block of this size, a big log is written quickly
+
+def writeMessages(path, rng, size):
+    """
+    Writes messages.txt of about size bytes: pacemaker log lines with corosync membership issues every few thousand lines
+    """
+    lines = fillerLog(rng, MESSAGES_BLOCK_SIZE).splitlines(keepends=True)
+    known_issues = ('corosync[2211]:   [TOTEM ] A processor failed, forming new configuration.\n',
+        'corosync[2211]:   [TOTEM ] Retransmit List: 1a 1b 1c\n')
+    for position in range(0, len(lines), 5000):
+        lines[position] = f'Oct 18 03:{position % 60:02d}:00 {NODES[0]} {known_issues[position // 5000 % len(known_issues)]}'
+    block = ''.join(lines)
+    with open(path, 'w') as messages_file:
+        messages_file.write(f'{SECTION_HEADERS["log"]}\n# /var/log/messages\n')
+        written = 0
+        while written < size:
+            messages_file.write(block[:size - written])
+            written += len(block)
+
+def haTxt(rng, topology, extra_resources, ha_size):
+    sections = [section('command', '/usr/sbin/crm_mon -1', f'Cluster Summary:\n  * Stack: corosync\n  * {len(NODES)} nodes configured\n  * {extra_resources + 8} resource instances configured\n'),
+        section('file', '/etc/corosync/corosync.conf', COROSYNC_CONF),
+        section('file', '/etc/sysconfig/sbd', SBD_CONFIG),
+        section('file', '/var/lib/pacemaker/cib/cib.xml', cibXml(topology, extra_resources)),
+        section('command', '/usr/sbin/sbd -d /dev/disk/by-id/scsi-36001405a dump', SBD_DUMP),
+        section('command', '/usr/sbin/sbd -d /dev/disk/by-id/scsi-36001405a list', ''.join(f'{i}\t{node}\tclear\n' for i, node in enumerate(NODES)))]
+    content = ''.join(sections)
+    # the logs of a real ha.txt are most of its size, half of the filler goes before the cib and half at the end
+    filler_size = max(0, ha_size - len(content))
+    first_log = section('log', '/var/log/pacemaker/pacemaker.log', fillerLog(rng, filler_size // 2))
+    last_log = section('log', '/var/log/messages', fillerLog(rng, filler_size - filler_size // 2))
+    return ''.join(sections[:3]) + first_log + ''.join(sections[3:]) + last_log
+
+def rpmTxt(rng, rpms, os_version):
+    packages = dict(CHECKED_PACKAGES[os_version])
+    distribution = f'SUSE Linux Enterprise Server {os_version}'
+    for i in range(max(0, rpms - len(packages))):
+        packages[f'package-{i:05d}-{rng.choice(("lib", "python3", "perl", "devel", "tools"))}'] = f'{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 99)}-{rng.randint(1, 200)}.{rng.randint(1, 9)}.1'
+    lines = [f'{name:<35} {distribution:<35} {version}' for name, version in sorted(packages.items())]
+    return section('command', '/bin/rpm -qa --queryformat "%-35{NAME} %-35{DISTRIBUTION} %{VERSION}-%{RELEASE}\\n" | sort',
+        f'{"NAME":<35} {"DISTRIBUTION":<35} VERSION\n' + '\n'.join(lines))
+
+def basicEnvironment(os_version):
+    service_pack = {'15': '15.3', '12': '12.5'}[os_version]
+    return section('file', '/etc/os-release', f'NAME="SLES"\nVERSION="{os_version}-SP{service_pack.split(".")[1]}"\nVERSION_ID="{service_pack}"\nPRETTY_NAME="SUSE Linux Enterprise Server {os_version} SP{service_pack.split(".")[1]}"\n')
+
+def networkTxt():
+    ip_addr = ('1: lo: <LOOPBACK,UP,LOWER_UP> mtu 65536 qdisc noqueue state UNKNOWN group default qlen 1000\n    inet 127.0.0.1/8 scope host lo\n'
+        '2: eth0: <BROADCAST,MULTICAST,UP,LOWER_UP> mtu 1500 qdisc mq state UP group default qlen 1000\n    inet 10.0.0.6/24 brd 10.0.0.255 scope global eth0\n')
+    hosts = '127.0.0.1\tlocalhost\n' + ''.join(f'10.0.0.{6 + i}   {node}\n' for i, node in enumerate(NODES))
+    return section('command', '/sbin/ip addr', ip_addr) + section('file', '/etc/hosts', hosts)
+
+
+def generateReport(output_dir, topology='saphana', resources=0, ha_size=1, rpms=1000, os_version='15', archive=False, seed=0, messages_size=1):
+    """
+    Writes a supportconfig report folder under output_dir and returns its path (the path of the .txz when archive is set),
+    ha_size and messages_size are the sizes of ha.txt and messages.txt in MB
+    """
+    rng = random.Random(seed)
+    report_name = f'scc_{topology}_{resources}res_{ha_size:g}mb_{rpms}rpm'
+    report_dir = os.path.join(output_dir, report_name)
+    os.makedirs(report_dir, exist_ok=True)
+    report_files = {'ha.txt': haTxt(rng, topology, resources, int(ha_size * 1024 * 1024)), 'rpm.txt': rpmTxt(rng, rpms, os_version),
+                    'basic-environment.txt': basicEnvironment(os_version), 'network.txt': networkTxt()}
+    for file_name, content in report_files.items():
+        with open(os.path.join(report_dir, file_name), 'w') as report_file:
+            report_file.write(content)
+    writeMessages(os.path.join(report_dir, 'messages.txt'), rng, int(messages_size * 1024 * 1024))
+    if not archive:
+        return report_dir
+    archive_path = f'{report_dir}.txz'
+    with tarfile.open(archive_path, 'w:xz') as tar:
+        tar.add(report_dir, arcname=report_name)
+    return archive_path
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Generates a synthetic supportconfig report')
+    arg_parser.add_argument('output_dir', help='folder the report is written to')
+    arg_parser.add_argument('--topology', choices=TOPOLOGIES, default='saphana')
+    arg_parser.add_argument('--resources', type=int, default=0, help='extra primitives added to the cib on top of the resources of the topology')
+    arg_parser.add_argument('--ha-size', type=float, default=1, help='size of ha.txt in MB, filled with log sections')
+    arg_parser.add_argument('--rpms', type=int, default=1000, help='number of packages in rpm.txt')
+    arg_parser.add_argument('--messages-size', type=float, default=1, help='size of messages.txt in MB')
+    arg_parser.add_argument('--os-version', choices=('12', '15'), default='15')
+    arg_parser.add_argument('--archive', action='store_true', help='also compress the report to a .txz file')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+    print(generateReport(args.output_dir, args.topology, args.resources, args.ha_size, args.rpms, args.os_version, args.archive, args.seed, args.messages_size))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Times every stage of cluster-checker.py and the end to end run on synthetic supportconfig reports (see generate_scc.py).
+
+For every topology and size the report is generated in a temporary folder, then each stage is run --repeat times
+and its best and median time are printed. --save writes the results to a json file and --compare checks them against
+a saved run, the script exits with 1 when a stage got slower than --tolerance times the saved time.
+
+usage: python3 benchmarks/run_benchmarks.py [--sizes small,large] [--topologies saphana,nfs] [--save base.json] [--compare base.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARKS_DIR)
+from generate_scc import TOPOLOGIES, generateReport
+
+# resources, ha.txt MB, rpm count and messages.txt MB of every size, the messages.txt of large is split for the parallel log scan
+SIZES = {
+    'small': {'resources': 10, 'ha_size': 1, 'rpms': 1500, 'messages_size': 1},
+    'medium': {'resources': 200, 'ha_size': 20, 'rpms': 3000, 'messages_size': 20},
+    'large': {'resources': 2000, 'ha_size': 100, 'rpms': 6000, 'messages_size': 300},
+}
+
+
+def loadChecker():
+    # imported by name, so the workers of the parallel log scan can import it too
+    import cluster_checker as checker
+    # the benchmark measures the checks, not the writing of the log
+    checker.logger.setLevel(logging.WARNING)
+    return checker
+
+def timeStage(stage, repeat):
+    durations = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            stage()
+            durations.append(time.perf_counter() - start)
+    return {'best': min(durations), 'median': statistics.median(durations)}
+
+def reportStages(checker, report_path):
+    """
+    Returns the stages of the pipeline as (name, function) pairs, the input of every stage is prepared once
+    so each one is timed on its own
+    """
+    report = checker.SupportconfigReport(report_path)
+    ha_index = checker.SupportconfigIndex(report, 'ha.txt')
+    cluster_model = checker.readingCib(ha_index)
+    result = checker.ReportResult(report_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        cluster_type = checker.getClusterType(cluster_model, result)
+    corosync_config = checker.readCorosyncConf(ha_index)
+    version_id = checker.osVersion(report)
+    network_info = checker.NetworkInfo(report)
+    cluster_nodes = {node.id: node.uname for node in cluster_model.nodes}
+    return report, [
+        ('SupportconfigIndex', lambda: checker.SupportconfigIndex(report, 'ha.txt')),
+        ('readingCib', lambda: checker.readingCib(ha_index)),
+        ('getClusterType', lambda: checker.getClusterType(cluster_model, checker.ReportResult(report_path))),
+        ('ConstraintGraph', lambda: checker.ConstraintGraph(cluster_model)),
+        ('constrainsChecker', lambda: checker.constrainsChecker(cluster_model, cluster_type, checker.ReportResult(report_path))),
+        ('readCorosyncConf', lambda: checker.readCorosyncConf(ha_index)),
+        ('totemChecker', lambda: checker.totemChecker(corosync_config, checker.ReportResult(report_path))),
+        ('quorumChecker', lambda: checker.quorumChecker(corosync_config, checker.ReportResult(report_path))),
+        ('NetworkInfo', lambda: checker.NetworkInfo(report)),
+        ('hostsChecker', lambda: checker.hostsChecker(network_info, cluster_nodes, corosync_config, checker.ReportResult(report_path))),
+        ('logChecker', lambda: checker.logChecker(report, checker.LOG_SCAN_WORKERS, checker.ReportResult(report_path))),
+        ('logCacheKey', lambda: [checker.SupportconfigReport(report_path).fileSampleDigest(file_name) for file_name in checker.LOG_FILES]),
+        ('RpmIndex', lambda: checker.RpmIndex(report)),
+        ('rpmChecker', lambda: checker.rpmChecker(checker.RpmIndex(report), version_id, 1, 0, checker.ReportResult(report_path))),
+        ('runChecks', lambda: checker.runChecks(report_path)),
+    ]
+
+def runBenchmarks(topologies, sizes, repeat, archive):
+    checker = loadChecker()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='cluster-checker-benchmark-') as work_dir:
+        for size_name in sizes:
+            for topology in topologies:
+                report_path = generateReport(work_dir, topology, archive=archive, **SIZES[size_name])
+                report, stages = reportStages(checker, report_path)
+                for stage_name, stage in stages:
+                    benchmark_name = f'{size_name}/{topology}/{stage_name}'
+                    results[benchmark_name] = timeStage(stage, repeat)
+                    print(f'{benchmark_name:<45} best {results[benchmark_name]["best"] * 1000:10.2f} ms   median {results[benchmark_name]["median"] * 1000:10.2f} ms')
+                report.close()
+    return results
+
+def compareResults(results, baseline, tolerance):
+    regressions = []
+    for benchmark_name, timing in results.items():
+        if benchmark_name not in baseline:
+            continue
+        ratio = timing['best'] / baseline[benchmark_name]['best'] if baseline[benchmark_name]['best'] else 1
+        if ratio > tolerance:
+            regressions.append((benchmark_name, ratio))
+    return regressions
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Benchmarks the stages of cluster-checker.py on synthetic reports')
+    arg_parser.add_argument('--sizes', default='small,medium', help=f'comma separated sizes out of {",".join(SIZES)}')
+    arg_parser.add_argument('--topologies', default=','.join(TOPOLOGIES), help=f'comma separated topologies out of {",".join(TOPOLOGIES)}')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='number of runs of every stage')
+    arg_parser.add_argument('--archive', action='store_true', help='benchmark the reports compressed to .txz instead of folders')
+    arg_parser.add_argument('--save', metavar='FILE', help='write the results to this json file')
+    arg_parser.add_argument('--compare', metavar='FILE', help='compare the results with a file written by --save')
+    arg_parser.add_argument('--tolerance', type=float, default=1.25, help='a stage slower than tolerance times its saved best time is a regression')
+    args = arg_parser.parse_args()
+
+    results = runBenchmarks(args.topologies.split(','), args.sizes.split(','), args.repeat, args.archive)
+    if args.save:
+        with open(args.save, 'w') as save_file:
+            json.dump(results, save_file, indent=4)
+        print(f'Results are written to {args.save}')
+    if args.compare:
+        with open(args.compare) as compare_file:
+            regressions = compareResults(results, json.load(compare_file), args.tolerance)
+        for benchmark_name, ratio in regressions:
+            print(f'\033[91m{benchmark_name} is {ratio:.2f} times slower than {args.compare}\033[0m')
+        if regressions:
+            sys.exit(1)
+        print(f'No stage is slower than {args.tolerance} times {args.compare}')
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measures the cold start of cluster-checker.py and fails when it is over the budget.
+
+The start is measured twice:
+- the import of the script alone, with python -X importtime, to list the slowest imports
+- the wall time of `cluster-checker.py --help`, the best of a few runs
+
+Modules that are only needed by some code paths (requests, lxml, tarfile, concurrent.futures) must not be imported
+when the script starts, the benchmark fails if any of them is.
+
+usage: python3 benchmarks/startup_benchmark.py [--budget 0.15] [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cluster-checker.py')
+LAZY_MODULES = ('requests', 'lxml', 'tarfile', 'concurrent.futures', 'subprocess')
+IMPORT_SCRIPT = '''
+import importlib.util, sys
+spec = importlib.util.spec_from_file_location('cluster_checker', sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+'''
+
+
+def importTimes():
+    """
+    Returns the (cumulative microseconds, module) of every module imported by the script
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT, SCRIPT], stderr=subprocess.PIPE, text=True, check=True).stderr
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or line.find('cumulative') != -1:
+            continue
+        _, cumulative, module = line.split('|')
+        imports.append((int(cumulative), module.rstrip()))
+    return imports
+
+
+def helpTime(runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCRIPT, '--help'], stdout=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - start)
+    return min(durations), statistics.median(durations)
+
+
+if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='Checks the cold start of cluster-checker.py against a budget')
+    arg_parser.add_argument('--budget', type=float, default=0.15, help='maximum seconds for `cluster-checker.py --help` (best run)')
+    arg_parser.add_argument('--runs', type=int, default=5, help='number of runs of `cluster-checker.py --help`')
+    args = arg_parser.parse_args()
+
+    imports = importTimes()
+    print('Slowest imports of the script (cumulative):')
+    for cumulative, module in sorted(imports, reverse=True)[:10]:
+        print(f'{cumulative / 1000:8.1f} ms {module}')
+    imported = {module.strip() for _, module in imports}
+    eager_modules = [lazy_module for lazy_module in LAZY_MODULES if lazy_module in imported]
+
+    best, median = helpTime(args.runs)
+    print(f'cluster-checker.py --help: best {best:.3f}s, median {median:.3f}s, budget {args.budget:.3f}s')
+
+    failed = False
+    if eager_modules:
+        print(f'\033[91mThese modules should be imported lazily but are imported on start: {eager_modules}\033[0m')
+        failed = True
+    if best > args.budget:
+        print(f'\033[91mThe start of the script takes {best:.3f}s, over the budget of {args.budget:.3f}s\033[0m')
+        failed = True
+    sys.exit(1 if failed else 0)
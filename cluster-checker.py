@@ -18,192 +18,906 @@ https://docs.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-avail
 """
 
 import os
+import time
+import argparse
 import logging
-import subprocess
 import sys
-import xml.etree.ElementTree as ET
-from xml import etree
-import ast
+import contextlib
+import io
+import threading
+from types import MappingProxyType
 import traceback
-import xmltodict
 import json
-import requests
 import re
+import functools
+import mmap
+# requests, lxml, tarfile and concurrent.futures are imported by the code that needs them, so the start of the script
+# (and --help) does not pay for the modules of the checks that are not run, see benchmarks/startup_benchmark.py
 #from telemtry import collect_sr, log_case_scc
 
-f_handle = logging.FileHandler('./cluster-checker.log',mode='w')
-f_format = logging.Formatter('%(asctime)s - %(filename)s - %(levelname)s - %(message)s')
-f_handle.setFormatter(f_format)
-
 logger = logging.getLogger(__name__)
-logger.addHandler(f_handle)
-logger.setLevel(logging.DEBUG)
+logger.setLevel(logging.INFO)
+LOG_LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+def logHandler(log_path, mode='w'):
+    f_handle = logging.FileHandler(log_path, mode=mode)
+    f_format = logging.Formatter('%(asctime)s - %(filename)s - %(levelname)s - %(message)s')
+    f_handle.setFormatter(f_format)
+    return f_handle
+
+COROSYNC_CONF_SECTION = '/etc/corosync/corosync.conf'
+CIB_SECTION = '/var/lib/pacemaker/cib/cib.xml'
+REPORT_FILES = ['ha.txt', 'network.txt', 'rpm.txt', 'basic-environment.txt', 'messages.txt'] # messages.txt is only needed by the log scan
+ARCHIVE_EXTENSIONS = ('.txz', '.tar.xz', '.tgz', '.tar.gz', '.tbz', '.tbz2', '.tar.bz2')
+SPOOL_MAX_SIZE = 64 * 1024 * 1024 # archive members bigger than this are spooled to a mapped temporary file instead of memory
+RELEASE_WINDOW = 16 * 1024 * 1024 # bytes of a mapped file read before its pages are released from the resident memory of the process
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+REPO_URL = 'https://raw.githubusercontent.com/imabedalghafer/cluster-checker/master'
+UPDATE_CACHE_FILE = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'cluster-checker', 'update-check.json')
+UPDATE_CHECK_TTL = 24 * 60 * 60 # seconds a version check result is reused before asking github again
+UPDATE_CHECK_TIMEOUT = 3 # seconds the run waits for the version check, it never blocks the checks themselves
+RESULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'cluster-checker', 'results')
+RESULT_CACHE_MAX_SIZE = 256 * 1024 * 1024 # bytes, the least recently used results are removed above this size
+RESULT_CACHE_EVICT_INTERVAL = 60 # seconds between two evictions of the cache by a long running process (--serve, --watch)
+LOG_SPLIT_SIZE = 256 * 1024 * 1024 # bytes, logs bigger than this are split in line aligned ranges of this size scanned on several processes
+LOG_SCAN_WORKERS = os.cpu_count() or 1
+LOG_DIGEST_SAMPLES = 64 # blocks of a big log hashed for the cache key of the log scan, instead of the whole log
+LOG_DIGEST_BLOCK = 64 * 1024
+SERVE_ADDRESS = '127.0.0.1:8426' # default address of --serve, a path is a Unix socket
+SERVE_MAX_UPLOAD = 4 * 1024 * 1024 * 1024 # bytes, biggest report archive accepted by the service
+SERVE_MAX_REQUEST = 64 * 1024 # bytes, biggest json body accepted by the service
+WATCH_POLL_INTERVAL = 10 # seconds between two scans of the watched folder when inotify does not wake the scan up before
+WATCH_SETTLE_TIME = 5 # seconds a new archive must stay unchanged before it is checked, it is still being written before
+CHECK_THREADS = min(4, os.cpu_count() or 1) # checks of a report run at the same time, the ones waiting for another check do not take a thread
+
+profiler = None # StageProfiler of the run when --profile is given
+cache_evictions = {} # cache dir -> time.monotonic() of the last eviction of the cache by this process
+
+class StageProfiler:
+    """
+    Records the wall time, cpu time and memory of every stage of a run (--profile).
+    Stages are nested, each one is named by the path of the stages it runs in ("runChecks/cib/readingCib").
+    The peak memory of a stage is the peak of the python allocations during the stage over the allocations at its start
+    (tracemalloc), the max rss is the peak resident size of the whole process at the end of the stage.
+    """
+
+    def __init__(self):
+        import tracemalloc
+        self.tracemalloc = tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.stages = []
+        self.running = [] # [name, peak allocations of the nested stages] of the running stages
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        import resource
+        allocated, peak = self.tracemalloc.get_traced_memory()
+        if self.running:
+            self.running[-1][1] = max(self.running[-1][1], peak)
+        self.tracemalloc.reset_peak()
+        self.running.append([name, 0])
+        # the stage is added when it starts, so the stages are listed in the order they run
+        stage = {'stage': '/'.join(running_stage[0] for running_stage in self.running), 'depth': len(self.running) - 1}
+        self.stages.append(stage)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+            _, peak = self.tracemalloc.get_traced_memory()
+            peak = max(peak, self.running.pop()[1])
+            if self.running:
+                self.running[-1][1] = max(self.running[-1][1], peak)
+            self.tracemalloc.reset_peak()
+            stage.update({'wall': round(wall, 6), 'cpu': round(cpu, 6), 'peak_memory': max(peak - allocated, 0),
+                'max_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024})
+
+    def printTable(self):
+        print(f'\n{"Stage":<60} {"Wall (ms)":>10} {"CPU (ms)":>10} {"Peak memory (KB)":>17} {"Max RSS (MB)":>13}')
+        for stage in self.stages:
+            stage_name = '  ' * stage['depth'] + stage['stage'].rsplit('/', 1)[-1]
+            print(f'{stage_name:<60} {stage["wall"] * 1000:>10.1f} {stage["cpu"] * 1000:>10.1f} {stage["peak_memory"] / 1024:>17.1f} {stage["max_rss"] / 1024 / 1024:>13.1f}')
+
+    def write(self, profile_path):
+        with open(profile_path, 'w') as profile_file:
+            json.dump(self.stages, profile_file, indent=4)
+
+
+def writeProfile(stage_profiler, profile_path, cprofile=None):
+    """
+    Prints the table of the stages and writes them as json to profile_path, the cProfile statistics next to it (.prof)
+    """
+    stage_profiler.printTable()
+    stage_profiler.write(profile_path)
+    print(f'The profile of the stages is written to {profile_path}')
+    if cprofile is not None:
+        cprofile_path = f'{os.path.splitext(profile_path)[0]}.prof'
+        cprofile.dump_stats(cprofile_path)
+        print(f'The cProfile statistics are written to {cprofile_path}, read them with: python3 -m pstats {cprofile_path}')
+
+def profileStage(name):
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
+
+def profiled(function):
+    """
+    Records every call of the function as a stage of the profile, a plain call when the run is not profiled
+    """
+    @functools.wraps(function)
+    def profiledFunction(*args, **kwargs):
+        if profiler is None:
+            return function(*args, **kwargs)
+        with profiler.stage(function.__qualname__):
+            return function(*args, **kwargs)
+    return profiledFunction
+
+
+class ThreadStdout:
+    """
+    sys.stdout while the checks of a report run on threads: what a thread prints inside capturedOutput() goes to its
+    own buffer, everything else to the stream it replaces
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffers = getattr(self.local, 'buffers', None)
+        return (buffers[-1] if buffers else self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+@contextlib.contextmanager
+def threadStdout():
+    if isinstance(sys.stdout, ThreadStdout):
+        yield sys.stdout
+        return
+    thread_stdout = ThreadStdout(sys.stdout)
+    sys.stdout = thread_stdout
+    try:
+        yield thread_stdout
+    finally:
+        sys.stdout = thread_stdout.stream
+
+@contextlib.contextmanager
+def capturedOutput():
+    """
+    Captures what the current thread prints, unlike contextlib.redirect_stdout the checks running on other threads are not captured
+    """
+    output = io.StringIO()
+    if not isinstance(sys.stdout, ThreadStdout):
+        with contextlib.redirect_stdout(output):
+            yield output
+        return
+    if not hasattr(sys.stdout.local, 'buffers'):
+        sys.stdout.local.buffers = []
+    sys.stdout.local.buffers.append(output)
+    try:
+        yield output
+    finally:
+        sys.stdout.local.buffers.pop()
+
+
+class SupportconfigReport:
+    """
+    Access to the files of a supportconfig report, either an extracted folder or a compressed archive.
+    The files are memory mapped and read through their buffer (mmap), so the checkers look at the pages of the file
+    instead of copies of it: sections are memoryview slices of the buffer, decoded only by the checker that reads them.
+    Archives are never extracted to disk, they are opened with tarfile in streaming mode and only the files
+    needed by the checks are kept (in anonymous memory or, for the big ones, in a mapped temporary file),
+    the decompression stops once all of them are found.
+    """
+
+    def __init__(self, path_to_scc, needed_files=REPORT_FILES):
+        self.path = path_to_scc.rstrip('/')
+        self.needed_files = needed_files
+        self.is_archive = self.path.endswith(ARCHIVE_EXTENSIONS)
+        self.name = os.path.basename(self.path)
+        if self.is_archive:
+            self.name = self.name[:-len(next(ext for ext in ARCHIVE_EXTENSIONS if self.name.endswith(ext)))]
+        self.buffers = {} # file name -> mmap (b'' for empty files), mapped on first access
+        self.file_backed = set() # files whose buffer maps a file, their pages can be dropped and read again from it
+        self.released = {} # file name -> offset up to which the pages were released
+        self.digests = {} # file name -> sha256 of the file, computed once per report
+        self.archive_loaded = False
+        self.lock = threading.Lock() # the checks running on threads map the files and read the archive once
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for buffer in self.buffers.values():
+            if isinstance(buffer, mmap.mmap):
+                try:
+                    buffer.close()
+                except BufferError:
+                    # a memoryview of the buffer is still used, the mapping is released with the last view
+                    pass
+        self.buffers = {}
+        self.file_backed = set()
+        self.released = {}
+        self.archive_loaded = False
+
+    @profiled
+    def loadArchive(self):
+        import tarfile
+        import tempfile
+        import shutil
+        self.archive_loaded = True
+        logger.info('Reading %s from the compressed report %s', self.needed_files, self.path)
+        print('Reading scc report archive ...')
+        try:
+            with tarfile.open(self.path, mode='r|*') as tar:
+                for member in tar:
+                    file_name = os.path.basename(member.name)
+                    # only the files on the top folder of the report, the same name can exist on sub folders
+                    if not member.isfile() or member.name.strip('./').count('/') > 1:
+                        continue
+                    if file_name in self.needed_files and file_name not in self.buffers:
+                        member_file = tar.extractfile(member)
+                        if member.size == 0:
+                            buffer = b''
+                        elif member.size <= SPOOL_MAX_SIZE:
+                            buffer = mmap.mmap(-1, member.size)
+                            for chunk in iter(lambda: member_file.read(1024 * 1024), b''):
+                                buffer.write(chunk)
+                        else:
+                            with tempfile.TemporaryFile() as spool_file:
+                                shutil.copyfileobj(member_file, spool_file)
+                                spool_file.flush()
+                                # the mapping stays valid once the temporary file is closed (and removed)
+                                buffer = mmap.mmap(spool_file.fileno(), 0, access=mmap.ACCESS_READ)
+                            self.file_backed.add(file_name)
+                        self.buffers[file_name] = buffer
+                        logger.info('Found %s with size %s', member.name, member.size)
+                        if len(self.buffers) == len(self.needed_files):
+                            logger.info('All the needed files are found, stop reading the archive')
+                            break
+        except (tarfile.TarError, EOFError, OSError) as e:
+            logger.warning('Cannot read the archive %s: %s', self.path, e)
+            print('\033[91m' + f'Cannot read the compressed scc report {self.path}: {e}' + '\033[0m')
+
+    def hasFile(self, file_name):
+        if not self.is_archive:
+            return os.path.exists(os.path.join(self.path, file_name))
+        with self.lock:
+            if not self.archive_loaded:
+                self.loadArchive()
+        return file_name in self.buffers
+
+    def filePath(self, file_name):
+        return os.path.join(self.path, file_name)
+
+    def fileBuffer(self, file_name):
+        """
+        Returns the content of the file as a read only mmap (b'' when the file is empty), mapped once per report
+        """
+        with self.lock:
+            if self.is_archive and not self.archive_loaded:
+                self.loadArchive()
+            if file_name not in self.buffers:
+                if self.is_archive:
+                    raise FileNotFoundError(f'{file_name} is not in the archive {self.path}')
+                with open(os.path.join(self.path, file_name), 'rb') as f:
+                    self.buffers[file_name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+                self.file_backed.add(file_name)
+            return self.buffers[file_name]
+
+    def releasePages(self, file_name, end_offset):
+        """
+        Drops the pages of the mapped file before end_offset from the resident memory of the process once RELEASE_WINDOW bytes
+        were read, they stay in the page cache and are mapped again if read later, so a scan of a big file keeps the RSS flat.
+        Buffers that are not backed by a file (small archive members) are the only copy of the data and are never released.
+        """
+        if file_name not in self.file_backed or not isinstance(self.buffers.get(file_name), mmap.mmap) or not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        released = self.released.get(file_name, 0)
+        end_offset -= end_offset % mmap.PAGESIZE
+        if end_offset - released < RELEASE_WINDOW:
+            return
+        self.buffers[file_name].madvise(mmap.MADV_DONTNEED, released, end_offset - released)
+        self.released[file_name] = end_offset
+
+    def readLines(self, file_name):
+        buffer = self.fileBuffer(file_name)
+        with memoryview(buffer) as view:
+            start = 0
+            while start < len(view):
+                end = buffer.find(b'\n', start)
+                end = len(view) if end == -1 else end + 1
+                yield str(view[start:end], 'utf-8', 'replace')
+                start = end
+                self.releasePages(file_name, start)
+
+    def fileDigest(self, file_name):
+        import hashlib
+        if file_name in self.digests:
+            return self.digests[file_name]
+        digest = hashlib.sha256()
+        if self.hasFile(file_name):
+            with memoryview(self.fileBuffer(file_name)) as view:
+                for offset in range(0, len(view), RELEASE_WINDOW):
+                    digest.update(view[offset:offset + RELEASE_WINDOW])
+                    self.releasePages(file_name, offset + RELEASE_WINDOW)
+        self.digests[file_name] = digest.hexdigest()
+        return self.digests[file_name]
+
+    def fileSampleDigest(self, file_name):
+        """
+        Cheap digest of a big log for the cache key of the log scan: its size, LOG_DIGEST_SAMPLES blocks spread over it and its end.
+        A log that got more lines or was rotated changes its size or its end, a log edited in place without changing
+        its size is not noticed. A log not bigger than the samples is hashed whole.
+        """
+        import hashlib
+        if not self.hasFile(file_name) or len(self.fileBuffer(file_name)) <= LOG_DIGEST_SAMPLES * LOG_DIGEST_BLOCK:
+            return self.fileDigest(file_name)
+        buffer = self.fileBuffer(file_name)
+        digest = hashlib.sha256(str(len(buffer)).encode())
+        step = (len(buffer) - LOG_DIGEST_BLOCK) // (LOG_DIGEST_SAMPLES - 1)
+        for offset in range(0, step * LOG_DIGEST_SAMPLES, step):
+            digest.update(buffer[offset:offset + LOG_DIGEST_BLOCK])
+        digest.update(buffer[-LOG_DIGEST_BLOCK:])
+        return digest.hexdigest()
+
+
+class SupportconfigIndex:
+    """
+    Index of the sections in a supportconfig text file (ha.txt, network.txt, ..)
+    Every section starts with a header like "#==[ Configuration File ]===#" followed by a "# /path/or/command" line,
+    the buffer of the file is searched once for the headers and the byte offsets of each section content are recorded,
+    so the checkers can fetch the section they need by its name as a slice of the buffer instead of scanning the file again.
+    """
+    SECTION_HEADER = b'#==['
+
+    def __init__(self, report, file_name):
+        self.report = report
+        self.file_name = file_name
+        self.path = report.filePath(file_name)
+        self.buffer = report.fileBuffer(file_name)
+        self.sections = {} # section name -> list of (section kind, start offset, end offset)
+        self.buildIndex()
+
+    @profiled
+    def buildIndex(self):
+        logger.info('Building the sections index of %s', self.path)
+        buffer = self.buffer
+        current_section = None
+        # a header is only a header at the start of a line
+        header_offset = 0 if buffer[:len(self.SECTION_HEADER)] == self.SECTION_HEADER else self.nextHeader(0)
+        while header_offset != -1:
+            if current_section is not None:
+                self.addSection(current_section, header_offset)
+            kind_end = buffer.find(b']', header_offset)
+            header_end = buffer.find(b'\n', header_offset)
+            if header_end == -1:
+                current_section = None
+                break
+            section_kind = buffer[header_offset + len(self.SECTION_HEADER):kind_end if -1 < kind_end < header_end else header_end].strip().decode('utf-8', 'replace')
+            name_end = buffer.find(b'\n', header_end + 1)
+            name_end = len(buffer) if name_end == -1 else name_end + 1
+            section_name = buffer[header_end + 1:name_end].decode('utf-8', 'replace').strip()
+            if section_name.startswith('#'):
+                section_name = section_name[1:].strip()
+            current_section = (section_name, section_kind, name_end)
+            header_offset = self.nextHeader(name_end - 1)
+        if current_section is not None:
+            self.addSection(current_section, len(buffer))
+        self.report.releasePages(self.file_name, len(buffer))
+        logger.info('Found %s sections in %s', len(self.sections), self.path)
+
+    def nextHeader(self, offset):
+        """
+        Returns the offset of the next header line after offset, -1 if there is none. The buffer is searched
+        RELEASE_WINDOW bytes at a time so the pages already searched can be released, even inside one huge section
+        """
+        header_line = b'\n' + self.SECTION_HEADER
+        while offset < len(self.buffer):
+            window_end = min(offset + RELEASE_WINDOW, len(self.buffer))
+            header_offset = self.buffer.find(header_line, offset, window_end + len(header_line) - 1)
+            if header_offset != -1:
+                return header_offset + 1
+            offset = window_end
+            self.report.releasePages(self.file_name, offset)
+        return -1
+
+    def addSection(self, section, end_offset):
+        section_name, section_kind, start_offset = section
+        self.sections.setdefault(section_name, []).append((section_kind, start_offset, max(start_offset, end_offset)))
+
+    def hasSection(self, section_name):
+        return section_name in self.sections
+
+    def findSections(self, pattern):
+        """
+        Returns the names of the sections matching the regular expression, for commands that have arguments in their name (sbd -d <device> dump)
+        """
+        return [section_name for section_name in self.sections if pattern.search(section_name)]
+
+    def getSectionView(self, section_name, occurrence=0):
+        """
+        Returns the content of the section as a memoryview of the file buffer, without copying it
+        """
+        if section_name not in self.sections or len(self.sections[section_name]) <= occurrence:
+            logger.info('Section %s cannot be found in %s', section_name, self.path)
+            return None
+        section_kind, start_offset, end_offset = self.sections[section_name][occurrence]
+        return memoryview(self.buffer)[start_offset:end_offset]
+
+    def getSectionBytes(self, section_name, occurrence=0):
+        section_view = self.getSectionView(section_name, occurrence)
+        if section_view is None:
+            return None
+        return section_view.tobytes()
+
+    def getSection(self, section_name, occurrence=0):
+        section_view = self.getSectionView(section_name, occurrence)
+        if section_view is None:
+            return None
+        return str(section_view, 'utf-8', 'replace')
+
+
+def parseCorosyncConf(config_text):
+    """
+    Parses corosync.conf in one pass into a nested dictionary the same way corosync reads it, line by line:
+    a "name {" line opens a block, a "key: value" line sets a value and a "}" line closes the block.
+    A block name used more than once in the same block (node, interface) becomes a list of dictionaries.
+    Values are kept as strings and comments are skipped.
+    """
+    config = {}
+    parents = []
+    block = config
+    for line in config_text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.find('{') != -1:
+            block_name = line.split('{', 1)[0].strip()
+            new_block = {}
+            if block_name in block:
+                if not isinstance(block[block_name], list):
+                    block[block_name] = [block[block_name]]
+                block[block_name].append(new_block)
+            else:
+                block[block_name] = new_block
+            parents.append(block)
+            block = new_block
+        elif line.find(':') != -1:
+            key, value = line.split(':', 1)
+            block[key.strip()] = value.strip()
+        elif line.find('}') != -1:
+            # unbalanced closing braces are ignored so a broken file does not lose the blocks before it
+            if parents:
+                block = parents.pop()
+    return config
+
+def corosyncBlocks(corosync_config, block_name):
+    """
+    Returns the list of blocks with this name, whether the block is configured once or more
+    """
+    blocks = corosync_config.get(block_name, [])
+    return blocks if isinstance(blocks, list) else [blocks]
+
+@profiled
+def readCorosyncConf(ha_index):
+    corosync_conf = ha_index.getSection(COROSYNC_CONF_SECTION)
+    if corosync_conf is None:
+        logger.info('corosync.conf cannot be found in ha.txt')
+        return None
+    return parseCorosyncConf(corosync_conf)
+
+class CheckRules:
+    """
+    Recommended values of the documentation loaded from rules.json, compiled once into lookup tables grouped by
+    the section of the report they are evaluated against (corosync, sbd, rpm, cib and logs), so a check only looks at its own rules
+    and the report sections that no rule needs are never loaded.
+    """
+
+    def __init__(self, rules_data):
+        self.version = rules_data['version']
+        self.corosync = {} # corosync block -> rules
+        self.logs = [] # known issue signatures searched in the logs
+        self.sbd = {} # sysconfig or dump -> rules
+        self.rpm = {} # OS major version -> package -> rule
+        self.cib = {} # (cluster type, resource agent) -> rules
+        for rule in rules_data['rules']:
+            if rule['section'] == 'corosync':
+                self.corosync.setdefault(rule['block'], []).append(rule)
+            elif rule['section'] == 'sbd':
+                self.sbd.setdefault(rule['block'], []).append(rule)
+            elif rule['section'] == 'rpm':
+                self.rpm.setdefault(rule['os'], {})[rule['package']] = rule
+            elif rule['section'] == 'cib':
+                self.cib.setdefault((rule['cluster_type'], rule['agent']), []).append(rule)
+            elif rule['section'] == 'logs':
+                self.logs.append(rule)
+            else:
+                raise ValueError(f'Rule {rule["id"]} has unknown section {rule["section"]}')
+        self.sections = {rule['section'] for rule in rules_data['rules']}
+        # a change of the rules of one section only invalidates the cached results of the checks of that section
+        self.digests = {section: sectionDigest([rule for rule in rules_data['rules'] if rule['section'] == section]) for section in self.sections}
+
+    def corosyncIssues(self, block_name, block_config):
+        """
+        Returns (rule, observed value) for every rule of the corosync block that the configuration does not match
+        """
+        return [(rule, block_config.get(rule['key'])) for rule in self.corosync.get(block_name, ()) if block_config.get(rule['key']) != rule['expected']]
+
+    def sbdIssues(self, block_name, sbd_config):
+        """
+        Returns (rule, observed value) for every rule of /etc/sysconfig/sbd (sysconfig) or of a device header (dump) that the configuration does not match
+        """
+        return [(rule, sbd_config.get(rule['key'])) for rule in self.sbd.get(block_name, ()) if sbd_config.get(rule['key']) != rule['expected']]
+
+    def rpmRules(self, version_id):
+        return self.rpm.get(version_id.split('.')[0], {})
+
+    def resourceIssues(self, cluster_type, primitive, parent=None, agent=None):
+        """
+        Returns (rule, observed) for every rule of the resource agent that the primitive does not match,
+        observed is the op for op rules (None when it is not configured) and the value for meta and param rules,
+        meta rules are checked on the parent clone or master when there is one.
+        """
+        issues = []
+        for rule in self.cib.get((cluster_type, agent or primitive.type), ()):
+            if rule['target'] == 'op':
+                op = primitive.ops.get((rule['name'], rule.get('role')))
+                if op is None:
+                    if not rule.get('optional'):
+                        issues.append((rule, None))
+                elif not all(valueMatches(getattr(op, field), expected, ruleMatch(rule, field)) for field, expected in rule['expected'].items()):
+                    issues.append((rule, op))
+            else:
+                values = primitive.params if rule['target'] == 'param' else (parent if parent is not None else primitive).meta
+                observed = values.get(rule['name'])
+                if observed is None and rule.get('optional'):
+                    continue
+                if not valueMatches(observed, rule['expected'], ruleMatch(rule)):
+                    issues.append((rule, observed))
+        return issues
+
+
+def sectionDigest(section_rules):
+    import hashlib
+    return hashlib.sha256(json.dumps(section_rules, sort_keys=True).encode()).hexdigest()
+
+def ruleMatch(rule, field=None):
+    match = rule.get('match', 'equals')
+    if isinstance(match, dict):
+        return match.get(field, 'equals')
+    return match
+
+def valueMatches(observed, expected, match):
+    if observed is None:
+        return False
+    if match == 'contains':
+        return observed.find(expected) != -1
+    return observed == expected
+
+def ruleIssueEntry(rule, observed):
+    """
+    Formats a rule issue the way the checkers print them, the op itself or {name: value}
+    """
+    if rule['target'] == 'op':
+        if observed is None:
+            return f'{rule["name"]} operation{" for role " + rule["role"] if rule.get("role") else ""} is not configured'
+        return observed
+    return {rule['name']: observed}
+
+@functools.lru_cache(maxsize=None)
+def loadRules(rules_path=RULES_FILE):
+    logger.info('Loading the check rules from %s', rules_path)
+    with open(rules_path) as rules_file:
+        return CheckRules(json.load(rules_file))
+
+
+SEVERITY_INFO = 'info'
+SEVERITY_WARNING = 'warning'
+SEVERITY_CRITICAL = 'critical'
+SEVERITIES = (SEVERITY_CRITICAL, SEVERITY_WARNING, SEVERITY_INFO)
+
+class Finding:
+    """
+    One result of a check, check_id is the id of the rule (or of the check when it is not rule based),
+    observed and expected are the values found on the report and the value of the documentation when they apply.
+    """
+    __slots__ = ('check_id', 'severity', 'message', 'resource_id', 'observed', 'expected', 'doc')
+
+    def __init__(self, check_id, severity, message, resource_id=None, observed=None, expected=None, doc=None):
+        self.check_id = check_id
+        self.severity = severity
+        self.message = message
+        self.resource_id = resource_id
+        self.observed = observed
+        self.expected = expected
+        self.doc = doc
+
+    def toDict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return repr(self.toDict())
+
+
+class ReportResult:
+    """
+    Everything the checks found on one report, the checkers add their findings to it while they print their output,
+    so the same run gives the text for the engineer and a machine readable result (toDict) for the fleet dashboard.
+    """
+    __slots__ = ('report', 'status', 'os_version', 'cluster_type', 'fencing', 'duration', 'output', 'findings')
+
+    def __init__(self, report):
+        self.report = report
+        self.status = 'failed'
+        self.os_version = ''
+        self.cluster_type = ''
+        self.fencing = []
+        self.duration = None
+        self.output = None
+        self.findings = []
+
+    def addFinding(self, check_id, severity, message, resource_id=None, observed=None, expected=None, doc=None):
+        finding = Finding(check_id, severity, message, resource_id, observed, expected, doc)
+        self.findings.append(finding)
+        return finding
+
+    def severityCounts(self):
+        return {severity: sum(1 for finding in self.findings if finding.severity == severity) for severity in SEVERITIES}
+
+    def toDict(self):
+        result = {name: getattr(self, name) for name in self.__slots__ if name != 'findings'}
+        result['findings'] = [finding.toDict() for finding in self.findings]
+        return result
+
+
+class JsonlWriter:
+    """
+    Writes one JSON document per line and flushes every line, so a batch can be ingested while it is still running
+    and no result has to be kept in memory once it is written
+    """
+
+    def __init__(self, path, mode='w'):
+        self.path = path
+        self.file = open(path, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def observedValue(observed):
+    # ops are reported with their attributes, the other observed values are strings already
+    if isinstance(observed, CibOp):
+        return dict(observed.attrs)
+    return observed
+
+def recordRuleIssues(result, rule_issues, resource_id=None):
+    """
+    Adds a finding for every (rule, observed) issue and returns the issues, so the checkers can still print them
+    """
+    for rule, observed in rule_issues:
+        name = rule.get('key') or rule.get('name') or rule.get('package')
+        subject = f'{rule.get("target", rule["section"])} {name}' + (f' of {resource_id}' if resource_id else '')
+        if observed is None:
+            message = f'{subject} is not configured, expected {rule["expected"]}'
+        else:
+            observed_text = f'interval {observed.interval} timeout {observed.timeout}' if isinstance(observed, CibOp) else observed
+            message = f'{subject} is {observed_text}, expected {rule["expected"]}'
+        result.addFinding(rule['id'], rule.get('severity', SEVERITY_WARNING), message, resource_id, observedValue(observed), rule['expected'], rule.get('doc'))
+    return rule_issues
+
 
-def checkFileExistance(path_to_scc):
+@profiled
+def checkFileExistance(report, result):
     logger.info('check for exsitence of supportconfig report itself')
-    if not os.path.exists(path_to_scc):
+    if not os.path.exists(report.path):
         logger.info('The supportconfig report cannot be found')
         print('Please enter a valid path to the supportconfig report')
+        result.addFinding('report.not_found', SEVERITY_CRITICAL, f'The supportconfig report {report.path} cannot be found')
         return False
     #logger.info('ha.txt, network.txt, rpm.txt')
-    path_to_ha = path_to_scc + '/ha.txt'
-    path_to_netowrk = path_to_scc + '/network.txt'
-    path_to_rpm = path_to_scc + '/rpm.txt'
-    if not os.path.exists(path_to_ha) or not os.path.exists(path_to_netowrk) or not os.path.exists(path_to_rpm):
-        logger.info(path_to_ha)
-        logger.info(path_to_netowrk)
-        logger.info(path_to_rpm)
+    if not report.hasFile('ha.txt') or not report.hasFile('network.txt') or not report.hasFile('rpm.txt'):
+        logger.info(report.filePath('ha.txt'))
+        logger.info(report.filePath('network.txt'))
+        logger.info(report.filePath('rpm.txt'))
         logger.info('Please ensure to have ha.txt, network.txt, rpm.txt avaiable in the path provided')
         print('Please ensure to have ha.txt, network.txt, rpm.txt avaiable in the path provided')
+        missing_files = [file_name for file_name in ('ha.txt', 'network.txt', 'rpm.txt') if not report.hasFile(file_name)]
+        result.addFinding('report.missing_files', SEVERITY_CRITICAL, f'The supportconfig report does not have {missing_files}', observed=missing_files)
     else:
         logger.info('All files are there, ready to proceed to next step ..')
         return True
     return False
 
-def totemChecker(path_to_scc):
-    path_to_ha = path_to_scc + '/ha.txt'
-    totem_cmd = 'grep  -A 18 "totem" ' + path_to_ha
-    output = subprocess.Popen([totem_cmd], stdout= subprocess.PIPE, shell=True)
-    totem_config = str(output.communicate()[0])
-    totem_config = totem_config.replace('b\'totem ','\'')
-    logger.info(f'Totem config is {totem_config}')
-    totem_config = ast.literal_eval(totem_config)
-    totem_config = totem_config.replace('interface', 'interface: ')
-    totem_config = totem_config.replace('\tringnumber','ringnumber')
-    totem_config = totem_config.replace('\tmcastport','mcastport')
-    totem_config = totem_config.replace('\tttl','ttl')
-    totem_config = totem_config.replace('\n}\n','\n\t}')
-    totem_config = re.split('\n(\t| )+',totem_config)
-    logger.info(totem_config)
-    totem_config_dict = dict()
-    for i in totem_config:
-        if i.find(':') != -1:
-            temp_list = i.split(':')
-            if temp_list[1].strip() != '{' :
-                totem_config_dict[temp_list[0]] = temp_list[1]
-                logger.info(i.split(':'))
-            #logger.info(i)
-        #else:
-        #    logger.info(i)    
-    logger.info(type(totem_config_dict))
-    logger.info(totem_config_dict)
+@profiled
+def totemChecker(corosync_config, result):
+    if corosync_config is None:
+        logger.info('corosync.conf cannot be found in ha.txt, skipping totem check')
+        print('corosync.conf cannot be found in ha.txt, please check the totem configuration manually')
+        result.addFinding('corosync.missing', SEVERITY_WARNING, 'corosync.conf cannot be found in ha.txt, the totem and quorum configuration are not checked')
+        return
+    totem_config_dict = next(iter(corosyncBlocks(corosync_config, 'totem')), {})
+    logger.debug('totem configuration: %s', totem_config_dict)
     
-    totem_error_list=[]
     logger.info('start checking and comparing against the documentation: https://docs.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-pacemaker 15[A]')
-    if totem_config_dict['token'].strip() != '30000':
-        logger.info(f"Token value is incorrect, customer have this value {totem_config_dict['token'].strip()}")
-        totem_error_list.append('token')
-    if totem_config_dict['token_retransmits_before_loss_const'].strip() != '10':
-        logger.info(f"Token retransmits value is incorrect, customer have this value {totem_config_dict['token_retransmits_before_loss_const'].strip()}")
-        totem_error_list.append('token_retransmits_before_loss_const')
-    if totem_config_dict['join'].strip() != '60':
-        logger.info(f"Join value is incorrect, customer have this value {totem_config_dict['join'].strip()}")
-        totem_error_list.append('join')
-    if totem_config_dict['consensus'].strip() != '36000':
-        logger.info(f"consensus value is incorrect, customer have this value {totem_config_dict['consensus'].strip()}")
-        totem_error_list.append('consensus')
-    if totem_config_dict['max_messages'].strip() != '20':
-        logger.info(f"max_messages value is incorrect, customer have this value {totem_config_dict['max_messages'].strip()}")
-        totem_error_list.append('max_messages')
-    if totem_config_dict['transport'].strip() != 'udpu':
-        logger.info(f"transport value is incorrect, customer have this value {totem_config_dict['transport'].strip()}")
-        totem_error_list.append('transport')
+    totem_error_list=[]
+    for rule, observed in recordRuleIssues(result, loadRules().corosyncIssues('totem', totem_config_dict), 'totem'):
+        logger.info("%s value is incorrect, customer have this value %s while it should be %s", rule['key'], observed, rule['expected'])
+        totem_error_list.append(rule['key'])
 
     if len(totem_error_list) != 0:
         print(f'We found the below issues in the totem configuration of cluster, the below parameters needs to be checked {totem_error_list}')
-        logger.info(f'We found the below issues in the totem configuration of cluster, the below parameters needs to be checked {totem_error_list}')
+        logger.info('We found the below issues in the totem configuration of cluster, the below parameters needs to be checked %s', totem_error_list)
     else:
         print('Done checking on totem configuration, and no error found... proceeding further')
         logger.info('Done with totem check')
 
 
-def quorumChecker(path_to_scc):
-    path_to_ha = path_to_scc + '/ha.txt'
-    quorum_cmd = 'grep  -A 7 "quorum {" ' + path_to_ha + ' | grep -v "#" ' 
-    output = subprocess.Popen([quorum_cmd], stdout= subprocess.PIPE, shell=True)
-    quorum_config = str(output.communicate()[0])
-    logger.info(f'Quorum configuration is: {quorum_config}')
-    quorum_config = quorum_config.replace('b\'quorum', '\'')
-    quorum_config = ast.literal_eval(quorum_config)
-    quorum_config = re.split('\n(\t| )+',quorum_config)
-    quorum_config_dict = dict()
-    for i in quorum_config:
-        if i.find(':') != -1:
-            temp_list = i.split(':')
-            if temp_list[1].find('}') != -1:
-                temp_list[1] = temp_list[1].strip().replace('}','')
-                #logger.info(temp_list[1])
-            #logger.info(temp_list[1])    
-            quorum_config_dict[temp_list[0]] = temp_list[1].strip()
-            #logger.info(i.split(':'))
-    logger.info(quorum_config_dict)
+@profiled
+def quorumChecker(corosync_config, result):
+    if corosync_config is None:
+        logger.info('corosync.conf cannot be found in ha.txt, skipping quorum check')
+        print('corosync.conf cannot be found in ha.txt, please check the quorum configuration manually')
+        return
+    quorum_config_dict = next(iter(corosyncBlocks(corosync_config, 'quorum')), {})
+    logger.debug('quorum configuration: %s', quorum_config_dict)
     logger.info('start checking Quorum setting in corosync based on our documentation')
     quorom_error_list = []
-    if quorum_config_dict['provider'].strip() != 'corosync_votequorum':
-        logger.info(f"provider value is incorrect, customer have this value {quorum_config_dict['provider'].strip()}")
-        quorom_error_list.append('provider')
-    if quorum_config_dict['expected_votes'].strip() != '2':
-        logger.info(f"expected_votes value is incorrect, customer have this value {quorum_config_dict['expected_votes'].strip()}")
-        quorom_error_list.append('expected_votes')
-    if quorum_config_dict['two_node'].strip() != '1':
-        logger.info(f"two_node value is incorrect, customer have this value {quorum_config_dict['two_node'].strip()}")
-        quorom_error_list.append('two_node')
+    for rule, observed in recordRuleIssues(result, loadRules().corosyncIssues('quorum', quorum_config_dict), 'quorum'):
+        logger.info("%s value is incorrect, customer have this value %s while it should be %s", rule['key'], observed, rule['expected'])
+        quorom_error_list.append(rule['key'])
     
     if len(quorom_error_list) != 0:
         print(f'We found the below issues in the Quorum configuration of cluster, the below parameters needs to be checked {quorom_error_list}')
-        logger.info(f'We found the below issues in the Quorum configuration of cluster, the below parameters needs to be checked {quorom_error_list}')
+        logger.info('We found the below issues in the Quorum configuration of cluster, the below parameters needs to be checked %s', quorom_error_list)
     else:
         print('Done checking on Quorum configuration, and no error found... proceeding further')
         logger.info('Done with Quorum check')
 
-def rpmChecker(path_to_scc, version_id, azure_fence_agent, sbd_fence_agent):
+RPM_VERSION_SEGMENT = re.compile(r'~|\^|\d+|[a-zA-Z]+')
+
+def rpmVerCmp(version_a, version_b):
+    """
+    Compares two rpm versions the way rpm does (rpmvercmp), returns 1 if version_a is newer, -1 if it is older and 0 if they are equal.
+    The versions are split into numeric and alphabetic segments, numeric segments are compared as numbers and are newer than alphabetic ones,
+    ~ sorts before anything (even the end of the version) and ^ sorts after the end of the version but before any other segment.
+    """
+    if version_a == version_b:
+        return 0
+    segments_a = RPM_VERSION_SEGMENT.findall(version_a)
+    segments_b = RPM_VERSION_SEGMENT.findall(version_b)
+    for i in range(max(len(segments_a), len(segments_b)) + 1):
+        segment_a = segments_a[i] if i < len(segments_a) else None
+        segment_b = segments_b[i] if i < len(segments_b) else None
+        if segment_a == '~' or segment_b == '~':
+            if segment_a != segment_b:
+                return -1 if segment_a == '~' else 1
+            continue
+        if segment_a == '^' or segment_b == '^':
+            if segment_a is None or segment_b is None:
+                return -1 if segment_a is None else 1
+            if segment_a != segment_b:
+                return 1 if segment_a != '^' else -1
+            continue
+        if segment_a is None or segment_b is None:
+            if segment_a == segment_b:
+                return 0
+            return -1 if segment_a is None else 1
+        if segment_a.isdigit() != segment_b.isdigit():
+            return 1 if segment_a.isdigit() else -1
+        if segment_a.isdigit():
+            segment_a, segment_b = int(segment_a), int(segment_b)
+        if segment_a != segment_b:
+            return 1 if segment_a > segment_b else -1
+    return 0
+
+def rpmVersionPrefix(version, prefix):
+    """
+    Returns True when the first segments of the version are the segments of prefix, 1.9.2 has the prefix 1.9 but 1.90 does not
+    """
+    prefix_segments = RPM_VERSION_SEGMENT.findall(prefix)
+    return RPM_VERSION_SEGMENT.findall(version)[:len(prefix_segments)] == prefix_segments
+
+
+class RpmIndex:
+    """
+    Installed packages of the report read from rpm.txt in one pass, maps the package name to its (version, release),
+    when a package is installed more than once (kernels) the newest one is kept.
+    Only the `rpm -qa --queryformat` section is read, the other sections of rpm.txt list files and verification results.
+    """
+
+    def __init__(self, report):
+        self.packages = {}
+        if report.hasFile('rpm.txt'):
+            self.buildIndex(report)
+
+    @profiled
+    def buildIndex(self, report):
+        # the lines before the first section header are not packages
+        in_packages = False
+        after_header = False
+        for line in report.readLines('rpm.txt'):
+            if line.startswith('#==['):
+                after_header = True
+                continue
+            if after_header:
+                in_packages = line.find('--queryformat') != -1
+                after_header = False
+                continue
+            if not in_packages or line.startswith('#') or line.startswith('NAME '):
+                continue
+            fields = line.split()
+            if len(fields) < 2:
+                continue
+            version, _, release = fields[-1].rpartition('-')
+            if not version:
+                version, release = release, ''
+            installed = self.packages.get(fields[0])
+            if installed is None or rpmVerCmp(version, installed[0]) > 0 or (version == installed[0] and rpmVerCmp(release, installed[1]) > 0):
+                self.packages[fields[0]] = (version, release)
+        logger.info('Found %s installed packages in rpm.txt', len(self.packages))
+
+    def get(self, package_name):
+        return self.packages.get(package_name)
+
+
+@profiled
+def rpmChecker(rpm_index, version_id, azure_fence_agent, sbd_fence_agent, result):
     logger.info('Start checking the installed packages for any known issues..')
-    path_to_rpm = path_to_scc + '/rpm.txt'
-    if version_id.split('.')[0] == "12":
-        packages_list = {'fence-agents':4.4 ,'python-azure-mgmt-compute': 17.0, 'python-azure-identity' : 1.0 ,'cloud-netconfig-azure': 1.3 ,'resource-agents': 4.3,'python-azure-core': [1.9, 1.22] }
-    if version_id.split('.')[0] == "15":
-        #packages_list = ['fence-agents','python3-azure-mgmt-compute','python3-azure-identity','cloud-netconfig-azure','resource-agents','python3-azure-core']
-        packages_list = {'fence-agents':4.4 ,'python3-azure-mgmt-compute': 17.0, 'python3-azure-identity' : 1.0 ,'cloud-netconfig-azure': 1.3 ,'resource-agents': 4.3,'python3-azure-core': [1.9, 1.22] }
-    logger.info(f'Check for the following packages {packages_list.keys()}')
+    packages_list = loadRules().rpmRules(version_id)
+    logger.info('Check for the following packages %s', packages_list.keys())
     missing_rpms = []
     not_correct_version = []
-    for i in packages_list.keys():
-        rpm_find_cmd = 'grep '+ i + ' ' + path_to_rpm + ' | head -1  | awk \'{print $NF}\''
-        output = subprocess.Popen([rpm_find_cmd], stdout=subprocess.PIPE, shell=True)
-        rpm_version = str(output.communicate()[0])
-        rpm_version = rpm_version.replace('b\'','')
-        rpm_version = rpm_version.replace('\'','')
-        rpm_version = rpm_version.replace('\\n','')
-        if len(rpm_version) != 0:
-            #rpm_version = rpm_version[0] + rpm_version[1] + rpm_version[2]
-            rpm_version_list = rpm_version.split('.')
-            #logger.info(rpm_version_list)
-            if rpm_version_list[1].find('-'):
-                rpm_version_list[1] = rpm_version_list[1].split('-')[0]
-            rpm_version = float(rpm_version_list[0] + '.' + rpm_version_list[1])
-            logger.info(f'{i} has version {rpm_version}')
-            if not isinstance(packages_list[i], float):
-                if rpm_version == packages_list[i][0] or rpm_version > packages_list[i][1]:
-                    logger.info(f'package {i} is good, with version {rpm_version}')
+    rpm_issues = []
+    for i, rule in packages_list.items():
+        installed = rpm_index.get(i)
+        if installed is not None:
+            rpm_version = installed[0]
+            logger.info('%s has version %s-%s', i, rpm_version, installed[1])
+            if rule['match'] == 'version_equal_or_greater':
+                if rpmVersionPrefix(rpm_version, rule['expected'][0]) or rpmVerCmp(rpm_version, rule['expected'][1]) > 0:
+                    logger.info('package %s is good, with version %s', i, rpm_version)
                 else:
-                    logger.info(f'package {i} is not on a good version, it has a version {rpm_version} while it should either {packages_list[i][0]} or greater than {packages_list[i][1]}')
+                    logger.info('package %s is not on a good version, it has a version %s while it should either %s or greater than %s', i, rpm_version, rule["expected"][0], rule["expected"][1])
                     not_correct_version.append(i)
+                    rpm_issues.append((rule, rpm_version))
             else:
-                if rpm_version >= packages_list[i]:
-                    logger.info(f'package {i} is good, with version {rpm_version}')
+                if rpmVerCmp(rpm_version, rule['expected']) >= 0:
+                    logger.info('package %s is good, with version %s', i, rpm_version)
                 else:
-                    logger.info(f'package {i} is not on a good version, it has a version {rpm_version} while it should had {packages_list[i]}')
+                    logger.info('package %s is not on a good version, it has a version %s while it should had %s', i, rpm_version, rule["expected"])
                     not_correct_version.append(i)
+                    rpm_issues.append((rule, rpm_version))
         else:
-            logger.info(f'{i} is not installed on system')
+            logger.info('%s is not installed on system', i)
             missing_rpms.append(i)
+            rpm_issues.append((rule, None))
 
     if azure_fence_agent == 1 and (len(missing_rpms) != 0 or len(not_correct_version) != 0):
+        recordRuleIssues(result, rpm_issues)
         logger.info('Customer has fence agent, please consider the python packages mentioned')
         print('Customer has fence agent, please consider the python packages mentioned')
-        logger.info(f'The missing packages are {missing_rpms}')
+        logger.info('The missing packages are %s', missing_rpms)
         print(f'The missing packages are {missing_rpms}')
-        logger.info(f'Packages with incorrect versions are {not_correct_version}')
+        logger.info('Packages with incorrect versions are %s', not_correct_version)
         print(f'Packages with incorrect versions are {not_correct_version}')
         #cluster_config = readingCib(path_to_scc)
         #resources_config = cluster_config[2]
@@ -226,372 +940,1039 @@ def rpmChecker(path_to_scc, version_id, azure_fence_agent, sbd_fence_agent):
         print('Done checking on rpms and everything is fine..')
         
 
-def osVersion(path_to_scc):
+@profiled
+def osVersion(report):
     logger.info('Checking for the basic-environment.txt file')
-    file_path = path_to_scc + '/basic-environment.txt'
-    cmd = 'grep VERSION_ID ' + file_path + ' | cut -d "=" -f 2'
-    output = subprocess.Popen([cmd], stdout=subprocess.PIPE, shell=True)
-    version_id = str(output.communicate()[0])
-    version_id = version_id.replace('b\'','\'')
-    version_id = version_id.replace('\\n','')
-    version_id = version_id.replace('\"','')
-    version_id = ast.literal_eval(version_id)
-    version_id = str(version_id)
-    logger.info(f'The OS version is: {version_id}')
+    version_id = ''
+    if report.hasFile('basic-environment.txt'):
+        version_line = next((line for line in report.readLines('basic-environment.txt') if line.find('VERSION_ID') != -1), '')
+        version_id = version_line.split('=')[-1].strip().replace('"','')
+    logger.info('The OS version is: %s', version_id)
     return version_id
 
 
-def readingCib(path_to_scc):
-    from lxml import etree # imported to use the enhanced parser in this library.
-    path_to_ha = path_to_scc + '/ha.txt'
-    get_generate_cib_command = "sed -ne '/^\# \/var\/lib\/pacemaker\/cib\/cib.xml$/{:a' -e 'n;p;ba' -e '}' " + path_to_ha + " | sed '1,/\#==/!d' | grep -v '#==' > ./cib.xml"
-    output = subprocess.run([get_generate_cib_command], stdout=subprocess.PIPE, shell=True)
-    
-    #logger.info(str(output.communicate()))
-    path_to_xml = 'cib.xml'
-    parser = etree.XMLParser(recover=True)
-    mycib = ET.parse(path_to_xml,parser=parser)
-    ## to do  , rewrite teh code using a dictniary coded xml instead of parsing the xml itself in version 2
-    #xml_string = ET.tostring(mycib.getroot()[0], encoding='UTF-8', method='xml')
-    #dict_xml = xmltodict.parse(xml_string)
-    #print(dict_xml)
-    #return dict_xml
-    return mycib.getroot()[0]
-    
+HOSTS_SECTION = '/etc/hosts'
+HOSTS_DOC = 'https://docs.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-pacemaker#install-the-cluster'
 
-def propertyChecker(root_xml):
-    root = root_xml
-    logger.info(root)
-    cluster_property = root[0][0]
-    logger.info(cluster_property)
-    for i in cluster_property:
-        if i.attrib['name'] == 'stonith-enabled':
-            logger.info(f'Customer has stonith-enabled set to: {i.attrib["value"]}')
-            if i.attrib["value"] == 'true':
-                print(f'Customer has stonith-enabled set to: {i.attrib["value"]}')
+def isIpAddrCommand(section_name):
+    command = section_name.split()
+    return bool(command) and os.path.basename(command[0]) == 'ip' and any(word in ('a', 'addr', 'address') for word in command[1:])
+
+def isIpAddress(value):
+    import ipaddress
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except ValueError:
+        return False
+
+
+class NetworkInfo:
+    """
+    The /etc/hosts entries and the interface addresses of the node, read from network.txt in one pass line by line.
+    hosts maps every host name of /etc/hosts (lower case, aliases included) to the set of its addresses,
+    addresses is the set of the addresses configured on the interfaces (the `ip addr` section).
+    """
+
+    def __init__(self, report):
+        self.hosts = {}
+        self.addresses = set()
+        self.has_hosts = False
+        self.has_addresses = False
+        if report.hasFile('network.txt'):
+            self.buildIndex(report)
+
+    @profiled
+    def buildIndex(self, report):
+        section = None
+        after_header = False
+        for line in report.readLines('network.txt'):
+            if line.startswith('#==['):
+                after_header = True
+                section = None
+                continue
+            if after_header:
+                section_name = line.lstrip('#').strip()
+                if section_name == HOSTS_SECTION:
+                    section = 'hosts'
+                    self.has_hosts = True
+                elif isIpAddrCommand(section_name):
+                    section = 'addresses'
+                    self.has_addresses = True
+                after_header = False
+                continue
+            if section == 'hosts':
+                fields = line.split('#', 1)[0].split()
+                for host_name in fields[1:]:
+                    self.hosts.setdefault(host_name.lower(), set()).add(fields[0])
+            elif section == 'addresses':
+                fields = line.split()
+                # "inet 10.0.0.6/24 brd .." lines, also inside the one line per address output of `ip -o addr`
+                for position, field in enumerate(fields[:-1]):
+                    if field in ('inet', 'inet6'):
+                        self.addresses.add(fields[position + 1].split('/')[0])
+        logger.info('Found %s host names in /etc/hosts and %s interface addresses in network.txt', len(self.hosts), len(self.addresses))
+
+
+def corosyncRingAddresses(corosync_config):
+    """
+    Returns the ring addresses of every node of the corosync nodelist, as {nodeid or name: set of ring addresses}
+    """
+    ring_addresses = {}
+    for nodelist in corosyncBlocks(corosync_config, 'nodelist'):
+        for position, node in enumerate(corosyncBlocks(nodelist, 'node')):
+            node_key = node.get('nodeid') or node.get('name') or str(position + 1)
+            ring_addresses[node_key] = {value.lower() for key, value in node.items() if key.startswith('ring') and key.endswith('_addr') and isinstance(value, str)}
+    return ring_addresses
+
+@profiled
+def hostsChecker(network_info, cluster_nodes, corosync_config, result):
+    """
+    Cross checks the node names of the cib (cluster_nodes, node id -> uname) and the ring addresses of the corosync
+    nodelist with the /etc/hosts entries and the interface addresses of network.txt
+    """
+    if not network_info.has_hosts:
+        logger.info('/etc/hosts cannot be found in network.txt, skipping hosts check')
+        print('/etc/hosts cannot be found in network.txt, please check the name resolution of the cluster nodes manually')
+        result.addFinding('network.hosts.missing', SEVERITY_WARNING, '/etc/hosts cannot be found in network.txt, the name resolution of the nodes is not checked', doc=HOSTS_DOC)
+        return
+    hosts_issues = []
+    node_names = {uname.lower() for uname in cluster_nodes.values() if uname}
+    for node_name in sorted(node_names - network_info.hosts.keys()):
+        hosts_issues.append(f'{node_name} is not in /etc/hosts')
+        result.addFinding('network.hosts.node_missing', SEVERITY_WARNING, f'The cluster node {node_name} is not in /etc/hosts', node_name, doc=HOSTS_DOC)
+
+    local_ring_addresses = set()
+    ring_addresses = corosyncRingAddresses(corosync_config) if corosync_config is not None else {}
+    logger.debug('corosync ring addresses: %s', ring_addresses)
+    for node_key, node_addresses in ring_addresses.items():
+        ring_names = {address for address in node_addresses if not isIpAddress(address)}
+        for ring_name in sorted(ring_names - network_info.hosts.keys()):
+            hosts_issues.append(f'ring address {ring_name} is not in /etc/hosts')
+            result.addFinding('network.hosts.ring_name_missing', SEVERITY_WARNING, f'The corosync ring address {ring_name} is not in /etc/hosts', ring_name, doc=HOSTS_DOC)
+        ring_ips = node_addresses - ring_names
+        for ring_name in ring_names:
+            ring_ips |= network_info.hosts.get(ring_name, set())
+        local_ring_addresses |= ring_ips
+        node_name = (cluster_nodes.get(node_key) or node_key).lower()
+        hosts_addresses = network_info.hosts.get(node_name)
+        if ring_ips and hosts_addresses and hosts_addresses.isdisjoint(ring_ips):
+            hosts_issues.append(f'{node_name} resolves to {sorted(hosts_addresses)} but its ring addresses are {sorted(ring_ips)}')
+            result.addFinding('network.hosts.address_mismatch', SEVERITY_WARNING, f'The cluster node {node_name} resolves to {sorted(hosts_addresses)} in /etc/hosts, but its corosync ring addresses are {sorted(ring_ips)}',
+                node_name, sorted(hosts_addresses), sorted(ring_ips), HOSTS_DOC)
+    if local_ring_addresses and network_info.has_addresses and local_ring_addresses.isdisjoint(network_info.addresses):
+        hosts_issues.append(f'none of the ring addresses {sorted(local_ring_addresses)} is on the interfaces of the node')
+        result.addFinding('network.ring_address.not_local', SEVERITY_WARNING, f'None of the corosync ring addresses {sorted(local_ring_addresses)} is configured on the interfaces of the node',
+            observed=sorted(network_info.addresses), expected=sorted(local_ring_addresses))
+
+    if hosts_issues:
+        logger.info('We found the below issues in the name resolution of the cluster nodes: %s', hosts_issues)
+        print('\033[33m' + f'We found the below issues in the name resolution of the cluster nodes {hosts_issues}' + '\033[0m')
+        print('\033[33m' + f'Please refer to the documentation for the /etc/hosts entries of the cluster nodes: {HOSTS_DOC}' + '\033[0m')
+    else:
+        print('Done checking on hosts file, and no error found... proceeding further')
+        logger.info('Done with hosts check')
+
+
+SBD_SYSCONFIG_SECTION = '/etc/sysconfig/sbd'
+SBD_DUMP_SECTION = re.compile(r'(^|/)sbd\s.*\bdump$')
+SBD_LIST_SECTION = re.compile(r'(^|/)sbd\s.*\blist$')
+SBD_DEVICE_ARGUMENT = re.compile(r'-d\s+(\S+)')
+WATCHDOG_SECTION = re.compile(r'watchdog')
+SBD_DOC = 'https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-pacemaker#install-the-cluster'
+DURATION_UNITS = {'': 1, 'ms': 0.001, 'msec': 0.001, 's': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hr': 3600}
+
+def durationSeconds(value):
+    """
+    Returns the seconds of a pacemaker duration (144, 144s, 2min ..), None when it is not one
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*', value or '')
+    if match is None or match.group(2) not in DURATION_UNITS:
+        return None
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+def parseSysconfig(config_text):
+    """
+    Parses a /etc/sysconfig file of KEY="value" lines into a dictionary
+    """
+    config = {}
+    for line in config_text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or line.find('=') == -1:
+            continue
+        key, _, value = line.partition('=')
+        config[key.strip()] = value.strip().strip('"\'')
+    return config
+
+
+class SbdInfo:
+    """
+    The SBD configuration of the report, taken from the ha.txt sections already in the index: /etc/sysconfig/sbd,
+    the headers of the devices (`sbd -d <device> dump`), the slots of the nodes (`sbd -d <device> list`) and the watchdog sections
+    """
+
+    def __init__(self, ha_index):
+        sysconfig_text = ha_index.getSection(SBD_SYSCONFIG_SECTION)
+        self.sysconfig = parseSysconfig(sysconfig_text) if sysconfig_text is not None else None
+        self.devices = [device.strip() for device in (self.sysconfig or {}).get('SBD_DEVICE', '').split(';') if device.strip()]
+        self.headers = {} # device -> {header field: value}
+        for section_name in ha_index.findSections(SBD_DUMP_SECTION):
+            device_argument = SBD_DEVICE_ARGUMENT.search(section_name)
+            device_header = self.headers.setdefault(device_argument.group(1), {}) if device_argument else None
+            for line in ha_index.getSection(section_name).splitlines():
+                # "==Dumping header on disk <device>" starts every device when one command dumps all of them
+                if line.startswith('==Dumping header on disk'):
+                    device_header = self.headers.setdefault(line.split()[-1], {})
+                elif device_header is not None and line.find(':') != -1 and not line.startswith('=='):
+                    key, _, value = line.partition(':')
+                    device_header[key.strip()] = value.strip()
+        self.headers = {device: header for device, header in self.headers.items() if header}
+        self.slots = {} # device -> {node: message}
+        for section_name in ha_index.findSections(SBD_LIST_SECTION):
+            device_argument = SBD_DEVICE_ARGUMENT.search(section_name)
+            device_slots = self.slots.setdefault(device_argument.group(1) if device_argument else '', {})
+            for line in ha_index.getSection(section_name).splitlines():
+                fields = line.split()
+                if len(fields) >= 3 and fields[0].isdigit():
+                    device_slots[fields[1]] = fields[2]
+        self.watchdog = [line.strip() for section_name in ha_index.findSections(WATCHDOG_SECTION) for line in ha_index.getSection(section_name).splitlines() if line.strip()]
+
+    def timeout(self, device, name):
+        return durationSeconds(self.headers.get(device, {}).get(f'Timeout ({name})'))
+
+
+@profiled
+def sbdChecker(sbd_info, stonith_timeout, corosync_config, result):
+    """
+    Prints the SBD devices, their slots and the watchdog, checks the configuration against the rules and the timeouts
+    against each other: msgwait >= 2 * watchdog, stonith-timeout >= 1.2 * msgwait and watchdog > corosync token
+    """
+    if sbd_info.sysconfig is None and not sbd_info.headers:
+        logger.info('/etc/sysconfig/sbd and the sbd dump output cannot be found in ha.txt, skipping sbd check')
+        print('SBD is used for fencing, but /etc/sysconfig/sbd and the sbd dump output cannot be found in ha.txt, please check the SBD configuration manually')
+        result.addFinding('sbd.missing', SEVERITY_WARNING, 'SBD is used for fencing but its configuration cannot be found in ha.txt, it is not checked', doc=SBD_DOC)
+        return
+    check_rules = loadRules()
+    sbd_issues = []
+    logger.debug('sbd configuration: %s, headers: %s, slots: %s', sbd_info.sysconfig, sbd_info.headers, sbd_info.slots)
+    print(f'Customer has the below SBD devices configured: {sbd_info.devices}')
+    logger.info('Customer has the below SBD devices configured: %s', sbd_info.devices)
+    if sbd_info.sysconfig is not None:
+        for rule, observed in recordRuleIssues(result, check_rules.sbdIssues('sysconfig', sbd_info.sysconfig), SBD_SYSCONFIG_SECTION):
+            sbd_issues.append({rule['key']: observed})
+    devices = sbd_info.devices or list(sbd_info.headers)
+    for device in devices:
+        if device not in sbd_info.headers:
+            sbd_issues.append(f'the header of {device} is not in the report')
+            result.addFinding('sbd.device.header_missing', SEVERITY_WARNING, f'The header of the SBD device {device} is not in the report, check that the device can be read from the node', device, doc=SBD_DOC)
+            continue
+        print(f'SBD device {device} has the timeouts watchdog {sbd_info.headers[device].get("Timeout (watchdog)")} and msgwait {sbd_info.headers[device].get("Timeout (msgwait)")}')
+        for rule, observed in recordRuleIssues(result, check_rules.sbdIssues('dump', sbd_info.headers[device]), device):
+            sbd_issues.append({f'{device} {rule["key"]}': observed})
+        watchdog, msgwait = sbd_info.timeout(device, 'watchdog'), sbd_info.timeout(device, 'msgwait')
+        if watchdog is not None and msgwait is not None and msgwait < 2 * watchdog:
+            sbd_issues.append(f'msgwait of {device} is less than twice the watchdog timeout')
+            result.addFinding('sbd.timeout.msgwait', SEVERITY_WARNING, f'msgwait ({msgwait:g}s) of the SBD device {device} should be at least twice its watchdog timeout ({watchdog:g}s)',
+                device, f'{msgwait:g}', f'{2 * watchdog:g}', SBD_DOC)
+
+    msgwaits = [sbd_info.timeout(device, 'msgwait') for device in devices if sbd_info.timeout(device, 'msgwait') is not None]
+    stonith_seconds = durationSeconds(stonith_timeout)
+    if msgwaits and stonith_seconds is not None and stonith_seconds < 1.2 * max(msgwaits):
+        sbd_issues.append(f'stonith-timeout {stonith_timeout} is less than msgwait + 20%')
+        result.addFinding('sbd.timeout.stonith_timeout', SEVERITY_WARNING, f'stonith-timeout ({stonith_timeout}) should be at least msgwait + 20% ({1.2 * max(msgwaits):g}s), or the fencing can time out before the node is reset',
+            'cib-bootstrap-options', stonith_timeout, f'{1.2 * max(msgwaits):g}', SBD_DOC)
+    watchdogs = [sbd_info.timeout(device, 'watchdog') for device in devices if sbd_info.timeout(device, 'watchdog') is not None]
+    totem_config = next(iter(corosyncBlocks(corosync_config, 'totem')), {}) if corosync_config is not None else {}
+    token = totem_config.get('token', '')
+    # the corosync token is in milliseconds
+    token_seconds = int(token) / 1000 if isinstance(token, str) and token.isdigit() else None
+    if watchdogs and token_seconds is not None and min(watchdogs) <= token_seconds:
+        sbd_issues.append(f'watchdog timeout is not greater than the corosync token {token}ms')
+        result.addFinding('sbd.timeout.watchdog_token', SEVERITY_WARNING, f'The SBD watchdog timeout ({min(watchdogs):g}s) should be greater than the corosync token timeout ({token_seconds:g}s)',
+            'totem', f'{min(watchdogs):g}', f'> {token_seconds:g}', SBD_DOC)
+
+    for device, device_slots in sbd_info.slots.items():
+        print(f'SBD device {device} has the below slots: {device_slots}')
+        for node_name, message in device_slots.items():
+            if message != 'clear':
+                sbd_issues.append(f'slot of {node_name} on {device} has message {message}')
+                result.addFinding('sbd.slot.message', SEVERITY_WARNING, f'The slot of {node_name} on the SBD device {device} has the message {message}, clear it with: sbd -d {device} message {node_name} clear',
+                    node_name, message, 'clear', SBD_DOC)
+    watchdog_device = (sbd_info.sysconfig or {}).get('SBD_WATCHDOG_DEV')
+    if sbd_info.watchdog:
+        print(f'SBD uses the watchdog {watchdog_device or "/dev/watchdog"}, the report has the below watchdog information: {sbd_info.watchdog}')
+    else:
+        print(f'SBD uses the watchdog {watchdog_device or "/dev/watchdog"}, please check that the softdog module is loaded on the nodes')
+
+    if sbd_issues:
+        logger.info('We found the below issues in the SBD configuration: %s', sbd_issues)
+        print('\033[33m' + f'We found the below issues in the SBD configuration {sbd_issues}' + '\033[0m')
+        print('\033[33m' + f'Please refer to the documentation for the SBD configuration: {SBD_DOC}' + '\033[0m')
+    else:
+        print('Done checking on SBD configuration, and no error found... proceeding further')
+        logger.info('Done with SBD check')
+
+
+LOG_FILES = ('messages.txt', 'ha.txt')
+LOG_LINE_MAX = 300 # characters of a matched log line kept in the findings
+
+class LogScanner:
+    """
+    The known issue signatures of rules.json compiled into one regular expression: every signature is a named group of
+    one alternation, so a line is searched once for all of them and the group that matched tells the signature.
+    The alternation of full patterns is slow on gigabytes of logs, so the log is first searched for the keywords of the
+    signatures (literal text that every matching line has, the pattern itself for a signature without keywords), also in
+    one alternation, and the signatures are only searched in the lines that have a keyword.
+    The log is searched in line aligned windows of RELEASE_WINDOW bytes, the pages of a window can be released once it is searched.
+    """
+
+    def __init__(self, signatures):
+        """
+        signatures are (pattern, keywords) pairs
+        """
+        self.matcher = re.compile('|'.join(f'(?P<s{index}>{pattern})' for index, (pattern, _) in enumerate(signatures)).encode())
+        keywords = dict.fromkeys(re.escape(keyword) if keyword_list else f'(?:{pattern})' for pattern, keyword_list in signatures for keyword in keyword_list or (pattern,))
+        self.keywords = re.compile('|'.join(keywords).encode())
+
+    def scan(self, buffer, start=0, end=None, release=None):
+        """
+        Returns {signature index: [count, first line, last line]} of buffer[start:end], start must be the start of a line,
+        release(offset) is called after every window
+        """
+        end = len(buffer) if end is None else end
+        matches = {}
+        while start < end:
+            window_end = min(start + RELEASE_WINDOW, end)
+            if window_end < end:
+                newline = buffer.find(b'\n', window_end - 1, end)
+                window_end = end if newline == -1 else newline + 1
+            line_end = start
+            for keyword_match in self.keywords.finditer(buffer, start, window_end):
+                if keyword_match.start() < line_end:
+                    continue
+                line_start = buffer.rfind(b'\n', start, keyword_match.start()) + 1 or start
+                line_end = buffer.find(b'\n', keyword_match.end(), window_end)
+                line_end = window_end if line_end == -1 else line_end + 1
+                line = buffer[line_start:line_end]
+                for match in self.matcher.finditer(line):
+                    index = int(match.lastgroup[1:])
+                    if index in matches:
+                        matches[index][0] += 1
+                        matches[index][2] = line
+                    else:
+                        matches[index] = [1, line, line]
+            start = window_end
+            if release is not None:
+                release(start)
+        return {index: [count, logLine(first_line), logLine(last_line)] for index, (count, first_line, last_line) in matches.items()}
+
+def logLine(line):
+    return str(line[:LOG_LINE_MAX], 'utf-8', 'replace').rstrip()
+
+@functools.lru_cache(maxsize=None)
+def logScanner(signatures):
+    return LogScanner(signatures)
+
+def mergeLogMatches(range_matches):
+    """
+    Merges the matches of the ranges of a log, in the order of the ranges
+    """
+    matches = {}
+    for range_match in range_matches:
+        for index, (count, first_line, last_line) in range_match.items():
+            if index in matches:
+                matches[index][0] += count
+                matches[index][2] = last_line
             else:
-                print('\033[91m'+f'Customer has stonith-enabled set to: {i.attrib["value"]}' + '\033[0m')
-                print('\033[91m' + 'Please note that stonith-enabled=false cluster are not supported configuration as per the documentation https://documentation.suse.com/sle-ha/15-SP1/html/SLE-HA-all/cha-ha-fencing.html#sec-ha-fencing-recommend'+'\033[0m')
-                quit()
-        
+                matches[index] = [count, first_line, last_line]
+    return matches
+
+def processContext():
+    """
+    Start method of the process pools: the script runs threads (the checks of a report, the version check, the executor's own
+    threads), forking it could copy a lock held by another thread (logging, the report lock) and deadlock the worker,
+    so the workers are started from a fresh process (forkserver, spawn where it is not available)
+    """
+    import multiprocessing
+    return multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+def scanLogRange(path_to_scc, file_name, start, end, signatures):
+    """
+    Scans a range of a log of a report folder, run on the processes of the parallel scan
+    """
+    with SupportconfigReport(path_to_scc, [file_name]) as report:
+        report.released[file_name] = start - start % mmap.PAGESIZE
+        return logScanner(signatures).scan(report.fileBuffer(file_name), start, end, lambda offset: report.releasePages(file_name, offset))
+
+@profiled
+def scanLog(report, file_name, signatures, workers=LOG_SCAN_WORKERS):
+    """
+    Returns {signature index: [count, first line, last line]} of the log, a log bigger than LOG_SPLIT_SIZE in a report folder
+    is split in line aligned ranges scanned on workers processes
+    """
+    buffer = report.fileBuffer(file_name)
+    if workers <= 1 or len(buffer) <= LOG_SPLIT_SIZE or report.is_archive:
+        return logScanner(signatures).scan(buffer, 0, len(buffer), lambda offset: report.releasePages(file_name, offset))
+    from concurrent.futures import ProcessPoolExecutor
+    starts = [0]
+    while starts[-1] + LOG_SPLIT_SIZE < len(buffer):
+        newline = buffer.find(b'\n', starts[-1] + LOG_SPLIT_SIZE - 1)
+        if newline == -1 or newline + 1 >= len(buffer):
+            break
+        starts.append(newline + 1)
+    ends = starts[1:] + [len(buffer)]
+    logger.info('Scanning %s in %s ranges on %s processes', file_name, len(starts), min(workers, len(starts)))
+    with ProcessPoolExecutor(max_workers=min(workers, len(starts)), mp_context=processContext()) as executor:
+        range_matches = list(executor.map(scanLogRange, [report.path] * len(starts), [file_name] * len(starts), starts, ends, [signatures] * len(starts)))
+    return mergeLogMatches(range_matches)
+
+@profiled
+def logChecker(report, workers, result):
+    """
+    Searches messages.txt and ha.txt (the pacemaker and corosync logs) for the known issue signatures of rules.json
+    """
+    signatures = loadRules().logs
+    scan_signatures = tuple((signature['pattern'], tuple(signature.get('keywords', ()))) for signature in signatures)
+    log_issues = []
+    for file_name in LOG_FILES:
+        if not report.hasFile(file_name):
+            logger.info('%s is not in the report, its logs are not searched for known issues', file_name)
+            continue
+        logger.info('Searching %s for %s known issue signatures', file_name, len(signatures))
+        for index, (count, first_line, last_line) in sorted(scanLog(report, file_name, scan_signatures, workers).items()):
+            signature = signatures[index]
+            log_issues.append(f'{signature["id"]} found {count} times in {file_name}')
+            logger.info('%s found %s times in %s, first: %s, last: %s', signature['id'], count, file_name, first_line, last_line)
+            print('\033[33m' + f'{signature["message"]}, found {count} times in {file_name}' + '\033[0m')
+            print(f'    the last one: {last_line}')
+            result.addFinding(signature['id'], signature.get('severity', SEVERITY_WARNING), f'{signature["message"]} ({count} times in {file_name})', file_name,
+                {'count': count, 'first': first_line, 'last': last_line}, doc=signature.get('doc'))
+    if log_issues:
+        logger.info('We found the below known issues in the logs: %s', log_issues)
+        print('\033[33m' + f'We found the below known issues in the logs {log_issues}' + '\033[0m')
+    else:
+        print('Done checking the logs for known issues, and none found... proceeding further')
+        logger.info('Done with logs check')
+
+
+RESOURCE_TAGS = ('primitive', 'group', 'clone', 'master')
+CONSTRAINT_TAGS = ('rsc_location', 'rsc_colocation', 'rsc_order', 'rsc_ticket')
+
+class CibNvpair:
+    __slots__ = ('id', 'name', 'value')
+
+    def __init__(self, attrs):
+        self.id = attrs.get('id')
+        self.name = attrs.get('name')
+        self.value = attrs.get('value')
+
+    def __repr__(self):
+        return repr({'name': self.name, 'value': self.value, 'id': self.id})
+
+
+class CibOp:
+    __slots__ = ('id', 'name', 'interval', 'timeout', 'role', 'attrs')
+
+    def __init__(self, attrs):
+        self.attrs = dict(attrs)
+        self.id = self.attrs.get('id')
+        self.name = self.attrs.get('name')
+        self.interval = self.attrs.get('interval', '')
+        self.timeout = self.attrs.get('timeout', '')
+        self.role = self.attrs.get('role')
+
+    def __repr__(self):
+        return repr(self.attrs)
+
+
+class CibNode:
+    __slots__ = ('id', 'uname', 'attrs')
+
+    def __init__(self, attrs):
+        self.attrs = dict(attrs)
+        self.id = self.attrs.get('id')
+        self.uname = self.attrs.get('uname')
+
+    def __repr__(self):
+        return repr(self.attrs)
+
+
+class CibResource:
+    """
+    Primitive, group, clone or master of the CIB, the members of groups, clones and masters are in children.
+    meta and params map the meta_attributes and instance_attributes names to their values,
+    ops maps (op name, role) to the op, role is None for the operations that do not set it.
+    """
+    __slots__ = ('tag', 'id', 'type', 'attrs', 'parent_id', 'meta_attributes', 'instance_attributes', 'operations', 'children', 'meta', 'params', 'ops')
+
+    def __init__(self, element, parent_id=None):
+        self.tag = element.tag
+        self.attrs = dict(element.attrib)
+        self.id = self.attrs.get('id', '')
+        self.type = self.attrs.get('type')
+        self.parent_id = parent_id
+        meta_attributes, instance_attributes, operations, children = [], [], [], []
+        for child in element:
+            if child.tag == 'meta_attributes':
+                meta_attributes.extend(CibNvpair(nvpair.attrib) for nvpair in child if nvpair.tag == 'nvpair')
+            elif child.tag == 'instance_attributes':
+                instance_attributes.extend(CibNvpair(nvpair.attrib) for nvpair in child if nvpair.tag == 'nvpair')
+            elif child.tag == 'operations':
+                operations.extend(CibOp(op.attrib) for op in child if op.tag == 'op')
+            elif child.tag in RESOURCE_TAGS:
+                children.append(CibResource(child, self.id))
+        self.meta_attributes = tuple(meta_attributes)
+        self.instance_attributes = tuple(instance_attributes)
+        self.operations = tuple(operations)
+        self.children = tuple(children)
+        # lookup tables used by the checks, the first nvpair or op wins like the order pacemaker reads them
+        self.meta = MappingProxyType({nvpair.name: nvpair.value for nvpair in reversed(self.meta_attributes)})
+        self.params = MappingProxyType({nvpair.name: nvpair.value for nvpair in reversed(self.instance_attributes)})
+        self.ops = MappingProxyType({(op.name, op.role): op for op in reversed(self.operations)})
+
+    @property
+    def primitive(self):
+        # the primitive wrapped by a clone or master
+        return next((child for child in self.children if child.tag == 'primitive'), None)
+
+    def __repr__(self):
+        return f'<{self.tag} {self.id}>'
+
+
+class CibConstraint:
+    __slots__ = ('tag', 'id', 'attrs', 'resource_sets')
+
+    def __init__(self, element):
+        self.tag = element.tag
+        self.attrs = dict(element.attrib)
+        self.id = self.attrs.get('id', '')
+        resource_sets = []
+        for resource_set in element:
+            if resource_set.tag == 'resource_set':
+                resource_ids = tuple(resource_ref.attrib.get('id') for resource_ref in resource_set if resource_ref.tag == 'resource_ref')
+                resource_sets.append((dict(resource_set.attrib), resource_ids))
+        self.resource_sets = tuple(resource_sets)
+
+    def get(self, name, default=''):
+        return self.attrs.get(name, default)
+
+    def __repr__(self):
+        return repr(self.attrs)
+
+
+class ClusterModel:
+    """
+    Read only model of the cluster configuration section of cib.xml shared by all the checkers,
+    it is built in a single pass over the sections of the configuration (as CibStream parses them)
+    and indexes the resources by id and by agent type.
+    """
+    __slots__ = ('crm_config', 'crm_config_nvpairs', 'nodes', 'resources', 'constraints', 'resources_by_id', 'resources_by_type', 'constraints_by_tag')
+
+    def __init__(self, configuration):
+        crm_config_nvpairs, nodes, resources, constraints = [], [], [], []
+        for section in configuration:
+            if section.tag == 'crm_config':
+                for property_set in section:
+                    crm_config_nvpairs.extend(CibNvpair(nvpair.attrib) for nvpair in property_set if nvpair.tag == 'nvpair')
+            elif section.tag == 'nodes':
+                nodes.extend(CibNode(node.attrib) for node in section if node.tag == 'node')
+            elif section.tag == 'resources':
+                resources.extend(CibResource(resource) for resource in section if resource.tag in RESOURCE_TAGS)
+            elif section.tag == 'constraints':
+                constraints.extend(CibConstraint(constraint) for constraint in section if constraint.tag in CONSTRAINT_TAGS)
+        crm_config = {}
+        for nvpair in crm_config_nvpairs:
+            crm_config.setdefault(nvpair.name, nvpair.value)
+        resources_by_id = {}
+        resources_by_type = {}
+        pending_resources = list(resources)
+        while pending_resources:
+            resource = pending_resources.pop()
+            resources_by_id[resource.id] = resource
+            if resource.type is not None:
+                resources_by_type.setdefault(resource.type, []).append(resource)
+            pending_resources.extend(resource.children)
+        constraints_by_tag = {}
+        for constraint in constraints:
+            constraints_by_tag.setdefault(constraint.tag, []).append(constraint)
+        self.crm_config = MappingProxyType(crm_config)
+        self.crm_config_nvpairs = tuple(crm_config_nvpairs)
+        self.nodes = tuple(nodes)
+        self.resources = tuple(resources)
+        self.constraints = tuple(constraints)
+        self.resources_by_id = MappingProxyType(resources_by_id)
+        self.resources_by_type = MappingProxyType({agent_type: tuple(agent_resources) for agent_type, agent_resources in resources_by_type.items()})
+        self.constraints_by_tag = MappingProxyType({tag: tuple(tag_constraints) for tag, tag_constraints in constraints_by_tag.items()})
+
+    def topResources(self, tag):
+        return [resource for resource in self.resources if resource.tag == tag]
+
+    def parentOf(self, resource):
+        return self.resources_by_id.get(resource.parent_id)
+
+
+
+
+PROMOTED_ROLES = ('Master', 'Promoted') # pacemaker 2.1 renamed the Master role to Promoted
+UNPROMOTED_ROLES = ('Slave', 'Unpromoted')
+
+class ConstraintEdge:
+    """
+    One pairwise constraint of the graph: a plain colocation or order constraint, or a pair expanded from the resource
+    sets of one. attrs has the attributes of a plain constraint (rsc, with-rsc, first, then...), so the checks read both alike.
+    """
+    __slots__ = ('tag', 'id', 'attrs', 'constraint')
+
+    def __init__(self, constraint, attrs):
+        self.tag = constraint.tag
+        self.id = constraint.id
+        self.attrs = attrs
+        self.constraint = constraint
+
+    def get(self, name, default=''):
+        return self.attrs.get(name, default)
+
+    def __repr__(self):
+        return repr(self.attrs)
+
+
+class ConstraintGraph:
+    """
+    Graph of the constraints of the cluster model indexed by resource id: colocation edges go from rsc to with-rsc,
+    order edges from first to then and location constraints are listed under their resource. Resource sets are expanded
+    to edges the way pacemaker reads them, a sequential set chains its members and every set depends on the next one.
+    """
+
+    def __init__(self, cluster_model):
+        self.cluster_model = cluster_model
+        self.colocation_edges = []
+        self.order_edges = []
+        self.colocations_of = {}
+        self.colocations_with = {}
+        self.orders_after = {}
+        self.orders_before = {}
+        self.locations_of = {}
+        self.agents_of = {}
+        for constraint in cluster_model.constraints_by_tag.get('rsc_colocation', ()):
+            for edge in self.colocationEdges(constraint):
+                self.colocation_edges.append(edge)
+                self.colocations_of.setdefault(edge.get('rsc'), []).append(edge)
+                self.colocations_with.setdefault(edge.get('with-rsc'), []).append(edge)
+        for constraint in cluster_model.constraints_by_tag.get('rsc_order', ()):
+            for edge in self.orderEdges(constraint):
+                self.order_edges.append(edge)
+                self.orders_after.setdefault(edge.get('first'), []).append(edge)
+                self.orders_before.setdefault(edge.get('then'), []).append(edge)
+        for constraint in cluster_model.constraints_by_tag.get('rsc_location', ()):
+            resource_ids = [constraint.get('rsc')] if constraint.get('rsc') else [resource_id for _, set_ids in constraint.resource_sets for resource_id in set_ids]
+            for resource_id in resource_ids:
+                self.locations_of.setdefault(resource_id, []).append(constraint)
+
+    @staticmethod
+    def colocationEdges(constraint):
+        if not constraint.resource_sets:
+            return [ConstraintEdge(constraint, constraint.attrs)]
+        def edge(rsc, rsc_set, with_rsc, with_set):
+            attrs = {'id': constraint.id, 'score': rsc_set.get('score', constraint.get('score')), 'rsc': rsc, 'with-rsc': with_rsc}
+            if rsc_set.get('role'):
+                attrs['rsc-role'] = rsc_set['role']
+            if with_set.get('role'):
+                attrs['with-rsc-role'] = with_set['role']
+            return ConstraintEdge(constraint, attrs)
+        edges = []
+        for set_attrs, resource_ids in constraint.resource_sets:
+            if set_attrs.get('sequential', 'true') == 'true':
+                # every member of a sequential set is colocated with the member before it
+                edges.extend(edge(resource_ids[i], set_attrs, resource_ids[i - 1], set_attrs) for i in range(1, len(resource_ids)))
+        for (rsc_set, rsc_ids), (with_set, with_ids) in zip(constraint.resource_sets, constraint.resource_sets[1:]):
+            edges.extend(edge(rsc, rsc_set, with_rsc, with_set) for rsc in rsc_ids for with_rsc in with_ids)
+        return edges
+
+    @staticmethod
+    def orderEdges(constraint):
+        if not constraint.resource_sets:
+            return [ConstraintEdge(constraint, constraint.attrs)]
+        def edge(first, first_set, then, then_set):
+            attrs = {'id': constraint.id, 'first': first, 'then': then}
+            for name in ('kind', 'score', 'symmetrical'):
+                if constraint.get(name):
+                    attrs[name] = constraint.get(name)
+            if first_set.get('action'):
+                attrs['first-action'] = first_set['action']
+            if then_set.get('action'):
+                attrs['then-action'] = then_set['action']
+            return ConstraintEdge(constraint, attrs)
+        edges = []
+        for set_attrs, resource_ids in constraint.resource_sets:
+            if set_attrs.get('sequential', 'true') == 'true':
+                edges.extend(edge(resource_ids[i - 1], set_attrs, resource_ids[i], set_attrs) for i in range(1, len(resource_ids)))
+        for (first_set, first_ids), (then_set, then_ids) in zip(constraint.resource_sets, constraint.resource_sets[1:]):
+            # the last member of a sequential set is the one started after the others, the first one is started before them
+            if first_set.get('sequential', 'true') == 'true':
+                first_ids = first_ids[-1:]
+            if then_set.get('sequential', 'true') == 'true':
+                then_ids = then_ids[:1]
+            edges.extend(edge(first, first_set, then, then_set) for first in first_ids for then in then_ids)
+        return edges
+
+    def colocationsWith(self, resource_id):
+        return self.colocations_with.get(resource_id, ())
+
+    def ordersBefore(self, resource_id):
+        return self.orders_before.get(resource_id, ())
+
+    def ordersAfter(self, resource_id):
+        return self.orders_after.get(resource_id, ())
+
+    def agents(self, resource_id):
+        """
+        Returns the agent types of the primitives of a resource, the resource itself for a primitive
+        """
+        if resource_id not in self.agents_of:
+            resource = self.cluster_model.resources_by_id.get(resource_id)
+            agents = set()
+            pending_resources = [resource] if resource is not None else []
+            while pending_resources:
+                resource = pending_resources.pop()
+                if resource.type is not None:
+                    agents.add(resource.type)
+                pending_resources.extend(resource.children)
+            self.agents_of[resource_id] = frozenset(agents)
+        return self.agents_of[resource_id]
+
+    def isPromotable(self, resource_id):
+        resource = self.cluster_model.resources_by_id.get(resource_id)
+        return resource is not None and (resource.tag == 'master' or (resource.tag == 'clone' and resource.meta.get('promotable') == 'true'))
+
+    def isGroup(self, resource_id):
+        resource = self.cluster_model.resources_by_id.get(resource_id)
+        return resource is not None and resource.tag == 'group'
+
+    def isIpGroup(self, resource_id):
+        return 'IPaddr2' in self.agents(resource_id) and not self.isPromotable(resource_id)
+
+    def isHanaMaster(self, resource_id):
+        return self.isPromotable(resource_id) and not self.agents(resource_id).isdisjoint(('SAPHana', 'SAPHanaController'))
+
+    def isHanaTopology(self, resource_id):
+        resource = self.cluster_model.resources_by_id.get(resource_id)
+        return resource is not None and resource.tag == 'clone' and 'SAPHanaTopology' in self.agents(resource_id)
+
+    def isDrbdMaster(self, resource_id):
+        return self.isPromotable(resource_id) and 'drbd' in self.agents(resource_id)
+
+    def sapInstanceKind(self, resource_id):
+        """
+        Returns 'ERS' or 'ASCS' for a resource running the SAPInstance of an ERS or an (A)SCS instance, None otherwise
+        """
+        pending_resources = [self.cluster_model.resources_by_id[resource_id]] if resource_id in self.cluster_model.resources_by_id else []
+        while pending_resources:
+            resource = pending_resources.pop()
+            if resource.type == 'SAPInstance':
+                instance_name = resource.params.get('InstanceName', '')
+                if resource.params.get('IS_ERS') == 'true' or instance_name.find('_ERS') != -1:
+                    return 'ERS'
+                if instance_name.find('SCS') != -1:
+                    return 'ASCS'
+            pending_resources.extend(resource.children)
+        return None
+
+    def joins(self, edge, is_one, is_other):
+        """
+        Returns True when the edge is between a resource matching is_one and a resource matching is_other, in either direction
+        """
+        first, second = (edge.get('rsc'), edge.get('with-rsc')) if edge.tag == 'rsc_colocation' else (edge.get('first'), edge.get('then'))
+        return (is_one(first) and is_other(second)) or (is_one(second) and is_other(first))
+
+    def isAscs(self, resource_id):
+        return self.sapInstanceKind(resource_id) == 'ASCS'
+
+    def isErs(self, resource_id):
+        return self.sapInstanceKind(resource_id) == 'ERS'
+
+    def topOf(self, resource_id):
+        resource = self.cluster_model.resources_by_id.get(resource_id)
+        while resource is not None and resource.parent_id is not None:
+            resource = self.cluster_model.resources_by_id.get(resource.parent_id)
+        return resource.id if resource is not None else resource_id
+
+    def orderCycles(self):
+        """
+        Returns the cycles of the order edges, as the sorted resource ids of every strongly connected component
+        with more than one resource or ordered after itself (Tarjan's algorithm, without recursion)
+        """
+        index_of, low_of, on_stack, stack, cycles = {}, {}, set(), [], []
+        for root in self.orders_after:
+            if root in index_of:
+                continue
+            index_of[root] = low_of[root] = len(index_of)
+            stack.append(root)
+            on_stack.add(root)
+            pending = [(root, iter(self.orders_after.get(root, ())))]
+            while pending:
+                resource_id, edges = pending[-1]
+                edge = next(edges, None)
+                if edge is not None:
+                    then = edge.get('then')
+                    if then not in index_of:
+                        index_of[then] = low_of[then] = len(index_of)
+                        stack.append(then)
+                        on_stack.add(then)
+                        pending.append((then, iter(self.orders_after.get(then, ()))))
+                    elif then in on_stack:
+                        low_of[resource_id] = min(low_of[resource_id], index_of[then])
+                    continue
+                pending.pop()
+                if pending:
+                    parent_id = pending[-1][0]
+                    low_of[parent_id] = min(low_of[parent_id], low_of[resource_id])
+                if low_of[resource_id] != index_of[resource_id]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == resource_id:
+                        break
+                if len(component) > 1 or any(edge.get('then') == resource_id for edge in self.orders_after.get(resource_id, ())):
+                    cycles.append(sorted(component))
+        return cycles
+
+
+CIB_CHUNK_SIZE = 64 * 1024 # bytes of cib.xml fed to the parser at a time
+
+class CibStream:
+    """
+    Parses the cib.xml section of the index incrementally: the section is fed to lxml's pull parser CIB_CHUNK_SIZE bytes
+    at a time, straight from the buffer of ha.txt, and sections() yields every section of <configuration> (crm_config, nodes,
+    resources, constraints) as soon as it is parsed. A section is cleared once the model took what it needs from it,
+    and the parsing stops at </configuration>, so the status section after it (the operation history, most of a big cib)
+    is never parsed.
+    """
+
+    def __init__(self, cib_view):
+        self.cib_view = cib_view
+        self.has_configuration = False
+
+    def sections(self):
+        from lxml import etree # imported to use the enhanced parser in this library.
+        parser = etree.XMLPullParser(events=('end',), recover=True, remove_comments=True)
+        for offset in range(0, len(self.cib_view), CIB_CHUNK_SIZE):
+            parser.feed(self.cib_view[offset:offset + CIB_CHUNK_SIZE].tobytes())
+            for section in self.configurationSections(parser):
+                yield section
+            if self.has_configuration:
+                return
+        # the recovering parser closes the elements left open by a truncated cib
+        parser.close()
+        for section in self.configurationSections(parser):
+            yield section
+
+    def configurationSections(self, parser):
+        for _, element in parser.read_events():
+            parent = element.getparent()
+            if parent is None or self.has_configuration:
+                continue
+            if element.tag == 'configuration' and parent.getparent() is None:
+                self.has_configuration = True
+            elif parent.tag == 'configuration' and parent.getparent() is not None and parent.getparent().getparent() is None:
+                yield element
+                element.clear()
+
+
+def isBlank(view):
+    return all(not view[offset:offset + 4096].tobytes().strip() for offset in range(0, len(view), 4096))
+
+@profiled
+def readingCib(ha_index):
+    cib_view = ha_index.getSectionView(CIB_SECTION)
+    if cib_view is None or isBlank(cib_view):
+        logger.info('cib.xml cannot be found in ha.txt')
+        print('\033[91m' + 'cib.xml cannot be found in ha.txt, please ensure the supportconfig report was collected from a cluster node' + '\033[0m')
+        return None
+    cib_stream = CibStream(cib_view)
+    cluster_model = ClusterModel(cib_stream.sections())
+    if not cib_stream.has_configuration:
+        logger.info('cib.xml does not have a configuration section')
+        print('\033[91m' + 'cib.xml in ha.txt does not have the cluster configuration, please check the supportconfig report' + '\033[0m')
+        return None
+    return cluster_model
+    
+
+@profiled
+def propertyChecker(cluster_model, result):
+    logger.debug('crm_config: %s', cluster_model.crm_config)
+    stonith_enabled = cluster_model.crm_config.get('stonith-enabled')
+    if stonith_enabled is not None:
+        logger.info('Customer has stonith-enabled set to: %s', stonith_enabled)
+        if stonith_enabled == 'true':
+            print(f'Customer has stonith-enabled set to: {stonith_enabled}')
+        else:
+            print('\033[91m'+f'Customer has stonith-enabled set to: {stonith_enabled}' + '\033[0m')
+            print('\033[91m' + 'Please note that stonith-enabled=false cluster are not supported configuration as per the documentation https://documentation.suse.com/sle-ha/15-SP1/html/SLE-HA-all/cha-ha-fencing.html#sec-ha-fencing-recommend'+'\033[0m')
+            result.addFinding('pacemaker.stonith_enabled', SEVERITY_CRITICAL, f'stonith-enabled is {stonith_enabled}, clusters without stonith are not supported', 'cib-bootstrap-options', stonith_enabled, 'true',
+                'https://documentation.suse.com/sle-ha/15-SP1/html/SLE-HA-all/cha-ha-fencing.html#sec-ha-fencing-recommend')
 
-    node_list = []
-    node_list_xml = root[1]
+    node_list = [node.uname for node in cluster_model.nodes]
     azure_fence_agent = sbd_fence_agent = 0
-    
-    for  i in node_list_xml:
-        node_list.append(i.attrib['uname'])
-    
-    logger.info(f'Customer has the below nodes as part of cluster: {node_list}')
+    logger.info('Customer has the below nodes as part of cluster: %s', node_list)
     print(f'Customer has the below nodes as part of cluster: {node_list}')
 
-    cluster_resources = root[2]
     fencing_resources = []
-    for i in cluster_resources:
-        if i.attrib.has_key('type'):
-            if i.attrib['type'] == 'fence_azure_arm':
-                fencing_resources.append('azure_fence_agent')
-                azure_fence_agent = 1
-            if i.attrib['type'] == 'external/sbd':
-                fencing_resources.append('sbd')
-                sbd_fence_agent = 1
+    if 'fence_azure_arm' in cluster_model.resources_by_type:
+        fencing_resources.append('azure_fence_agent')
+        azure_fence_agent = 1
+    if 'external/sbd' in cluster_model.resources_by_type:
+        fencing_resources.append('sbd')
+        sbd_fence_agent = 1
     
-    logger.info(f'Customer has the below fencing mechanism configured: {fencing_resources}')
+    logger.info('Customer has the below fencing mechanism configured: %s', fencing_resources)
     print(f'Customer has the below fencing mechanism configured: {fencing_resources}')
+    if not fencing_resources:
+        result.addFinding('pacemaker.fencing', SEVERITY_WARNING, 'No azure fence agent or SBD resource is configured')
     return azure_fence_agent, sbd_fence_agent
 
-def SAPHanaChecker(resources):
-    i = resources
-    xml_string = ET.tostring(i, encoding='UTF-8', method='xml')
-    dict_xml = xmltodict.parse(xml_string)
-    dict_xml_topology = {} # topology dictinary
-    dict_xml_db = {} # DB dictinary
+@profiled
+def SAPHanaChecker(cluster_model, result):
     logger.info('Determining the variables names for DB resource and Topology resource')
-    #print(dict_xml)
-    #print(dict_xml['resources'].keys())
-    #exit()
-    for res in list(dict_xml['resources'].keys()):
-        if res == 'master':
-            if type(dict_xml['resources']['master']) is list:
-                for z in dict_xml['resources']['master']:
-                    if z['@id'].find('SAPHana') != -1:
-                        dict_xml_db = z
-            elif type(dict_xml['resources']['master']) is not list:
-                dict_xml_db = dict_xml['resources']['master']
-    
-        if res == 'clone':
-            if type(dict_xml['resources']['clone']) is list:
-                for z in dict_xml['resources']['clone']:
-                    if z['@id'].find('SAPHana') != -1:
-                        dict_xml_topology = z
-            elif type(dict_xml['resources']['clone']) is not list:
-                dict_xml_topology = dict_xml['resources']['clone']
-
-    printed=False
-    #logger.info(i.attrib['id'])
-    logger.info(dict_xml_topology)
-    logger.info(dict_xml_db)
-    #if i.attrib['id'].find('Topology') == -1:
-    #    logger.info('Customer have SAP hana cluster')
-    #    print('Customer have SAP hana cluster')
-    cluster_type='SAPHana'
+    topology_resource = None # topology clone
+    db_resource = None # DB master
+    for resource in cluster_model.resources_by_type.get('SAPHanaTopology', ()):
+        if cluster_model.parentOf(resource) is not None:
+            topology_resource = cluster_model.parentOf(resource)
+    for resource in cluster_model.resources_by_type.get('SAPHana', ()):
+        if cluster_model.parentOf(resource) is not None:
+            db_resource = cluster_model.parentOf(resource)
+    if topology_resource is None:
+        topology_resource = next((resource for resource in cluster_model.topResources('clone') if resource.id.find('SAPHana') != -1), None)
+    if db_resource is None:
+        db_resource = next((resource for resource in cluster_model.topResources('master') if resource.id.find('SAPHana') != -1), None)
+
+    logger.debug('SAP Hana topology resource %s and DB resource %s', topology_resource, db_resource)
+    check_rules = loadRules()
     issues_config = {}
-    #if i.attrib['id'].find('Topology') != -1:
-    if dict_xml_topology is not None:
-    #if 'clone' in dict_xml.keys() and dict_xml_topology['@id'].find('Topology') != -1:
-        issues_config[dict_xml_topology['@id']] = []
+    if topology_resource is not None:
+        issues_config[topology_resource.id] = []
         logger.info('Customer have SAP hana cluster')
         print('Customer have SAP hana cluster')
-        printed=True
-        #logger.info(i.attrib['id'])
-        logger.info(dict_xml_topology['@id'])
+        logger.info(topology_resource.id)
         logger.info('Checking on the topology resource metadata as per our documentation')
-        #logger.info(i[0])
-        #issues_dict['topology_metadata']={}
-        #issues_dict['topology_operation']={}
-        clone_node_max_dict = next((item for item in dict_xml_topology['meta_attributes']['nvpair'] if item["@name"] == "clone-node-max"), None)
-        interleave_dict = next((item for item in dict_xml_topology['meta_attributes']['nvpair'] if item["@name"] == "interleave"), None)
-        try:
-            if clone_node_max_dict['@value'] != '1':
-                issues_config[dict_xml_topology['@id']].append(clone_node_max_dict)
-            if interleave_dict['@value'] != 'true':
-                issues_config[dict_xml_topology['@id']].append(interleave_dict)
-        except (TypeError, AttributeError) as e:
-            issues_config[dict_xml_topology['@id']].append(f"exception: {traceback.format_exc()}")
-
-       # for j in i[0]:
-       #     logger.info(j.attrib['name'])
-       #     if j.attrib['name'] == 'clone-node-max' and j.attrib['value'] != "1":
-       #         issues_dict['topology_metadata'].update({'clone-node-max' : j.attrib['value']})
-       #     elif j.attrib['name'] == 'interleave' and j.attrib['value'] != 'true':
-       #         issues_dict['topology_metadata'].update({'interleave' : j.attrib['value']})
         logger.info('Checking on the permittive on SAP Topology')
-        logger.info(dict_xml_topology['primitive']['operations']['op'])
-        #logger.info(i[1].attrib['type'])
-        monitor_dict = next((item for item in dict_xml_topology['primitive']['operations']['op'] if item["@name"] == "monitor"), None)
-        start_dict = next((item for item in dict_xml_topology['primitive']['operations']['op'] if item["@name"] == "start"), None)
-        stop_dict = next((item for item in dict_xml_topology['primitive']['operations']['op'] if item["@name"] == "stop"), None)
-        try:
-            if monitor_dict['@interval'] != '10' or monitor_dict['@timeout'] != '600':
-                issues_config[dict_xml_topology['@id']].append(monitor_dict)
-            if start_dict['@interval'] != '0' or start_dict['@timeout'] != '600':
-                issues_config[dict_xml_topology['@id']].append(start_dict)
-            if stop_dict['@interval'] != '0' or stop_dict['@timeout'] != '300':
-                issues_config[dict_xml_topology['@id']].append(stop_dict)
-        except (TypeError, AttributeError) as e:
-            issues_config[dict_xml_topology['@id']].append(f"exception: {traceback.format_exc()}")
-        #for j in i[1][0]:
-        #    if j.attrib['name'] == 'monitor' and (j.attrib['interval'] != "10" or j.attrib['timeout'] != "600"):
-        #            issues_dict['topology_operation'].update({'monitor' : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        #    if j.attrib['name'] == 'start' and (j.attrib['interval'] != "0" or j.attrib['timeout'] != "600"):
-        #        issues_dict['topology_operation'].update({'start' : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        #    if j.attrib['name'] == 'stop' and (j.attrib['interval'] != "0" or j.attrib['timeout'] != "300"):
-        #        issues_dict['topology_operation'].update({'stop' : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
+        if topology_resource.primitive is not None:
+            issues_config[topology_resource.id].extend(ruleIssueEntry(rule, observed) for rule, observed in recordRuleIssues(result, check_rules.resourceIssues('SAPCluster', topology_resource.primitive, topology_resource, 'SAPHanaTopology'), topology_resource.id))
         if any(issues_config.values()):
-            logger.info(f'SAP topology has issues below {issues_config}')
+            logger.info('SAP topology has issues below %s', issues_config)
             print('\033[33m' + f'SAP topology has issues below {issues_config}' + '\033[0m')     
             print('\033[33m' + 'Please refer to documentation for the suggested values of timeout and interval: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources' + '\033[0m')
-        #if issues_dict['topology_metadata'] or issues_dict['topology_operation']:
-        #    logger.info(f'SAP topology has issues below {issues_dict}')
-        #    print(f'SAP topology has issues below {issues_dict}')
-            
 
-    #elif i.attrib['id'].find('SAPHana') != -1 and i.attrib['id'].find('Topology') == -1:
-    if dict_xml_db is not None:
-    #elif 'master' in dict_xml.keys() and dict_xml_db['@id'].find('SAPHana') != -1:
-        issues_config[dict_xml_db['@id']] = []
-        #if not printed:
-        #    logger.info('Customer have SAP hana cluster')
-        #    print('Customer have SAP hana cluster')
-        logger.info(dict_xml_db['@id'])
+    if db_resource is not None:
+        issues_config[db_resource.id] = []
+        logger.info(db_resource.id)
         logger.info('Checking on the SAP resource as per our documentation')
-        #issues_dict['Hana_metadata']={}
-        #issues_dict['Hana_operation']={}
-        #issues_dict['Hana_instance_attributes']={}
-        #logger.info(i[0])
-        is_managed_dict = next((item for item in dict_xml_db['meta_attributes']['nvpair'] if item["@name"] == "is-managed"), None)
-        notify_dict = next((item for item in dict_xml_db['meta_attributes']['nvpair'] if item["@name"] == "notify"), None)
-        clone_max_dict = next((item for item in dict_xml_db['meta_attributes']['nvpair'] if item["@name"] == "clone-max"), None)
-        clone_node_max_dict = next((item for item in dict_xml_db['meta_attributes']['nvpair'] if item["@name"] == "clone-node-max"), None)
-        interleave_dict = next((item for item in dict_xml_db['meta_attributes']['nvpair'] if item["@name"] == "interleave"), None)
-        try:
-            # For Managed property it was removed with pacemaker config 3-x this need to check if any of those parameters is not none based on previous output
-            if is_managed_dict != None: # checking on it as the default value is true, if not set. If set we need to ensure it is true , otherwise we should mark it as error https://clusterlabs.org/pacemaker/doc/deprecated/en-US/Pacemaker/1.1/html/Pacemaker_Explained/s-resource-options.html
-                if is_managed_dict['@value'] != 'true':
-                    issues_config[dict_xml_db['@id']].append(is_managed_dict)
-            if clone_max_dict['@value'] != '2':
-                issues_config[dict_xml_db['@id']].append(clone_max_dict)
-            if clone_node_max_dict['@value'] != '1':
-                issues_config[dict_xml_db['@id']].append(clone_node_max_dict)
-            if notify_dict['@value'] != 'true':
-                issues_config[dict_xml_db['@id']].append(notify_dict)
-            if interleave_dict['@value'] != 'true':
-                issues_config[dict_xml_db['@id']].append(interleave_dict)
-        except (TypeError, AttributeError) as e:
-            issues_config[dict_xml_db['@id']].append(f"exception: {traceback.format_exc()}")
-
-        #for j in i[0]:
-        #    logger.info(j.attrib['name'])
-        #    if j.attrib['name'] == 'clone-node-max' and j.attrib['value'] != "1":
-        #        issues_dict['Hana_metadata'].update({j.attrib['name'] : j.attrib['value']})
-        #    elif j.attrib['name'] == 'interleave' and j.attrib['value'] != 'true':
-        #        issues_dict['Hana_metadata'].update({j.attrib['name'] : j.attrib['value']})
-        #    elif j.attrib['name'] == 'is-managed' and j.attrib['value'] != 'true':
-        #        issues_dict['Hana_metadata'].update({j.attrib['name'] : j.attrib['value']})
-        #    elif j.attrib['name'] == 'notify' and j.attrib['value'] != 'true':
-        #        issues_dict['Hana_metadata'].update({j.attrib['name'] : j.attrib['value']})
-        #    elif j.attrib['name'] == 'clone-max' and j.attrib['value'] != '2':
-        #        issues_dict['Hana_metadata'].update({j.attrib['name'] : j.attrib['value']})                
+        # is-managed is only checked when it is set as its default value is true https://clusterlabs.org/pacemaker/doc/deprecated/en-US/Pacemaker/1.1/html/Pacemaker_Explained/s-resource-options.html
+        logger.info('Checking on the permittive and the instance_attributes of SAP Hana')
+        db_primitive = db_resource.primitive
+        if db_primitive is not None:
+            issues_config[db_resource.id].extend(ruleIssueEntry(rule, observed) for rule, observed in recordRuleIssues(result, check_rules.resourceIssues('SAPCluster', db_primitive, db_resource, 'SAPHana'), db_resource.id))
+        db_params = db_primitive.params if db_primitive is not None else {}
+        logger.debug('SAP Hana parameters: %s', db_params)
+        sid = db_params.get('SID')
+        instanceNumber = db_params.get('InstanceNumber')
+        auto_register = db_params.get('AUTOMATED_REGISTER')
         
-        logger.info('Checking on the permittive of SAP Hana')
-        logger.info(dict_xml_db['primitive']['operations']['op'])
-        master_monitor = next((item for item in dict_xml_db['primitive']['operations']['op'] if item["@name"] == "monitor" and item['@role'] == 'Master'), None)
-        slave_monitor = next((item for item in dict_xml_db['primitive']['operations']['op'] if item["@name"] == "monitor" and item['@role'] == 'Slave'), None)
-        start_dict = next((item for item in dict_xml_db['primitive']['operations']['op'] if item["@name"] == "start"), None)
-        stop_dict = next((item for item in dict_xml_db['primitive']['operations']['op'] if item["@name"] == "stop"), None)
-        promote_dict = next((item for item in dict_xml_db['primitive']['operations']['op'] if item["@name"] == "promote"), None)
-        try:
-            if master_monitor['@name'] == 'monitor' and master_monitor['@role'] == 'Master' and (master_monitor['@interval'] != "60" or master_monitor['@timeout'] != "700"):
-                issues_config[dict_xml_db['@id']].append(master_monitor)
-            if slave_monitor['@name'] == 'monitor' and slave_monitor['@role'] == 'Slave' and (slave_monitor['@interval'] != "61" or slave_monitor['@timeout'] != "700"):
-                issues_config[dict_xml_db['@id']].append(slave_monitor)
-            if start_dict['@name'] == 'start' and (start_dict['@interval'] != "0" or start_dict['@timeout'] != "3600"):
-                issues_config[dict_xml_db['@id']].append(start_dict)
-            if stop_dict['@name'] == 'stop' and (stop_dict['@interval'] != "0" or stop_dict['@timeout'] != "3600"):
-                issues_config[dict_xml_db['@id']].append(stop_dict)
-            if promote_dict['@name'] == 'promote' and (promote_dict['@interval'] != "0" or promote_dict['@timeout'] != "3600"):
-                issues_config[dict_xml_db['@id']].append(promote_dict)
-        except (TypeError, AttributeError) as e:
-            issues_config[dict_xml_db['@id']].append(f"exception: {traceback.format_exc()}")
-        #logger.info(i[1].attrib['id'])
-        #logger.info(i[1].attrib['type'])
-        #for j in i[1][0]:
-        #    if j.attrib['name'] == 'monitor' and j.attrib['role'] == 'Master' and (j.attrib['interval'] != "60" or j.attrib['timeout'] != "700"):
-        #        issues_dict['Hana_operation'].update({j.attrib['name'] : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        #    if j.attrib['name'] == 'monitor' and j.attrib['role'] == 'Slave' and (j.attrib['interval'] != "61" or j.attrib['timeout'] != "700"):
-        #        issues_dict['Hana_operation'].update({j.attrib['name'] : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        #    if j.attrib['name'] == 'start' and (j.attrib['interval'] != "0" or j.attrib['timeout'] != "3600"):
-        #        issues_dict['Hana_operation'].update({j.attrib['name'] : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        #    if j.attrib['name'] == 'stop' and (j.attrib['interval'] != "0" or j.attrib['timeout'] != "3600"):
-        #        issues_dict['Hana_operation'].update({j.attrib['name'] : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        #    if j.attrib['name'] == 'promote' and (j.attrib['interval'] != "0" or j.attrib['timeout'] != "3600"):
-        #        issues_dict['Hana_operation'].update({j.attrib['name'] : { 'interval': j.attrib['interval'] , 'timeout' : j.attrib['timeout'] }})
-        
-        logger.info('Checking on the instance_attributes of SAP Hana')
-        logger.info(dict_xml_db['primitive']['instance_attributes'])
-        temp_dict={}
-        for j in dict_xml_db['primitive']['instance_attributes']['nvpair']:
-            if j['@name'] == 'PREFER_SITE_TAKEOVER' and j['@value'] != 'true':
-                temp_dict[j['@name']] = j['@value']
-                issues_config[dict_xml_db['@id']].append(temp_dict)
-            if j['@name'] == 'DUPLICATE_PRIMARY_TIMEOUT' and j['@value'] != '7200':
-                temp_dict[j['@name']] = j['@value']
-                issues_config[dict_xml_db['@id']].append(temp_dict)
-            if j['@name'] == 'SID':
-                sid = j['@value']
-            if j['@name'] == 'InstanceNumber':
-                instanceNumber = j['@value']
-            if j['@name'] == 'AUTOMATED_REGISTER':
-                auto_register = j['@value']
-        
-        logger.info(f'Customer has database of name {sid} and instance number {instanceNumber}, please also note that the vaule for AUTOMATED_REGISTER is' + '\033[33m' + f' {auto_register}' + '\033[0m')
+        logger.info('Customer has database of name %s and instance number %s, please also note that the vaule for AUTOMATED_REGISTER is %s', sid, instanceNumber, auto_register)
         print(f'Customer has database of name {sid} and instance number {instanceNumber}, please also note that the vaule for AUTOMATED_REGISTER is' + '\033[33m' + f' {auto_register}' + '\033[0m')
+        result.addFinding('sapcluster.saphana.automated_register', SEVERITY_INFO, f'Database {sid} with instance number {instanceNumber} has AUTOMATED_REGISTER set to {auto_register}', db_resource.id, auto_register)
 
-        #if issues_dict['Hana_metadata'] or issues_dict['Hana_operation']:
         if any(issues_config.values()):
-            logger.info(f'SAP Hana has issues below {issues_config}')
+            logger.info('SAP Hana has issues below %s', issues_config)
             print('\033[33m' + f'SAP Hana has issues below {issues_config}' + '\033[0m')     
             print('\033[33m' + 'Please refer to documentation for the suggested values of timeout and interval: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources' + '\033[0m')
-            #logger.info(f'SAP Hana has issues below {issues_config}')
-            #print(f'SAP Hana has issues below {issues_config}')
 
-def ASCSGroupChecker(resources):
-    i = resources
-    fs_issues={}
-    logger.info(i['@id'])
-    logger.info('Customer have ASCS/ERS cluster')
-    print('Customer have ASCS/ERS cluster')
-    logger.info('Start checking on the ASCS resource group')
-    primittives = i['primitive']
-    for resource in primittives:
-        if '@type' in resource.keys():
-            if resource['@type'] == 'Filesystem':
-                logger.info('Start checking on ASCS file system all details')
-                fs_issues['ascs_fs_operation']={}
-                logger.info(f'Resource name checking is {resource["@id"]}')
-                logger.info('Checking on instance_attributes')
-                for j in resource['instance_attributes']['nvpair']:
-                    if j['@name'] == 'device':
-                        device=j['@value']
-                    if j['@name'] == 'directory':
-                        mountpoint=j['@value']
-                    if j['@name'] == 'fstype':
-                        fstype=j['@value']
-
-                logger.info('\033[33m' + f'ASCS file system is {fstype}, and the source device is {device} and mounted on {mountpoint}'+'\033[0m')
-                print('\033[33m' + f'ASCS file system is {fstype}, and the source device is {device} and mounted on {mountpoint}'+'\033[0m')
-                logger.info('Checking file system operation parameters:')
+def operationIssue(rule, op):
+    if op is None:
+        return {rule['name']: 'not configured'}
+    return {op.name : { 'interval': op.interval , 'timeout' : op.timeout }}
 
-                for j in resource['operations']['op']:
-                    if j['@name'] == 'monitor' and (j['@interval'].find('20') == -1 or j['@timeout'].find('40') == -1 ):
-                        fs_issues['ascs_fs_operation'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-                    if j['@name'] == 'start' and (j['@interval'] != "0" or j['@timeout'].find('60') == -1):
-                        fs_issues['ascs_fs_operation'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-                    if j['@name'] == 'stop' and (j['@interval'] != "0" or j['@timeout'].find('60') == -1):
-                        fs_issues['ascs_fs_operation'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-
-                if fs_issues['ascs_fs_operation']:
-                    logger.info(f'ASCS file system resource has following issues {fs_issues}')
-                    print(f'ASCS file system resource has following issues {fs_issues}')
-
-            if resource['@type'] == 'anything' or resource['@type'] == 'azure-lb':
-                if resource['@type'] == 'anything':
-                    logger.info('Customer is using socat or nc for load balancer probing')
-                    for j in resource['instance_attributes']['nvpair']:
-                        if j['@name'] == 'binfile':
-                            command = j['@value']
-                        if j['@name'] == 'cmdline_options':
-                            options = j['@value']
-                    logger.info('\033[33m' + f'cusotmer is using command {command} with the following options {options} for azure load balancer probing for ASCS'+'\033[0m')
-                    print('\033[33m' + f'cusotmer is using command {command} with the following options {options} for azure load balancer probing for ASCS'+'\033[0m')
-                    fs_issues['socat_operations']={}
-                    if resource['operations']['op']['@name'] == 'monitor' and (resource['operations']['op']['@interval'].find('10') == -1 or resource['operations']['op']['@timeout'].find('20') == -1 ):
-                        fs_issues['socat_operations'].update({resource['operations']['op']['@name'] : { 'interval': resource['operations']['op']['@interval'] , 'timeout' : resource['operations']['op']['@timeout'] }})
-                    
-                    if fs_issues['socat_operations']:
-                        logger.info(f'ASCS Azure lb has the following issues {fs_issues}')
-                        print(f'ASCS Azure lb has the following issues {fs_issues}') 
+def sapInstanceGroupChecker(group, instance_label, result):
+    """
+    Checks the file system, load balancer probe and SAPInstance resources of an ASCS or ERS group,
+    instance_label is either ASCS or ERS and only changes the wording of the findings.
+    """
+    fs_issues={}
+    issues_prefix = instance_label.lower()
+    check_rules = loadRules()
+    logger.info('Start checking on the %s resource group', instance_label)
+    for resource in group.children:
+        if resource.tag != 'primitive' or resource.type is None:
+            continue
+        if resource.type == 'Filesystem':
+            logger.info('Start checking on %s file system all details', instance_label)
+            fs_issues[f'{issues_prefix}_fs_operation']={}
+            logger.info('Resource name checking is %s', resource.id)
+            logger.info('Checking on instance_attributes')
+            device = resource.params.get('device')
+            mountpoint = resource.params.get('directory')
+            fstype = resource.params.get('fstype')
+
+            logger.info('\033[33m' + f'{instance_label} file system is {fstype}, and the source device is {device} and mounted on {mountpoint}'+'\033[0m')
+            print('\033[33m' + f'{instance_label} file system is {fstype}, and the source device is {device} and mounted on {mountpoint}'+'\033[0m')
+            logger.info('Checking file system operation parameters:')
+
+            for rule, j in recordRuleIssues(result, check_rules.resourceIssues('ASCSERS', resource), resource.id):
+                fs_issues[f'{issues_prefix}_fs_operation'].update(operationIssue(rule, j))
+
+            if fs_issues[f'{issues_prefix}_fs_operation']:
+                logger.info('%s file system resource has following issues %s', instance_label, fs_issues)
+                print(f'{instance_label} file system resource has following issues {fs_issues}')
+
+        if resource.type == 'anything' or resource.type == 'azure-lb':
+            if resource.type == 'anything':
+                logger.info('Customer is using socat or nc for load balancer probing')
+                command = resource.params.get('binfile')
+                options = resource.params.get('cmdline_options')
+                logger.info('\033[33m' + f'cusotmer is using command {command} with the following options {options} for azure load balancer probing for {instance_label}'+'\033[0m')
+                print('\033[33m' + f'cusotmer is using command {command} with the following options {options} for azure load balancer probing for {instance_label}'+'\033[0m')
+                fs_issues['socat_operations']={}
+                for rule, j in recordRuleIssues(result, check_rules.resourceIssues('ASCSERS', resource), resource.id):
+                    fs_issues['socat_operations'].update(operationIssue(rule, j))
+                
+                if fs_issues['socat_operations']:
+                    logger.info('%s Azure lb has the following issues %s', instance_label, fs_issues)
+                    print(f'{instance_label} Azure lb has the following issues {fs_issues}') 
 
-                else:
-                    logger.info('Customer is using azure-lb')
-                    print('Customer is using azure-lb for load balancer probing') 
+            else:
+                logger.info('Customer is using azure-lb')
+                print('Customer is using azure-lb for load balancer probing') 
+        
+        if resource.type == 'SAPInstance':
+            logger.info('Moving to check on the instance metadata information for %s', instance_label)
+            instanceName = resource.params.get('InstanceName')
+            startProfile = resource.params.get('START_PROFILE')
+            recoverState = resource.params.get('AUTOMATIC_RECOVER')
+            isERS = resource.params.get('IS_ERS')
+            instance_message = f'{instance_label} instance name {instanceName} and the start profile is located under {startProfile} and automatic recover is set to {recoverState}'
+            if instance_label == 'ERS':
+                instance_message += f' and has IS_ERS set to {isERS}'
+            logger.info(instance_message)
+            print(instance_message)
+
+            logger.info('Checking on %s resource and start with operations', instance_label)
+            fs_issues[f'{issues_prefix}_operations']={}
+            for rule, j in recordRuleIssues(result, check_rules.resourceIssues('ASCSERS', resource), resource.id):
+                fs_issues[f'{issues_prefix}_operations'].update(operationIssue(rule, j))
             
-            if resource['@type'] == 'SAPInstance':
-                logger.info('Moving to check on the instance metadata information for ASCS')
-                for j in resource['instance_attributes']['nvpair']:
-                    if j['@name'] == 'InstanceName':
-                        instanceName=j['@value']
-                    if j['@name'] == 'START_PROFILE':
-                        startProfile=j['@value']
-                    if j['@name'] == 'AUTOMATIC_RECOVER':
-                        recoverState=j['@value']
-                logger.info(f'ASCS instance name {instanceName} amd the start profile is located under {startProfile} and automatic recover is set to {recoverState}')
-                print(f'ASCS instance name {instanceName} amd the start profile is located under {startProfile} and automatic recover is set to {recoverState}')
-
-                logger.info('Checking on ASCS resource and start with operations')
-                fs_issues['ascs_operations']={}
-                if type(resource['operations']['op']) is list:
-                    for j in resource['operations']['op']:
-                        if j['@name'] == 'monitor' and (j['@interval'] != '11' or j['@timeout'] != '60'  ):
-                            fs_issues['ascs_operations'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-                else:
-                    if resource['operations']['op']['@name'] == 'monitor' and (resource['operations']['op']['@interval'] != '11' or resource['operations']['op']['@timeout'] != '60'  ):
-                        fs_issues['ascs_operations'].update({resource['operations']['op']['@name'] : { 'interval': resource['operations']['op']['@interval'] , 'timeout' : resource['operations']['op']['@timeout'] }})                   
-                
-                if fs_issues['ascs_operations']:
-                    logger.info(f'ASCS resource has following issues on operations {fs_issues}')
-                    print(f'ASCS resource has following issues on operations {fs_issues}')
+            if fs_issues[f'{issues_prefix}_operations']:
+                logger.info('%s resource has following issues on operations %s', instance_label, fs_issues)
+                print(f'{instance_label} resource has following issues on operations {fs_issues}')
 
+@profiled
+def ASCSGroupChecker(group, result):
+    logger.info(group.id)
+    logger.info('Customer have ASCS/ERS cluster')
+    print('Customer have ASCS/ERS cluster')
+    sapInstanceGroupChecker(group, 'ASCS', result)
 
 '''
     for resource in i:
@@ -669,94 +2050,11 @@ def ASCSGroupChecker(resources):
                 print(f'ASCS instance name {instanceName} amd the start profile is located under {startProfile} and automatic recover is set to {recoverState}')
 '''
 
-def ERSGroupChecker(resources):
-    i = resources
-    fs_issues={}
-    logger.info(i['@id'])
+@profiled
+def ERSGroupChecker(group, result):
+    logger.info(group.id)
     logger.info('Customer have ASCS/ERS cluster')
-    #print('Customer have ASCS/ERS cluster')
-    logger.info('Start checking on the ERS resource group')
-    primittives = i['primitive']
-    for resource in primittives:
-        if '@type' in resource.keys():
-            if resource['@type'] == 'Filesystem':
-                logger.info('Start checking on ERS file system all details')
-                fs_issues['ers_fs_operations']={}
-                logger.info(f'Resource name checking is {resource["@id"]}')
-                logger.info('Checking on instance_attributes')
-                for j in resource['instance_attributes']['nvpair']:
-                    if j['@name'] == 'device':
-                        device=j['@value']
-                    if j['@name'] == 'directory':
-                        mountpoint=j['@value']
-                    if j['@name'] == 'fstype':
-                        fstype=j['@value']
-
-                logger.info('\033[33m' + f'ERS file system is {fstype}, and the source device is {device} and mounted on {mountpoint}'+'\033[0m')
-                print('\033[33m' + f'ERS file system is {fstype}, and the source device is {device} and mounted on {mountpoint}'+'\033[0m')
-                logger.info('Checking file system operation parameters:')
-
-                for j in resource['operations']['op']:
-                    if j['@name'] == 'monitor' and (j['@interval'].find('20') == -1 or j['@timeout'].find('40') == -1 ):
-                        fs_issues['ascs_fs_operation'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-                    if j['@name'] == 'start' and (j['@interval'] != "0" or j['@timeout'].find('60') == -1):
-                        fs_issues['ascs_fs_operation'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-                    if j['@name'] == 'stop' and (j['@interval'] != "0" or j['@timeout'].find('60') == -1):
-                        fs_issues['ascs_fs_operation'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-
-                if fs_issues['ers_fs_operations']:
-                    logger.info(f'ERS file system resource has following issues {fs_issues}')
-                    print(f'ERS file system resource has following issues {fs_issues}')
-                
-            if resource['@type'] == 'anything' or resource['@type'] == 'azure-lb':
-                if resource['@type'] == 'anything':
-                    logger.info('Customer is using socat or nc for load balancer probing')
-                    for j in resource['instance_attributes']['nvpair']:
-                        if j['@name'] == 'binfile':
-                            command = j['@value']
-                        if j['@name'] == 'cmdline_options':
-                            options = j['@value']
-                    logger.info('\033[33m' + f'cusotmer is using command {command} with the following options {options} for azure load balancer probing for ERS'+'\033[0m')
-                    print('\033[33m' + f'cusotmer is using command {command} with the following options {options} for azure load balancer probing for ERS'+'\033[0m')
-                    fs_issues['socat_operations']={}
-                    if resource['operations']['op']['@name'] == 'monitor' and (resource['operations']['op']['@interval'].find('10') == -1 or resource['operations']['op']['@timeout'].find('20') == -1 ):
-                        fs_issues['socat_operations'].update({resource['operations']['op']['@name'] : { 'interval': resource['operations']['op']['@interval'] , 'timeout' : resource['operations']['op']['@timeout'] }})
-                    
-                    if fs_issues['socat_operations']:
-                        logger.info(f'ERS Azure lb has the following issues {fs_issues}')
-                        print(f'ERS Azure lb has the following issues {fs_issues}') 
-
-                else:
-                    logger.info('Customer is using azure-lb')
-                    print('Customer is using azure-lb for load balancer probing') 
-                    
-            if resource['@type'] == 'SAPInstance':
-                logger.info('Moving to check on the instance metadata information for ERS')
-                for j in resource['instance_attributes']['nvpair']:
-                    if j['@name'] == 'InstanceName':
-                        instanceName=j['@value']
-                    if j['@name'] == 'START_PROFILE':
-                        startProfile=j['@value']
-                    if j['@name'] == 'AUTOMATIC_RECOVER':
-                        recoverState=j['@value']
-                    if j['@name'] == 'IS_ERS':
-                        isERS=j['@value']
-                logger.info(f'ERS instance name {instanceName} and the start profile is located under {startProfile} and automatic recover is set to {recoverState} and has IS_ERS set to {isERS}')
-                print(f'ERS instance name {instanceName} and the start profile is located under {startProfile} and automatic recover is set to {recoverState} and has IS_ERS set to {isERS}')
-
-                logger.info('Checking on ERS resource and start with operations')
-                fs_issues['ers_operations']={}
-                if type(resource['operations']['op']) is list:
-                    for j in resource['operations']['op']:
-                        if j['@name'] == 'monitor' and (j['@interval'] != '11' or j['@timeout'] != '60'  ):
-                            fs_issues['ers_operations'].update({j['@name'] : { 'interval': j['@interval'] , 'timeout' : j['@timeout'] }})
-                else:
-                    if resource['operations']['op']['@name'] == 'monitor' and (resource['operations']['op']['@interval'] != '11' or resource['operations']['op']['@timeout'] != '60'  ):
-                        fs_issues['ers_operations'].update({resource['operations']['op']['@name'] : { 'interval': resource['operations']['op']['@interval'] , 'timeout' : resource['operations']['op']['@timeout'] }})
-                
-                if fs_issues['ers_operations']:
-                    logger.info(f'ERS resource has following issues on operations {fs_issues}')
-                    print(f'ERS resource has following issues on operations {fs_issues}')
+    sapInstanceGroupChecker(group, 'ERS', result)
 
 '''
     for resource in i:
@@ -836,8 +2134,8 @@ def ERSGroupChecker(resources):
                 print(f'ERS instance name {instanceName} amd the start profile is located under {startProfile} and automatic recover is set to {recoverState} and has IS_ERS set to {isERS}')
 '''
 
-def nfsChecker(resources):
-    cluster_resources = resources
+@profiled
+def nfsChecker(cluster_model, result):
     logger.info('Welcome to nfs checker ..')
     logger.info('Checking for how many drbd devices used and if they exsits')
     socat_nc = 0
@@ -852,224 +2150,130 @@ def nfsChecker(resources):
     issues_config={}
     fs_config={}
     exports_config={}
-    lb_config={}
 
     fs_issues_operation={}
     exports_issues_operation={}
     issues_operation={}
     lb_issues_operation={}
-    for i in cluster_resources:
-        if i.tag == 'master' and i.attrib['id'].find('drbd') != -1:
+    check_rules = loadRules()
+    for i in cluster_model.resources:
+        if i.tag == 'master' and i.id.find('drbd') != -1:
             counter += 1
-            xml_string = ET.tostring(i, encoding='UTF-8', method='xml')
-            dict_xml = xmltodict.parse(xml_string)
-            issues_config[dict_xml['master']['@id']]=[]
-            #print(dict_xml['master']['meta_attributes']['nvpair'])
-            master_max_dict = next((item for item in dict_xml['master']['meta_attributes']['nvpair'] if item["@name"] == "master-max"), None)
-            master_node_max_dict = next((item for item in dict_xml['master']['meta_attributes']['nvpair'] if item["@name"] == "master-node-max"), None)
-            clone_max_dict = next((item for item in dict_xml['master']['meta_attributes']['nvpair'] if item["@name"] == "clone-max"), None)
-            clone_node_max_dict = next((item for item in dict_xml['master']['meta_attributes']['nvpair'] if item["@name"] == "clone-node-max"), None)
-            notify_dict = next((item for item in dict_xml['master']['meta_attributes']['nvpair'] if item["@name"] == "notify"), None)
-            interleave_dict = next((item for item in dict_xml['master']['meta_attributes']['nvpair'] if item["@name"] == "interleave"), None)
-            try:
-                if master_max_dict['@value'] != '1':
-                    issues_config[dict_xml['master']['@id']].append(master_max_dict)
-                if master_node_max_dict['@value'] != '1':
-                    issues_config[dict_xml['master']['@id']].append(master_node_max_dict)
-                if clone_max_dict['@value'] != '2':
-                    issues_config[dict_xml['master']['@id']].append(clone_max_dict)
-                if clone_node_max_dict['@value'] != '1':
-                    issues_config[dict_xml['master']['@id']].append(clone_node_max_dict)
-                if notify_dict['@value'] != 'true':
-                    issues_config[dict_xml['master']['@id']].append(notify_dict)
-                if interleave_dict['@value'] != 'true':
-                    issues_config[dict_xml['master']['@id']].append(interleave_dict)
-            except (TypeError, AttributeError) as e:
-                issues_config[dict_xml['master']['@id']].append(f"exception: {traceback.format_exc()}")
-
-            # Checking on the operation part
-            issues_operation[dict_xml['master']['@id']] = []
-            master_monitor = next((item for item in dict_xml['master']['primitive']['operations']['op'] if item["@name"] == "monitor" and item['@role'] == 'Master'), None)
-            #print(master_monitor)
-            slave_monitor = next((item for item in dict_xml['master']['primitive']['operations']['op'] if item["@name"] == "monitor" and item['@role'] == 'Slave'), None)
-            try:
-                if master_monitor['@interval'] != '15':
-                    issues_operation[dict_xml['master']['@id']].append(master_monitor)
-                if slave_monitor['@interval'] != '30':
-                    issues_operation[dict_xml['master']['@id']].append(slave_monitor)
-            except (TypeError, AttributeError) as e:
-                issues_operation[dict_xml['master']['@id']].append(f"exception: {traceback.format_exc()}")
+            issues_config[i.id]=[]
+            issues_operation[i.id] = []
+            if i.primitive is not None:
+                for rule, observed in recordRuleIssues(result, check_rules.resourceIssues('NFS', i.primitive, i, 'drbd'), i.id):
+                    # Checking on the meta attributes and the operation part
+                    if rule['target'] == 'op':
+                        issues_operation[i.id].append(ruleIssueEntry(rule, observed))
+                    else:
+                        issues_config[i.id].append(ruleIssueEntry(rule, observed))
 
         # Moving to checking on the group of resources of the NFS
         
         elif i.tag == 'group':
-            for resources_in in i:
-                if resources_in.tag == 'primitive' and resources_in.attrib['type'] == 'Filesystem':
+            for resources_in in i.children:
+                if resources_in.tag == 'primitive' and resources_in.type == 'Filesystem':
                     fs_counter += 1
-                    xml_string = ET.tostring(resources_in, encoding='UTF-8', method='xml')
-                    dict_xml = xmltodict.parse(xml_string)
-                    fs_issues_operation[dict_xml['primitive']['@id']]=[]
-                    #print(dict_xml['primitive']['@id'])
-                    fs_device = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "device"), None)
-                    fs_directory = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "directory"), None)
-                    fs_fstype = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "fstype"), None)
-                    #print(type(dict_xml['primitive']['operations']['op']))
-                    fs_operation = dict_xml['primitive']['operations']['op']
-                    fs_config[dict_xml['primitive']['@id']]={}
-                    config_dict = {'device_name': fs_device['@value'] , 'mount_name': fs_directory['@value'], 'fs_type': fs_fstype['@value']}
-                    fs_config[dict_xml['primitive']['@id']].update(config_dict)
-                    try:
-                        if fs_operation['@interval'] != '10s':
-                             fs_issues_operation[dict_xml['primitive']['@id']].append(fs_operation)
-                             #print(fs_issues_operation)
-                    except (TypeError, AttributeError) as e:
-                        fs_issues_operation[dict_xml['primitive']['@id']].append(f"exception: {traceback.format_exc()}")
+                    fs_issues_operation[resources_in.id]=[]
+                    fs_params = resources_in.params
+                    fs_config[resources_in.id]={}
+                    config_dict = {'device_name': fs_params.get('device') , 'mount_name': fs_params.get('directory'), 'fs_type': fs_params.get('fstype')}
+                    fs_config[resources_in.id].update(config_dict)
+                    fs_issues_operation[resources_in.id].extend(ruleIssueEntry(rule, observed) for rule, observed in recordRuleIssues(result, check_rules.resourceIssues('NFS', resources_in), resources_in.id))
                 
-                elif resources_in.tag == 'primitive' and resources_in.attrib['type'] == 'exportfs':
+                elif resources_in.tag == 'primitive' and resources_in.type == 'exportfs':
                     exports_counter += 1
-                    xml_string = ET.tostring(resources_in, encoding='UTF-8', method='xml')
-                    dict_xml = xmltodict.parse(xml_string)
-                    exports_issues_operation[dict_xml['primitive']['@id']]=[]
-                    exports_device = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "directory"), None)
-                    exports_options = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "options"), None)
-                    exports_specs = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "clientspec"), None)
-                    exports_fsid = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "fsid"), None)
-                    exports_wait_for_leasetime_on_stop = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "wait_for_leasetime_on_stop"), None)
-                    
-                    exports_config[dict_xml['primitive']['@id']]={}
-                    exports_config_dict = {'share_name': exports_device['@value'], 'allowed_network':exports_specs['@value'], 'export_options': exports_options['@value'], 
-                    'exports_fsid': exports_fsid['@value'], 'wait_for_leasetime_on_stop': exports_wait_for_leasetime_on_stop['@value']}
-                    exports_config[dict_xml['primitive']['@id']].update(exports_config_dict)
+                    exports_issues_operation[resources_in.id]=[]
+                    exports_params = resources_in.params
+                    exports_config[resources_in.id]={}
+                    exports_config_dict = {'share_name': exports_params.get('directory'), 'allowed_network': exports_params.get('clientspec'), 'export_options': exports_params.get('options'), 
+                    'exports_fsid': exports_params.get('fsid'), 'wait_for_leasetime_on_stop': exports_params.get('wait_for_leasetime_on_stop')}
+                    exports_config[resources_in.id].update(exports_config_dict)
 
                     #checking operation part
-                    exports_operation = dict_xml['primitive']['operations']['op']
-                    try:
-                        if exports_operation['@interval'] != '30s':
-                             exports_issues_operation[dict_xml['primitive']['@id']].append(exports_operation)
-                             #print(fs_issues_operation)
-                    except (TypeError, AttributeError) as e:
-                        exports_issues_operation[dict_xml['primitive']['@id']].append(f"exception: {traceback.format_exc()}")
+                    exports_issues_operation[resources_in.id].extend(ruleIssueEntry(rule, observed) for rule, observed in recordRuleIssues(result, check_rules.resourceIssues('NFS', resources_in), resources_in.id))
                 
-                elif resources_in.tag == 'primitive' and (resources_in.attrib['type'] == 'anything' or resources_in.attrib['type'] == 'azure-lb' ):
-                    xml_string = ET.tostring(resources_in, encoding='UTF-8', method='xml')
-                    dict_xml = xmltodict.parse(xml_string)
-                    lb_issues_operation[dict_xml['primitive']['@id']]=[]
-                    if resources_in.attrib['type'] == 'anything':
+                elif resources_in.tag == 'primitive' and (resources_in.type == 'anything' or resources_in.type == 'azure-lb' ):
+                    lb_issues_operation[resources_in.id]=[]
+                    if resources_in.type == 'anything':
                         lb_counter_anything += 1
                         logger.info('Customer is using socat or nc for load balancer probing')
-                        lb_binfile = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "binfile"), None)
-                        lb_cmdline = next((item for item in dict_xml['primitive']['instance_attributes']['nvpair'] if item["@name"] == "cmdline_options"), None)
-                        logger.info(f'cusotmer is using command {lb_binfile["@value"]} with the following options {lb_cmdline["@value"]} for azure load balancer probing')
+                        lb_binfile = resources_in.params.get('binfile')
+                        lb_cmdline = resources_in.params.get('cmdline_options')
+                        logger.info('cusotmer is using command %s with the following options %s for azure load balancer probing', lb_binfile, lb_cmdline)
                         socat_nc = 1
-                    elif resources_in.attrib['type'] == 'azure-lb':
+                    elif resources_in.type == 'azure-lb':
                         lb_counter_azure += 1
-                        logger.info(f'Customer has {lb_counter_azure} resources is using azure-lb for load balancer probing')
+                        logger.info('Customer has %s resources is using azure-lb for load balancer probing', lb_counter_azure)
                         azure_lb = 1
                         
 
 
     print(f'Customer has {counter} drbd resources and the names of the resources are {list(issues_config.keys())}') 
-    print(f'Customer has {counter} file system resources and the configuration of the resources are {json.dumps(fs_config, indent=4)}') 
-    print(f'Customer has {counter} exports resources and the configuration of the resources are {json.dumps(exports_config, indent=4)}') 
+    print(f'Customer has {fs_counter} file system resources and the configuration of the resources are {json.dumps(fs_config, indent=4)}') 
+    print(f'Customer has {exports_counter} exports resources and the configuration of the resources are {json.dumps(exports_config, indent=4)}') 
     if socat_nc:
-        print(f'cusotmer has {lb_counter_anything} resource using command {lb_binfile["@value"]} with the following options {lb_cmdline["@value"]} for azure load balancer probing')
+        print(f'cusotmer has {lb_counter_anything} resource using command {lb_binfile} with the following options {lb_cmdline} for azure load balancer probing')
     if azure_lb:
         print(f'Customer has {lb_counter_azure} resources is using azure-lb for load balancer probing')
-    #print(len(issues_config.values()))
     if any(issues_config.values()):
-        logger.info(f'Cluster drbd configuration has below issues {issues_config}')
+        logger.info('Cluster drbd configuration has below issues %s', issues_config)
         print('\033[33m' + f'Cluster drbd configuration has below issues {issues_config}' + '\033[0m')     
     
     if any(issues_operation.values()):
-        logger.info(f'Cluster drbd operation has below issues {issues_operation}')
+        logger.info('Cluster drbd operation has below issues %s', issues_operation)
         print('\033[33m' + f'Cluster drbd operation has below issues {issues_operation}' + '\033[0m')
     
     if any(fs_issues_operation.values()):
-        logger.info(f'Cluster file system  operation has below issues {fs_issues_operation}')
+        logger.info('Cluster file system  operation has below issues %s', fs_issues_operation)
         print('\033[33m' + f'Cluster file system operation has below issues {fs_issues_operation}' + '\033[0m')
     
     if any(exports_issues_operation.values()):
-        logger.info(f'Cluster exports operation has below issues {exports_issues_operation}')
+        logger.info('Cluster exports operation has below issues %s', exports_issues_operation)
         print('\033[33m' + f'Cluster exports operation has below issues {exports_issues_operation}' + '\033[0m')
-#            for j in i:
-#                if j.tag == 'meta_attributes':
-#                    logger.info('Checking on the metadata of the drbd')
-
 
-def getClusterType(root_xml):
-    cluster_resources = root_xml[2]
-    logger.info(cluster_resources)
+@profiled
+def getClusterType(cluster_model, result):
+    logger.debug('resources: %s', cluster_model.resources)
     cluster_type=""
-    xml_string = ET.tostring(cluster_resources, encoding='UTF-8', method='xml')
-    dict_xml = xmltodict.parse(xml_string)
-    #logger.info(dict_xml)
-    logger.info(dict_xml['resources'].keys())
-    
-    #['primitive', 'clone', 'master', 'group']
-    #issues_dict = {}
-    
-    #resources_types = list(dict_xml['resources'].keys())
-    #logger.info(dict_xml['resources']['master'])
-    #logger.info(dict_xml['resources']['master']['primitive']['@type'])
     try:
-        for resource_type in list(dict_xml['resources'].keys()):
-            if resource_type == 'master':
-                if type(dict_xml['resources']['master']) is list:
-                    ### it is not supposed to have list of master resource in SAP hana resources but this loop to handle those situation in case the cluster had sap resource or other.
-                    for resource in dict_xml['resources']['master']:
-                        if (resource['@id'].find('SAPHana') != -1 or resource['primitive']['@type'] == 'SAPHana'):
-                            cluster_type="SAPCluster"
-                            #print(cluster_type)
-                            SAPHanaChecker(cluster_resources)
-                            ## once done no need to do further checking let's break here
-                            return cluster_type
-                elif type(dict_xml['resources']['master']) is not list and (dict_xml['resources']['master']['@id'].find('SAPHana') != -1 or dict_xml['resources']['master']['primitive']['@type'] == 'SAPHana'):
-                    cluster_type="SAPCluster"
-                    #print(cluster_type)
-                    SAPHanaChecker(cluster_resources)
-                    ## once done no need to do further checking let's break here
-                    return cluster_type
-            
-            if resource_type == 'clone':
-                if type(dict_xml['resources']['clone']) is list:
-                    # as resources such as azure-events are clone set so that we want to skip and move to nfs-server resource just in case it happens to be there.
-                    for resource in dict_xml['resources']['clone']:
-                        if resource['primitive']['@type'] == 'nfs-server':
-                            cluster_type = "NFS"
-                            logger.info('Customer has NFS cluster')
-                            print('Customer has NFS cluster')
-                            logger.info('Calling nfs cluster checker function, and passing to it the full list of resources')
-                            nfsChecker(cluster_resources)
-                            ## once done no need to do further checking let's break here
-                            return cluster_type
-                elif type(dict_xml['resources']['clone']) is not list and dict_xml['resources']['clone']['primitive']['@type'] == 'nfs-server':
-                    cluster_type = "NFS"
-                    logger.info('Customer has NFS cluster')
-                    print('Customer has NFS cluster')
-                    logger.info('Calling nfs cluster checker function, and passing to it the full list of resources')
-                    nfsChecker(cluster_resources)
-                    ## once done no need to do further checking let's break here
-                    return cluster_type
-
-            if resource_type == 'group':
-                #print(dict_xml['resources']['group'])
-                if type(dict_xml['resources']['group']) is list:
-                    for resource in dict_xml['resources']['group']:
-                        if resource['@id'].find('ASCS') != -1 or resource['@id'].find('ERS') != -1:
-                            logger.info(resource['@id'])
-                            cluster_type='ASCSERS'
-                            if resource['@id'].find('ASCS') != -1:
-                                logger.info(resource)
-                                ASCSGroupChecker(resource)
-                            if resource['@id'].find('ERS') != -1:
-                                logger.info(resource)
-                                ERSGroupChecker(resource)
+        for resource in cluster_model.topResources('master'):
+            if resource.id.find('SAPHana') != -1 or (resource.primitive is not None and resource.primitive.type == 'SAPHana'):
+                cluster_type="SAPCluster"
+                SAPHanaChecker(cluster_model, result)
+                ## once done no need to do further checking let's break here
+                return cluster_type
+
+        # as resources such as azure-events are clone set so that we want to skip and move to nfs-server resource just in case it happens to be there.
+        for resource in cluster_model.topResources('clone'):
+            if resource.primitive is not None and resource.primitive.type == 'nfs-server':
+                cluster_type = "NFS"
+                logger.info('Customer has NFS cluster')
+                print('Customer has NFS cluster')
+                logger.info('Calling nfs cluster checker function, and passing to it the full list of resources')
+                nfsChecker(cluster_model, result)
+                ## once done no need to do further checking let's break here
+                return cluster_type
+
+        for resource in cluster_model.topResources('group'):
+            if resource.id.find('ASCS') != -1 or resource.id.find('ERS') != -1:
+                logger.info(resource.id)
+                cluster_type='ASCSERS'
+                if resource.id.find('ASCS') != -1:
+                    logger.debug('group resources: %s', resource.children)
+                    ASCSGroupChecker(resource, result)
+                if resource.id.find('ERS') != -1:
+                    logger.debug('group resources: %s', resource.children)
+                    ERSGroupChecker(resource, result)
     
     except Exception as e:
-        #print(dict_xml['resources']['master'])
         print(traceback.format_exc())
+        result.addFinding('checker.error', SEVERITY_CRITICAL, f'Checking the {cluster_type or "cluster"} resources failed: {e!r}, please check them manually')
+    return cluster_type
     
     
+
 '''
     for i in cluster_resources:
         if i.attrib['id'].find('SAPHana') != -1:
@@ -1092,201 +2296,1325 @@ def getClusterType(root_xml):
             nfsChecker(cluster_resources)
 '''   
 
-def constrainsChecker(root_xml, cluster_type):
-    cluster_contrains = root_xml[3]
+CONSTRAINTS_DOCS = {
+    'SAPCluster': 'https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources',
+    'ASCSERS': 'https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse#installing-sap-netweaver-ascsers',
+    'NFS': 'https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-nfs#configure-cluster-framework',
+}
+
+def constraintFinding(result, cluster_type, constraint):
+    constraint_kind = 'colocation' if constraint.tag == 'rsc_colocation' else 'order'
+    result.addFinding(f'constraints.{cluster_type.lower()}.{constraint_kind}', SEVERITY_WARNING, f'{constraint_kind} constraint {constraint.id} is not following the documentation',
+        constraint.id, dict(constraint.attrs), doc=CONSTRAINTS_DOCS[cluster_type])
+
+def otherConstraint(constraint):
+    constraint_kind = 'colocation' if constraint.tag == 'rsc_colocation' else 'order'
+    logger.info('%s constraint %s is not between the resources of the documented setup, it is not checked: %s', constraint_kind, constraint.id, constraint)
+    print(f'The {constraint_kind} constraint {constraint.id} is not between the resources of the documented setup, it is not checked')
+
+def missingConstraint(result, cluster_type, constraint_kind, resource_id, message):
+    logger.info('%s', message)
+    print('\033[33m' + f'{message}, please check the documentation: {CONSTRAINTS_DOCS[cluster_type]}' + '\033[0m')
+    result.addFinding(f'constraints.{cluster_type.lower()}.{constraint_kind}_missing', SEVERITY_WARNING, message, resource_id, doc=CONSTRAINTS_DOCS[cluster_type])
+
+@profiled
+def constrainsChecker(cluster_model, cluster_type, result):
     try:
-        xml_string = ET.tostring(cluster_contrains, encoding='UTF-8', method='xml')
-        dict_xml = xmltodict.parse(xml_string)
         logger.info('Start checking on the constrains')
         logger.info('Checking on location constraints if they have cli-prefer and point them out')
-        logger.info(dict_xml['constraints'])
-        logger.info(dict_xml['constraints'].keys())
-        logger.info(dict_xml['constraints'].values())
-        # adding the below condition to check if in first place we have location constraints or not, if yes then we can proceed with checking, otherweise we can skip to reduce the exceptions thrown.
-        if 'rsc_location' in dict_xml['constraints']:
-            location_constraints = dict_xml['constraints']['rsc_location']
-            logger.info(location_constraints)
-            if type(location_constraints) is list:
-                if len(location_constraints) >= 1:
-                    for i in location_constraints:
-                        if i['@id'].find('cli-prefer') != -1:
-                            logger.info(f'below constraint {i["@id"]} was created from crm cli, please check if this contribute to the issue you are investgating')
-                            print(f'below constraint {i["@id"]} was created from crm cli, please check if this contribute to the issue you are investgating')
-            else:
-                if location_constraints['@id'].find('cli-prefer') != -1:
-                    logger.info(f'below constraint {location_constraints["@id"]} was created from crm cli, please check if this contribute to the issue you are investgating')
-                    print(f'below constraint {location_constraints["@id"]} was created from crm cli, please check if this contribute to the issue you are investgating')
+        logger.debug('constraints: %s', cluster_model.constraints)
+        for i in cluster_model.constraints_by_tag.get('rsc_location', ()):
+            if i.id.find('cli-prefer') != -1:
+                logger.info('below constraint %s was created from crm cli, please check if this contribute to the issue you are investgating', i.id)
+                print(f'below constraint {i.id} was created from crm cli, please check if this contribute to the issue you are investgating')
+                result.addFinding('constraints.cli_prefer', SEVERITY_WARNING, f'location constraint {i.id} was created from crm cli (resource move/migrate)', i.id, dict(i.attrs))
                 
-        logger.info(f'Determining the type of cluster {cluster_type}')
+        constraint_graph = ConstraintGraph(cluster_model)
+        colocation_constraints = constraint_graph.colocation_edges
+        order_constraints = constraint_graph.order_edges
+        logger.info('Determining the type of cluster %s', cluster_type)
         if cluster_type == 'SAPCluster':
-            logger.info(dict_xml)
             logger.info('Checking on colocation constraint')
-            colocation_constraint = dict_xml['constraints']['rsc_colocation']
-            if (colocation_constraint['@score'] != '4000' or 
-                (colocation_constraint['@rsc'].find('g_') == -1 and colocation_constraint['@rsc-role'] != 'Started')
-                or (colocation_constraint['@with-rsc'].find('msl_') == -1 and colocation_constraint['@with-rsc-role'] != 'Master')):
-                logger.info(f'Colocation constraints have issue {colocation_constraint}')
-                print('Checking on colocaiton constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources')
-                print(f'Colocation constraints has the following incorrect configuration {colocation_constraint}')
-            else:
-                logger.info(f'No issues found on the colocation constraints of id {colocation_constraint["@id"]}')
-                print(f'No issues found on the colocation constraints of id {colocation_constraint["@id"]}')
+            for colocation_constraint in colocation_constraints:
+                # the read-enabled secondary IP is colocated with the other role of SAPHana
+                if (not constraint_graph.joins(colocation_constraint, constraint_graph.isIpGroup, constraint_graph.isHanaMaster)
+                    or colocation_constraint.get('rsc-role') in UNPROMOTED_ROLES or colocation_constraint.get('with-rsc-role') in UNPROMOTED_ROLES):
+                    otherConstraint(colocation_constraint)
+                    continue
+                if (colocation_constraint.get('score') != '4000' or 
+                    (not constraint_graph.isIpGroup(colocation_constraint.get('rsc')) and colocation_constraint.get('rsc-role') != 'Started')
+                    or (not constraint_graph.isHanaMaster(colocation_constraint.get('with-rsc')) and colocation_constraint.get('with-rsc-role') not in PROMOTED_ROLES)):
+                    logger.info('Colocation constraints have issue %s', colocation_constraint)
+                    print('Checking on colocaiton constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources')
+                    print(f'Colocation constraints has the following incorrect configuration {colocation_constraint}')
+                    constraintFinding(result, cluster_type, colocation_constraint)
+                else:
+                    logger.info('No issues found on the colocation constraints of id %s', colocation_constraint.id)
+                    print(f'No issues found on the colocation constraints of id {colocation_constraint.id}')
             
             logger.info('checking on the order constrains')
-            order_constraint = dict_xml['constraints']['rsc_order']
-            if (order_constraint['@kind'] != 'Optional' or order_constraint['@first'].find('cln_') == -1 
-            or order_constraint['@then'].find('msl_') == -1):
-                logger.info(f'order constraints have issue {order_constraint}')
-                print('Checking on order constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources')
-                print(f'order constraints has the following incorrect configuration {order_constraint}')
-            else:
-                logger.info(f'No issues found on the order constraints of id {order_constraint["@id"]}')
-                print(f'No issues found on the order constraints of id {order_constraint["@id"]}')
+            for order_constraint in order_constraints:
+                if not constraint_graph.joins(order_constraint, constraint_graph.isHanaTopology, constraint_graph.isHanaMaster):
+                    otherConstraint(order_constraint)
+                    continue
+                if (order_constraint.get('kind') != 'Optional' or not constraint_graph.isHanaTopology(order_constraint.get('first'))
+                or not constraint_graph.isHanaMaster(order_constraint.get('then'))):
+                    logger.info('order constraints have issue %s', order_constraint)
+                    print('Checking on order constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/sap-hana-high-availability#create-sap-hana-cluster-resources')
+                    print(f'order constraints has the following incorrect configuration {order_constraint}')
+                    constraintFinding(result, cluster_type, order_constraint)
+                else:
+                    logger.info('No issues found on the order constraints of id %s', order_constraint.id)
+                    print(f'No issues found on the order constraints of id {order_constraint.id}')
+
+            logger.info('Checking that every SAPHana master has a colocated IP group and is started after SAPHanaTopology')
+            for resource in cluster_model.resources:
+                if not constraint_graph.isHanaMaster(resource.id):
+                    continue
+                if not any(constraint_graph.isIpGroup(edge.get('rsc')) and edge.get('with-rsc-role') in PROMOTED_ROLES for edge in constraint_graph.colocationsWith(resource.id)):
+                    missingConstraint(result, cluster_type, 'colocation', resource.id, f'SAPHana resource {resource.id} does not have a colocation constraint of an IP group with its master role')
+                if not any(constraint_graph.isHanaTopology(edge.get('first')) for edge in constraint_graph.ordersBefore(resource.id)):
+                    missingConstraint(result, cluster_type, 'order', resource.id, f'SAPHana resource {resource.id} does not have an order constraint starting it after SAPHanaTopology')
 
         elif cluster_type == 'ASCSERS':
-            logger.info(dict_xml)
             logger.info('Checking on colocation constraints')
-            colocation_constraint = dict_xml['constraints']['rsc_colocation']
-            if(colocation_constraint['@score'] != '-5000' or colocation_constraint['@rsc'].find('ERS') == -1 
-                or colocation_constraint['@with-rsc'].find('ASC') == -1):
-                logger.info(f'Colocation constraints have issue {colocation_constraint}')
-                print('Checking on colocaiton constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse#installing-sap-netweaver-ascsers')
-                print(f'Colocation constraints has the following incorrect configuration {colocation_constraint}')
-            else:
-                logger.info(f'No issues found on the colocation constraints of id {colocation_constraint["@id"]}')
-                print(f'No issues found on the colocation constraints of id {colocation_constraint["@id"]}')
+            for colocation_constraint in colocation_constraints:
+                if not constraint_graph.joins(colocation_constraint, constraint_graph.isErs, constraint_graph.isAscs):
+                    otherConstraint(colocation_constraint)
+                    continue
+                if(colocation_constraint.get('score') != '-5000' or constraint_graph.sapInstanceKind(colocation_constraint.get('rsc')) != 'ERS'
+                    or constraint_graph.sapInstanceKind(colocation_constraint.get('with-rsc')) != 'ASCS'):
+                    logger.info('Colocation constraints have issue %s', colocation_constraint)
+                    print('Checking on colocaiton constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse#installing-sap-netweaver-ascsers')
+                    print(f'Colocation constraints has the following incorrect configuration {colocation_constraint}')
+                    constraintFinding(result, cluster_type, colocation_constraint)
+                else:
+                    logger.info('No issues found on the colocation constraints of id %s', colocation_constraint.id)
+                    print(f'No issues found on the colocation constraints of id {colocation_constraint.id}')
 
             logger.info('checking on the order constrains')
-            order_constraint = dict_xml['constraints']['rsc_order']
-            if(order_constraint['@kind'] != 'Optional' or order_constraint['@symmetrical'] != 'false'
-                or (order_constraint['@first'].find('ASCS') == -1 and order_constraint['@first-action'] != 'start')
-                or (order_constraint['@then'].find('ERS') == -1 and order_constraint['@then-action'] != 'stop')):
-                logger.info(f'order constraints have issue {order_constraint}')
-                print('Checking on order constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse#installing-sap-netweaver-ascsers')
-                print(f'order constraints has the following incorrect configuration {order_constraint}')
-            else:
-                logger.info(f'No issues found on the order constraints of id {order_constraint["@id"]}')
-                print(f'No issues found on the order constraints of id {order_constraint["@id"]}')
+            for order_constraint in order_constraints:
+                if not constraint_graph.joins(order_constraint, constraint_graph.isAscs, constraint_graph.isErs):
+                    otherConstraint(order_constraint)
+                    continue
+                if(order_constraint.get('kind') != 'Optional' or order_constraint.get('symmetrical') != 'false'
+                    or (constraint_graph.sapInstanceKind(order_constraint.get('first')) != 'ASCS' and order_constraint.get('first-action') != 'start')
+                    or (constraint_graph.sapInstanceKind(order_constraint.get('then')) != 'ERS' and order_constraint.get('then-action') != 'stop')):
+                    logger.info('order constraints have issue %s', order_constraint)
+                    print('Checking on order constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse#installing-sap-netweaver-ascsers')
+                    print(f'order constraints has the following incorrect configuration {order_constraint}')
+                    constraintFinding(result, cluster_type, order_constraint)
+                else:
+                    logger.info('No issues found on the order constraints of id %s', order_constraint.id)
+                    print(f'No issues found on the order constraints of id {order_constraint.id}')
+
+            logger.info('Checking that every ERS resource has a negative colocation with its ASCS and an order after it')
+            ers_colocated = {constraint_graph.topOf(edge.get('rsc')) for edge in colocation_constraints
+                if constraint_graph.sapInstanceKind(edge.get('rsc')) == 'ERS' and constraint_graph.sapInstanceKind(edge.get('with-rsc')) == 'ASCS'}
+            ers_ordered = {constraint_graph.topOf(edge.get('then')) for edge in order_constraints
+                if constraint_graph.sapInstanceKind(edge.get('first')) == 'ASCS' and constraint_graph.sapInstanceKind(edge.get('then')) == 'ERS'}
+            for resource in cluster_model.resources:
+                if constraint_graph.sapInstanceKind(resource.id) != 'ERS':
+                    continue
+                if resource.id not in ers_colocated:
+                    missingConstraint(result, cluster_type, 'colocation', resource.id, f'ERS resource {resource.id} does not have a colocation constraint keeping it away from the ASCS')
+                if resource.id not in ers_ordered:
+                    missingConstraint(result, cluster_type, 'order', resource.id, f'ERS resource {resource.id} does not have an order constraint after the ASCS')
 
             logger.info('checking on the location constrains')
             logger.info('As per doc update, there could be no location constrains configured for new version of SAP, so confirming that this location constrains is not CLI related')
             print('Please check if there is a location constrains configured (does not have cli-prefer in its name) in case customer using old ASCS/ERS infra, as the new version does not require this locaion constraint')
+            result.addFinding('constraints.ascsers.location', SEVERITY_INFO, 'Location constraints (without cli-prefer) are only needed by the old ASCS/ERS setup, please check them manually', doc=CONSTRAINTS_DOCS[cluster_type])
             # to do to add the location constraints checker
-            #location_constraints = dict_xml['constraints']['rsc_location']
-            #if location_constraints['@id'].find('cli-prefer') == -1:
-            #    logger.info('This location constrains is not CLI related')
-            #    if ():
         elif cluster_type == 'NFS':
-            logger.info(dict_xml)
             logger.info('Checking on colocation constraints')
-            colocation_constraint = dict_xml['constraints']['rsc_colocation']
-            #logger.warning(type(colocation_constraint) )
-            #logger.info(type(colocation_constraint) is list)
-            if isinstance(colocation_constraint, list):
-                if len(colocation_constraint) >=1:
-                    for i in colocation_constraint:
-                        if(i['@score'] != 'INFINITY' or i['@rsc'].find('g-') == -1 
-                            or i['@with-rsc'].find('ms-drbd') == -1 or i['@with-rsc-role'] != 'Master'):
-                            logger.info(f'Colocation constraints have issue {i}')
-                            print('Checking on colocaiton constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-nfs#configure-cluster-framework')
-                            print(f'Colocation constraints has the following incorrect configuration {i}')
-                        else:
-                            logger.info(f'No issues found on the colocation constraints of id {i["@id"]}')
-                            print(f'No issues found on the colocation constraints of id {i["@id"]}')
-            else:
-                if(colocation_constraint['@score'] != 'INFINITY' or colocation_constraint['@rsc'].find('g-') == -1 
-                            or colocation_constraint['@with-rsc'].find('ms-drbd') == -1 or colocation_constraint['@with-rsc-role'] != 'Master'):
-                    logger.info(f'Colocation constraints have issue {colocation_constraint}')
+            for i in colocation_constraints:
+                if not constraint_graph.joins(i, constraint_graph.isGroup, constraint_graph.isDrbdMaster):
+                    otherConstraint(i)
+                    continue
+                if(i.get('score') != 'INFINITY' or not constraint_graph.isGroup(i.get('rsc'))
+                    or not constraint_graph.isDrbdMaster(i.get('with-rsc')) or i.get('with-rsc-role') not in PROMOTED_ROLES):
+                    logger.info('Colocation constraints have issue %s', i)
                     print('Checking on colocaiton constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-nfs#configure-cluster-framework')
-                    print(f'Colocation constraints has the following incorrect configuration {colocation_constraint}')
+                    print(f'Colocation constraints has the following incorrect configuration {i}')
+                    constraintFinding(result, cluster_type, i)
                 else:
-                    logger.info(f'No issues found on the colocation constraints of id {colocation_constraint["@id"]}')
-                    print(f'No issues found on the colocation constraints of id {colocation_constraint["@id"]}')
+                    logger.info('No issues found on the colocation constraints of id %s', i.id)
+                    print(f'No issues found on the colocation constraints of id {i.id}')
                 
             logger.info('checking on the order constrains')
-            order_constraint = dict_xml['constraints']['rsc_order']
-            if type(order_constraint) is list:
-                if len(order_constraint) >=1:
-                    for i in order_constraint:
-                        if((i['@first'].find('ms-drbd') == -1 and i['@first-action'] != 'promote')
-                            or (i['@then'].find('g-') == -1 and i['@then-action'] != 'start')):
-                            logger.info(f'order constraints have issue {i}')
-                            print('Checking on order constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-nfs#configure-cluster-framework')
-                            print(f'order constraints has the following incorrect configuration {i}')
-                        else:
-                            logger.info(f'No issues found on the order constraints of id {i["@id"]}')
-                            print(f'No issues found on the order constraints of id {i["@id"]}')
-            else:
-                if((order_constraint['@first'].find('ms-drbd') == -1 and order_constraint['@first-action'] != 'promote')
-                            or (order_constraint['@then'].find('g-') == -1 and order_constraint['@then-action'] != 'start')):
-                    logger.info(f'order constraints have issue {order_constraint}')
+            for i in order_constraints:
+                if not constraint_graph.joins(i, constraint_graph.isDrbdMaster, constraint_graph.isGroup):
+                    otherConstraint(i)
+                    continue
+                if((not constraint_graph.isDrbdMaster(i.get('first')) and i.get('first-action') != 'promote')
+                    or (not constraint_graph.isGroup(i.get('then')) and i.get('then-action') != 'start')):
+                    logger.info('order constraints have issue %s', i)
                     print('Checking on order constraints, and we found that it is not following our documentation: https://learn.microsoft.com/en-us/azure/virtual-machines/workloads/sap/high-availability-guide-suse-nfs#configure-cluster-framework')
-                    print(f'order constraints has the following incorrect configuration {order_constraint}')
+                    print(f'order constraints has the following incorrect configuration {i}')
+                    constraintFinding(result, cluster_type, i)
                 else:
-                    logger.info(f'No issues found on the order constraints of id {order_constraint["@id"]}')
-                    print(f'No issues found on the order constraints of id {order_constraint["@id"]}')
+                    logger.info('No issues found on the order constraints of id %s', i.id)
+                    print(f'No issues found on the order constraints of id {i.id}')
+
+            logger.info('Checking that every drbd master has a colocated group started after its promotion')
+            for resource in cluster_model.resources:
+                if not constraint_graph.isDrbdMaster(resource.id):
+                    continue
+                if not any(constraint_graph.isGroup(edge.get('rsc')) for edge in constraint_graph.colocationsWith(resource.id)):
+                    missingConstraint(result, cluster_type, 'colocation', resource.id, f'drbd resource {resource.id} does not have a colocation constraint of the NFS group with its master role')
+                if not any(constraint_graph.isGroup(edge.get('then')) for edge in constraint_graph.ordersAfter(resource.id)):
+                    missingConstraint(result, cluster_type, 'order', resource.id, f'drbd resource {resource.id} does not have an order constraint starting the NFS group after its promotion')
+
+        logger.info('Checking the order constraints for cycles')
+        for cycle in constraint_graph.orderCycles():
+            logger.info('order constraints have a cycle between %s', cycle)
+            print('\033[91m' + f'The order constraints have a cycle between the resources {cycle}, pacemaker cannot start them in order' + '\033[0m')
+            result.addFinding('constraints.order.cycle', SEVERITY_CRITICAL, f'order constraints have a cycle between the resources {cycle}', ', '.join(cycle))
         
     except (TypeError, AttributeError, KeyError) as e:
         print('\033[91m' + 'There was an exception on checking on the constrains, please check on that manually as there could be some comments on the configration that causing this issue' + '\033[0m')
-        logger.warning(f'exception:{traceback.format_exc()}')
+        logger.warning('exception:%s', traceback.format_exc())
+        result.addFinding('checker.error', SEVERITY_CRITICAL, f'Checking the constraints failed: {e!r}, please check them manually')
+
+@functools.lru_cache(maxsize=None)
+def codeDigest():
+    """
+    Hash of the script itself, part of every cache key so a changed checker never returns results of the old code
+    """
+    import hashlib
+    with open(os.path.abspath(__file__), 'rb') as script:
+        return hashlib.sha256(script.read()).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of the results of the checks, content addressed: the key of a check is the hash of the report sections
+    it reads, of the rules of its section and of the script, so an unchanged section returns the stored output and findings
+    of its check without running it, even when other sections or the rules of other sections changed.
+    The entries are json files, their modification time is updated on every hit and evict() removes the least recently
+    used ones once the cache is bigger than max_size, by every process at most every RESULT_CACHE_EVICT_INTERVAL seconds while it
+    stores results and once more at the end of a run.
+    """
+
+    def __init__(self, cache_dir=RESULT_CACHE_DIR, max_size=RESULT_CACHE_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def key(self, check_name, inputs):
+        import hashlib
+        digest = hashlib.sha256(f'{check_name}\0{codeDigest()}'.encode())
+        for check_input in inputs:
+            digest.update(b'\0')
+            digest.update(check_input if isinstance(check_input, (bytes, memoryview)) else str(check_input).encode())
+        return digest.hexdigest()
+
+    def entryPath(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    @profiled
+    def load(self, key):
+        entry_path = self.entryPath(key)
+        try:
+            with open(entry_path) as entry_file:
+                entry = json.load(entry_file)
+            os.utime(entry_path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    @profiled
+    def store(self, key, entry):
+        entry_path = self.entryPath(key)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            # written to a temporary file first, so processes of a batch never read a half written entry
+            temp_path = f'{entry_path}.{os.getpid()}.tmp'
+            with open(temp_path, 'w') as entry_file:
+                json.dump(entry, entry_file)
+            os.replace(temp_path, entry_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.info('Cannot store the result in the cache %s: %s', entry_path, e)
+        # the service and the watch mode never reach the eviction at the end of the run
+        if time.monotonic() - cache_evictions.setdefault(self.cache_dir, time.monotonic()) >= RESULT_CACHE_EVICT_INTERVAL:
+            self.evict()
+
+    def run(self, result, check_name, inputs, check, *args):
+        """
+        Returns the value of check(*args) and replays its printed output and findings from the cache when the inputs did not change
+        """
+        key = self.key(check_name, inputs)
+        entry = self.load(key)
+        if entry is not None:
+            logger.info('Using the cached result of the %s checks (%s)', check_name, key)
+            sys.stdout.write(entry['output'])
+            result.findings.extend(Finding(**finding) for finding in entry['findings'])
+            return entry['value']
+        first_finding = len(result.findings)
+        try:
+            with capturedOutput() as output:
+                value = check(*args)
+        finally:
+            sys.stdout.write(output.getvalue())
+        self.store(key, {'check': check_name, 'output': output.getvalue(), 'findings': [finding.toDict() for finding in result.findings[first_finding:]], 'value': value})
+        return value
+
+    @profiled
+    def evict(self):
+        cache_evictions[self.cache_dir] = time.monotonic()
+        entries = []
+        for entry_dir, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                entry_path = os.path.join(entry_dir, file_name)
+                try:
+                    entry_stat = os.stat(entry_path)
+                except OSError:
+                    continue
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+        cache_size = sum(entry[1] for entry in entries)
+        if cache_size <= self.max_size:
+            return
+        entries.sort()
+        for _, entry_size, entry_path in entries:
+            if cache_size <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+                cache_size -= entry_size
+            except OSError:
+                pass
+        logger.info('Removed the least recently used results from the cache, it has now %s bytes', cache_size)
+
+
+def cachedCheck(cache, result, check_name, inputs, check, *args):
+    if cache is None:
+        return check(*args)
+    return cache.run(result, check_name, inputs, check, *args)
+
+
+HISTORY_SECTIONS = ('corosync', 'cib', 'rpm')
+HISTORY_MAX_CHANGES = 20 # changed values printed per section, all of them are in the finding
+
+class ReportHistory:
+    """
+    SQLite store of the configuration of the checked reports, per cluster (cluster-name and node names), used to show
+    what changed since the previous report of the same cluster.
+    Every report records the digest of its corosync, cib and rpm sections, the values of a section (corosync keys,
+    cib properties and resource params/meta/ops, package versions) are only stored when its digest changed, the
+    sections that did not change point to the report that has their values.
+    """
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS reports (id INTEGER PRIMARY KEY, cluster TEXT NOT NULL, report TEXT NOT NULL, checked REAL NOT NULL);
+        CREATE INDEX IF NOT EXISTS reports_cluster ON reports (cluster, id);
+        CREATE TABLE IF NOT EXISTS report_nodes (report_id INTEGER NOT NULL, node TEXT NOT NULL);
+        CREATE INDEX IF NOT EXISTS report_nodes_node ON report_nodes (node, report_id);
+        CREATE TABLE IF NOT EXISTS report_sections (report_id INTEGER NOT NULL, section TEXT NOT NULL, digest TEXT NOT NULL, values_report_id INTEGER NOT NULL,
+            PRIMARY KEY (report_id, section));
+        CREATE TABLE IF NOT EXISTS section_values (report_id INTEGER NOT NULL, section TEXT NOT NULL, key TEXT NOT NULL, value TEXT,
+            PRIMARY KEY (report_id, section, key));
+    '''
+
+    def __init__(self, db_path):
+        import sqlite3
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # the workers of a batch write to the same database, they wait for each other instead of failing
+        self.db = sqlite3.connect(db_path, timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(self.SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def clusterKey(cluster_name, node_names):
+        return f'{cluster_name}:{",".join(sorted(node_names))}'
+
+    def lastReport(self, cluster, node_names):
+        """
+        Returns (id, report, checked) of the last report of the cluster, or of the last report that has one of
+        its nodes when the cluster was renamed or a node replaced, None when the cluster was never seen
+        """
+        row = self.db.execute('SELECT id, report, checked FROM reports WHERE cluster = ? ORDER BY id DESC LIMIT 1', (cluster,)).fetchone()
+        if row is None and node_names:
+            row = self.db.execute(f'SELECT id, report, checked FROM reports WHERE id = (SELECT MAX(report_id) FROM report_nodes WHERE node IN ({",".join("?" * len(node_names))}))',
+                tuple(node_names)).fetchone()
+        return row
+
+    def sections(self, report_id):
+        return {section: (digest, values_report_id) for section, digest, values_report_id in
+            self.db.execute('SELECT section, digest, values_report_id FROM report_sections WHERE report_id = ?', (report_id,))}
+
+    def sectionValues(self, values_report_id, section):
+        return dict(self.db.execute('SELECT key, value FROM section_values WHERE report_id = ? AND section = ?', (values_report_id, section)))
+
+    def record(self, report_name, cluster, node_names, digests, changed_values, unchanged_sections):
+        """
+        Stores the report with the values of its changed sections, unchanged_sections maps the other sections to the report that has their values
+        """
+        with self.db:
+            report_id = self.db.execute('INSERT INTO reports (cluster, report, checked) VALUES (?, ?, ?)', (cluster, report_name, time.time())).lastrowid
+            self.db.executemany('INSERT INTO report_nodes (report_id, node) VALUES (?, ?)', [(report_id, node_name) for node_name in node_names])
+            self.db.executemany('INSERT INTO report_sections (report_id, section, digest, values_report_id) VALUES (?, ?, ?, ?)',
+                [(report_id, section, digest, unchanged_sections.get(section, report_id)) for section, digest in digests.items()])
+            self.db.executemany('INSERT INTO section_values (report_id, section, key, value) VALUES (?, ?, ?, ?)',
+                [(report_id, section, key, value) for section, section_values in changed_values.items() for key, value in section_values.items()])
+        return report_id
+
+
+def flattenValues(value, prefix=''):
+    """
+    Flattens the parsed corosync.conf into {"totem.token": "30000", "nodelist.node.0.ring0_addr": ..}
+    """
+    values = {}
+    if isinstance(value, dict):
+        for key, child in value.items():
+            values.update(flattenValues(child, f'{prefix}{key}.'))
+    elif isinstance(value, list):
+        for position, child in enumerate(value):
+            values.update(flattenValues(child, f'{prefix}{position}.'))
+    else:
+        values[prefix[:-1]] = value
+    return values
+
+def cibValues(cluster_model):
+    values = {f'property.{name}': value for name, value in cluster_model.crm_config.items()}
+    for resource_id, resource in cluster_model.resources_by_id.items():
+        values[f'{resource_id}.type'] = resource.type or resource.tag
+        values.update({f'{resource_id}.meta.{name}': value for name, value in resource.meta.items()})
+        values.update({f'{resource_id}.param.{name}': value for name, value in resource.params.items()})
+        for (op_name, role), op in resource.ops.items():
+            op_key = f'{resource_id}.op.{op_name}' + (f'.{role}' if role else '')
+            values[f'{op_key}.interval'] = op.interval
+            values[f'{op_key}.timeout'] = op.timeout
+    values.update({f'constraint.{constraint.id}': json.dumps(constraint.attrs, sort_keys=True) for constraint in cluster_model.constraints})
+    return values
+
+def sectionValues(section, report, cluster_info, corosync_config):
+    if section == 'corosync':
+        return flattenValues(corosync_config or {})
+    if section == 'cib':
+        # taken by the cib checks from the model they parsed, the cib is not parsed a second time
+        return cluster_info.get('cib_values', {})
+    return {package: '-'.join(part for part in version if part) for package, version in RpmIndex(report).packages.items()}
+
+@profiled
+def historyChecks(history, report, ha_index, cluster_info, corosync_config, result):
+    """
+    Compares the report with the last report of the same cluster in the history and records it,
+    only the sections whose digest changed are parsed and compared
+    """
+    import hashlib
+    node_names = sorted(node_name for node_name in cluster_info['nodes'].values() if node_name)
+    if not node_names:
+        logger.info('The cluster nodes are not known, the report is not compared with the history')
+        return
+    cluster = ReportHistory.clusterKey(cluster_info['cluster_name'], node_names)
+    section_views = {'corosync': ha_index.getSectionView(COROSYNC_CONF_SECTION), 'cib': ha_index.getSectionView(CIB_SECTION)}
+    digests = {section: hashlib.sha256(section_views[section] or b'').hexdigest() for section in section_views}
+    digests['rpm'] = report.fileDigest('rpm.txt')
+    last_report = history.lastReport(cluster, node_names)
+    last_sections = history.sections(last_report[0]) if last_report is not None else {}
+    changed_values, unchanged_sections = {}, {}
+    section_changes = {}
+    for section in HISTORY_SECTIONS:
+        if section in last_sections and last_sections[section][0] == digests[section]:
+            unchanged_sections[section] = last_sections[section][1]
+            continue
+        changed_values[section] = sectionValues(section, report, cluster_info, corosync_config)
+        if section in last_sections:
+            last_values = history.sectionValues(last_sections[section][1], section)
+            section_changes[section] = [(key, last_values.get(key), changed_values[section].get(key)) for key in sorted(last_values.keys() | changed_values[section].keys())
+                if last_values.get(key) != changed_values[section].get(key)]
+    history.record(report.name, cluster, node_names, digests, changed_values, unchanged_sections)
+
+    if last_report is None:
+        logger.info('First report of the cluster %s in the history %s', cluster, history.db_path)
+        print(f'This is the first report of the cluster {cluster} in the history, the next reports will be compared with it')
+        return
+    last_checked = time.strftime('%Y-%m-%d %H:%M', time.localtime(last_report[2]))
+    if not any(section_changes.values()):
+        logger.info('No change since the last report %s of the cluster %s', last_report[1], cluster)
+        print(f'No change in the corosync, cib and rpm configuration since the last report {last_report[1]} of this cluster (checked {last_checked})')
+        return
+    print(f'Changes since the last report {last_report[1]} of this cluster (checked {last_checked}):')
+    for section, changes in section_changes.items():
+        if not changes:
+            continue
+        logger.info('%s changes in %s since %s: %s', len(changes), section, last_report[1], changes)
+        print('\033[33m' + f'{len(changes)} changed values in {section}:' + '\033[0m')
+        for key, old_value, new_value in changes[:HISTORY_MAX_CHANGES]:
+            print(f'    {key}: {old_value if old_value is not None else "(not set)"} -> {new_value if new_value is not None else "(not set)"}')
+        if len(changes) > HISTORY_MAX_CHANGES:
+            print(f'    .. and {len(changes) - HISTORY_MAX_CHANGES} more, see the findings of the report')
+        result.addFinding(f'history.{section}.changed', SEVERITY_INFO, f'{len(changes)} values of {section} changed since the last report {last_report[1]} of the cluster, observed are the new values and expected the previous ones', section,
+            {key: new_value for key, _, new_value in changes}, {key: old_value for key, old_value, _ in changes})
+
+@profiled
+def cibChecks(ha_index, result, history_values=False):
+    """
+    The checks of the cluster configuration, returns what the other checks need to know about the cluster:
+    the fencing, the cluster type and name, the node names by node id and the stonith-timeout,
+    with history_values also the values of the cib recorded by the history (cib_values)
+    """
+    cluster_info = {'azure_fence_agent': 0, 'sbd_fence_agent': 0, 'cluster_type': '', 'cluster_name': '', 'nodes': {}, 'stonith_timeout': None}
+    cluster_model = readingCib(ha_index)
+    if cluster_model is None:
+        result.addFinding('cib.missing', SEVERITY_CRITICAL, 'cib.xml cannot be found in ha.txt or has no configuration, the cluster resources are not checked')
+        return cluster_info
+    cluster_info['azure_fence_agent'], cluster_info['sbd_fence_agent'] = propertyChecker(cluster_model, result)
+    cluster_info['cluster_type'] = getClusterType(cluster_model, result)
+    constrainsChecker(cluster_model, cluster_info['cluster_type'], result)
+    cluster_info['nodes'] = {node.id: node.uname for node in cluster_model.nodes if node.id}
+    cluster_info['stonith_timeout'] = cluster_model.crm_config.get('stonith-timeout')
+    cluster_info['cluster_name'] = cluster_model.crm_config.get('cluster-name', '')
+    if history_values:
+        cluster_info['cib_values'] = cibValues(cluster_model)
+    return cluster_info
+
+@profiled
+def corosyncChecks(corosync_config, result):
+    totemChecker(corosync_config, result)
+    quorumChecker(corosync_config, result)
+
+@profiled
+def networkChecks(report, corosync_config, cluster_nodes, result):
+    hostsChecker(NetworkInfo(report), cluster_nodes, corosync_config, result)
+
+@profiled
+def sbdChecks(ha_index, stonith_timeout, corosync_config, result):
+    sbdChecker(SbdInfo(ha_index), stonith_timeout, corosync_config, result)
+
+@profiled
+def logChecks(report, workers, result):
+    logChecker(report, workers, result)
+
+@profiled
+def rpmChecks(report, version_id, azure_fence_agent, sbd_fence_agent, result):
+    rpmChecker(RpmIndex(report), version_id, azure_fence_agent, sbd_fence_agent, result)
+
+class CheckGraph:
+    """
+    The checks of a report with the checks whose value they need, run on a thread pool: a check starts as soon as
+    the checks it depends on are done, so the checks reading different files of the report overlap.
+    Every check prints to its own buffer and adds its findings to its own result, they are added to the result of the report
+    in the order the checks were added, so the output and findings do not depend on which check finished first.
+    With --profile the checks run one after the other, the stages of the profile are measured one at a time.
+    """
+
+    def __init__(self, result, threads=CHECK_THREADS):
+        self.result = result
+        self.threads = threads
+        self.checks = {} # name -> (check, dependencies), check is called with its result and the values of the dependencies
+
+    def add(self, name, check, dependencies=()):
+        unknown_dependencies = [dependency for dependency in dependencies if dependency not in self.checks]
+        if unknown_dependencies:
+            raise ValueError(f'The check {name} depends on {unknown_dependencies} which are not added before it')
+        self.checks[name] = (check, tuple(dependencies))
+
+    def runCheck(self, name, values):
+        check, dependencies = self.checks[name]
+        check_result = ReportResult(self.result.report)
+        with capturedOutput() as output:
+            value = check(check_result, *(values[dependency] for dependency in dependencies))
+        return value, output.getvalue(), check_result.findings
+
+    @profiled
+    def run(self):
+        """
+        Runs the checks and returns their values by name, an exception of a check is raised once the output
+        of the checks added before it is written
+        """
+        values, outcomes = {}, {}
+        names = list(self.checks)
+        written = 0
+
+        def writeDone():
+            # the output of a check is written once the checks added before it are written
+            nonlocal written
+            while written < len(names) and names[written] in outcomes:
+                _, output, findings = outcomes[names[written]]
+                sys.stdout.write(output)
+                self.result.findings.extend(findings)
+                written += 1
+
+        if self.threads <= 1 or profiler is not None:
+            for name in names:
+                outcomes[name] = self.runCheck(name, values)
+                values[name] = outcomes[name][0]
+                writeDone()
+            return values
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+        with threadStdout(), ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='check') as executor:
+            waiting = list(names)
+            running = {}
+            try:
+                while waiting or running:
+                    for name in [name for name in waiting if all(dependency in values for dependency in self.checks[name][1])]:
+                        running[executor.submit(self.runCheck, name, values)] = name
+                        waiting.remove(name)
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            outcomes[name] = future.result()
+                        except Exception:
+                            writeDone()
+                            raise
+                        values[name] = outcomes[name][0]
+                    writeDone()
+            finally:
+                for future in running:
+                    future.cancel()
+        return values
+
+@profiled
+def runChecks(path_to_scc, cache=None, history=None, check_threads=CHECK_THREADS, log_workers=LOG_SCAN_WORKERS):
+    """
+    Runs the whole check pipeline on one supportconfig report and returns its ReportResult,
+    the results of the checks are reused from cache when it is given and the sections they read did not change.
+    With history the report is compared with the last report of the same cluster and recorded.
+    The checks only wait for the checks whose result they need (the fencing and nodes found by the cib checks),
+    the others run at the same time on check_threads threads, the history is compared on the calling thread once they are done.
+    Big logs are scanned on log_workers processes.
+    """
+    result = ReportResult(path_to_scc)
+    with SupportconfigReport(path_to_scc) as report:
+        if not checkFileExistance(report, result):
+            result.status = 'missing files'
+            return result
+        ha_index = SupportconfigIndex(report, 'ha.txt')
+        check_rules = loadRules()
+
+        def cib(check_result):
+            return cachedCheck(cache, check_result, 'cib', [ha_index.getSectionView(CIB_SECTION) or b'', check_rules.digests.get('cib', ''), history is not None],
+                cibChecks, ha_index, check_result, history is not None)
+
+        def corosync(check_result, corosync_config):
+            if 'corosync' in check_rules.sections:
+                cachedCheck(cache, check_result, 'corosync', [ha_index.getSectionView(COROSYNC_CONF_SECTION) or b'', check_rules.digests['corosync']],
+                    corosyncChecks, corosync_config, check_result)
+
+        def sbd(check_result, cluster_info, corosync_config):
+            if not cluster_info['sbd_fence_agent']:
+                return
+            sbd_sections = [SBD_SYSCONFIG_SECTION] + [section_name for pattern in (SBD_DUMP_SECTION, SBD_LIST_SECTION, WATCHDOG_SECTION) for section_name in ha_index.findSections(pattern)]
+            sbd_inputs = [part for section_name in sbd_sections for part in (section_name, ha_index.getSectionView(section_name) or b'')]
+            cachedCheck(cache, check_result, 'sbd', sbd_inputs + [cluster_info['stonith_timeout'], ha_index.getSectionView(COROSYNC_CONF_SECTION) or b'', check_rules.digests.get('sbd', '')],
+                sbdChecks, ha_index, cluster_info['stonith_timeout'], corosync_config, check_result)
+
+        def network(check_result, cluster_info, corosync_config):
+            cachedCheck(cache, check_result, 'network', [report.fileDigest('network.txt'), json.dumps(cluster_info['nodes'], sort_keys=True), ha_index.getSectionView(COROSYNC_CONF_SECTION) or b''],
+                networkChecks, report, corosync_config, cluster_info['nodes'], check_result)
+
+        def rpm(check_result, version_id, cluster_info):
+            if 'rpm' in check_rules.sections:
+                cachedCheck(cache, check_result, 'rpm', [report.fileDigest('rpm.txt'), version_id, cluster_info['azure_fence_agent'], cluster_info['sbd_fence_agent'], check_rules.digests['rpm']],
+                    rpmChecks, report, version_id, cluster_info['azure_fence_agent'], cluster_info['sbd_fence_agent'], check_result)
+
+        def logs(check_result):
+            if 'logs' in check_rules.sections:
+                # the logs are the biggest files of the report, their key is a sample of them so a cache hit does not read them whole
+                cachedCheck(cache, check_result, 'logs', [report.fileSampleDigest(file_name) for file_name in LOG_FILES] + [check_rules.digests['logs']],
+                    logChecks, report, log_workers, check_result)
+
+        check_graph = CheckGraph(result, check_threads)
+        check_graph.add('os', lambda check_result: osVersion(report))
+        check_graph.add('cib', cib)
+        # corosync.conf is parsed once for the corosync, sbd, network checks and the history
+        check_graph.add('corosync_conf', lambda check_result: readCorosyncConf(ha_index))
+        check_graph.add('corosync', corosync, ('corosync_conf',))
+        check_graph.add('sbd', sbd, ('cib', 'corosync_conf'))
+        check_graph.add('network', network, ('cib', 'corosync_conf'))
+        check_graph.add('rpm', rpm, ('os', 'cib'))
+        check_graph.add('logs', logs)
+        values = check_graph.run()
+        cluster_info = values['cib']
+        if history is not None:
+            # the sqlite connection of the history can only be used by the thread that opened it, not by the threads of the graph
+            historyChecks(history, report, ha_index, cluster_info, values['corosync_conf'], result)
+        result.os_version = values['os']
+        result.cluster_type = cluster_info['cluster_type']
+        result.fencing = [name for name, configured in (('azure_fence_agent', cluster_info['azure_fence_agent']), ('sbd', cluster_info['sbd_fence_agent'])) if configured]
+        result.status = 'stonith disabled' if any(finding.check_id == 'pacemaker.stonith_enabled' for finding in result.findings) else 'checked'
+    return result
+
+def checkReportIsolated(path_to_scc, report_output_dir, cache=None, log_level='INFO', profile=False, cprofile=False, history_path=None):
+    """
+    Runs the checks of one report in a batch, the printed output and the log of the report are written
+    under its own folder so reports checked at the same time do not clobber each other.
+    Returns the result as a dictionary, with its findings, to the main process.
+    With profile the stages of the report are written to profile.json (and profile.prof with cprofile) in its folder.
+    With history_path the report is compared with and recorded in the history database, opened by every worker.
+    """
+    global profiler
+    profiler = StageProfiler() if profile or cprofile else None
+    report_cprofile = None
+    if cprofile:
+        import cProfile
+        report_cprofile = cProfile.Profile()
+    os.makedirs(report_output_dir, exist_ok=True)
+    report_handler = logHandler(os.path.join(report_output_dir, 'cluster-checker.log'))
+    saved_handlers = logger.handlers
+    logger.handlers = [report_handler]
+    # the workers do not inherit the level of the main process when they are spawned instead of forked
+    logger.setLevel(log_level)
+    start_time = time.time()
+    result = ReportResult(path_to_scc)
+    history = None
+    try:
+        if history_path:
+            history = ReportHistory(history_path)
+        with open(os.path.join(report_output_dir, 'cluster-checker.txt'), 'w') as output_file:
+            with contextlib.redirect_stdout(output_file):
+                if report_cprofile is not None:
+                    report_cprofile.enable()
+                try:
+                    # the reports of the batch already run in parallel, one thread per report is enough
+                    result = runChecks(path_to_scc, cache, history, check_threads=1, log_workers=1)
+                finally:
+                    if report_cprofile is not None:
+                        report_cprofile.disable()
+                if profiler is not None:
+                    writeProfile(profiler, os.path.join(report_output_dir, 'profile.json'), report_cprofile)
+    except Exception as e:
+        logger.warning('exception:%s', traceback.format_exc())
+        result.addFinding('checker.error', SEVERITY_CRITICAL, f'Checking the report failed: {e!r}')
+    finally:
+        if history is not None:
+            history.close()
+        logger.handlers = saved_handlers
+        report_handler.close()
+    result.duration = round(time.time() - start_time, 2)
+    result.output = report_output_dir
+    return result.toDict()
+
+def findReports(batch_paths):
+    """
+    Expands the directories and glob patterns given for batch mode into the list of supportconfig reports,
+    a report is either a compressed archive or a folder that has ha.txt
+    """
+    import glob
+    reports = []
+    for batch_path in batch_paths:
+        if os.path.isdir(batch_path) and not os.path.exists(os.path.join(batch_path, 'ha.txt')):
+            candidates = [os.path.join(batch_path, entry) for entry in sorted(os.listdir(batch_path))]
+        else:
+            candidates = sorted(glob.glob(batch_path))
+        for candidate in candidates:
+            if candidate.endswith(ARCHIVE_EXTENSIONS) or os.path.exists(os.path.join(candidate, 'ha.txt')):
+                if candidate not in reports:
+                    reports.append(candidate)
+    return reports
+
+def findingsText(severity_counts):
+    return ', '.join(f'{count} {severity}' for severity, count in severity_counts.items() if count) or 'none'
+
+@profiled
+def batchChecker(batch_paths, output_dir, workers, jsonl_path=None, cache=None, log_level='INFO', profile=False, cprofile=False, history_path=None):
+    """
+    Checks the reports in a process pool, every report result is written to the JSONL file (<output_dir>/results.jsonl by default)
+    as soon as it is done, only the summary of the reports is kept for the table printed at the end
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    reports = findReports(batch_paths)
+    logger.info('Found %s reports to check in batch mode: %s', len(reports), reports)
+    print(f'Found {len(reports)} supportconfig reports, checking them using {workers} workers ..')
+    os.makedirs(output_dir, exist_ok=True)
+    report_output_dirs = {}
+    for path_to_scc in reports:
+        report_name = SupportconfigReport(path_to_scc).name
+        report_output_dir = os.path.join(output_dir, report_name)
+        counter = 1
+        while report_output_dir in report_output_dirs.values():
+            counter += 1
+            report_output_dir = os.path.join(output_dir, f'{report_name}-{counter}')
+        report_output_dirs[path_to_scc] = report_output_dir
+
+    summaries = []
+    jsonl_path = jsonl_path or os.path.join(output_dir, 'results.jsonl')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=processContext()) as executor, JsonlWriter(jsonl_path) as results_writer:
+        futures = {executor.submit(checkReportIsolated, path_to_scc, report_output_dirs[path_to_scc], cache, log_level, profile, cprofile, history_path): path_to_scc for path_to_scc in reports}
+        for future in as_completed(futures):
+            result = future.result()
+            results_writer.write(result)
+            summary = {name: value for name, value in result.items() if name != 'findings'}
+            summary['findings'] = {severity: sum(1 for finding in result['findings'] if finding['severity'] == severity) for severity in SEVERITIES}
+            summaries.append(summary)
+            print(f'[{len(summaries)}/{len(reports)}] {summary["report"]}: {summary["status"]} in {summary["duration"]}s, findings: {findingsText(summary["findings"])}')
+
+    summaries.sort(key=lambda summary: summary['report'])
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as summary_file:
+        json.dump(summaries, summary_file, indent=4)
+    print(f'\n{"Report":<50} {"Status":<18} {"OS":<8} {"Cluster type":<14} {"Fencing":<28} {"Findings":<34} Output')
+    for summary in summaries:
+        print(f'{os.path.basename(summary["report"]):<50} {summary["status"]:<18} {summary["os_version"]:<8} {summary["cluster_type"]:<14} {",".join(summary["fencing"]):<28} {findingsText(summary["findings"]):<34} {summary["output"]}')
+    print(f'Summary of the batch is written to {os.path.join(output_dir, "summary.json")} and the findings of every report to {jsonl_path}')
+    return summaries
+
+
+def workerInit():
+    """
+    Resets SIGTERM in a worker of --serve or --watch, the handler of the main process stops it only once the running checks are done
+    """
+    import signal
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def serveWorkerInit(log_level, log_paths=()):
+    """
+    Prepares a worker process of the service once, the rules, the log signatures and the parser are ready before the first report
+    """
+    workerInit()
+    logger.setLevel(log_level)
+    for log_path in log_paths:
+        logger.addHandler(logHandler(log_path, mode='a'))
+    check_rules = loadRules()
+    logScanner(tuple((signature['pattern'], tuple(signature.get('keywords', ()))) for signature in check_rules.logs))
+    codeDigest()
+    from lxml import etree # noqa: F401
+
+def serveCheck(path_to_scc, cache=None, history_path=None):
+    """
+    Runs the checks of one report in a worker of the service, returns the result with its findings and the printed output (text)
+    """
+    start_time = time.time()
+    result = ReportResult(path_to_scc)
+    history = None
+    with capturedOutput() as output:
+        try:
+            if history_path:
+                history = ReportHistory(history_path)
+            # the workers of the service already check reports in parallel, big logs are scanned in the worker itself
+            result = runChecks(path_to_scc, cache, history, log_workers=1)
+        except Exception as e:
+            logger.warning('exception:%s', traceback.format_exc())
+            result.addFinding('checker.error', SEVERITY_CRITICAL, f'Checking the report failed: {e!r}')
+        finally:
+            if history is not None:
+                history.close()
+    result.duration = round(time.time() - start_time, 2)
+    report_result = result.toDict()
+    report_result['text'] = output.getvalue()
+    return report_result
+
+def serveChecks(address, workers, version, cache=None, history_path=None, log_level='INFO'):
+    """
+    Local service (--serve) checking the reports sent over HTTP, on a TCP address (host:port) or a Unix socket (a path).
+    The worker processes are started once and keep the rules, the parsers and the caches between the reports:
+        GET /health                                   -> {"status": "ok", "version": .., "rules": ..}
+        POST /check {"path": "/path/to/scc"}          -> the result of the report, its findings and printed output (text)
+        POST /check?name=scc_node1.txz (archive body) -> the same for an uploaded archive, removed once it is checked
+    """
+    import http.server
+    import shutil
+    import signal
+    import socketserver
+    import tempfile
+    import urllib.parse
+    from concurrent.futures import ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    class CheckRequestHandler(http.server.BaseHTTPRequestHandler):
+        server_version = f'cluster-checker/{version}'
+
+        def do_GET(self):
+            if urllib.parse.urlsplit(self.path).path != '/health':
+                return self.sendJson(404, {'error': f'unknown path {self.path}, use GET /health or POST /check'})
+            self.sendJson(200, {'status': 'ok', 'version': version, 'rules': loadRules().version, 'workers': workers})
+
+        def do_POST(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path != '/check':
+                return self.sendJson(404, {'error': f'unknown path {self.path}, use GET /health or POST /check'})
+            if self.headers.get('Content-Length') is None:
+                return self.sendJson(411, {'error': 'Content-Length is required'})
+            try:
+                content_length = int(self.headers['Content-Length'])
+            except ValueError:
+                return self.sendJson(400, {'error': 'invalid Content-Length'})
+            if content_length < 0:
+                return self.sendJson(400, {'error': 'invalid Content-Length'})
+            report_name = urllib.parse.parse_qs(url.query).get('name', [None])[0]
+            if report_name is None:
+                if content_length > SERVE_MAX_REQUEST:
+                    return self.sendJson(413, {'error': f'the body is bigger than {SERVE_MAX_REQUEST} bytes, send {{"path": "/path/to/scc"}} or the archive with ?name=<archive name>'})
+                try:
+                    request = json.loads(self.rfile.read(content_length) or b'{}')
+                except ValueError as e:
+                    return self.sendJson(400, {'error': f'the body is not valid json: {e}'})
+                if not isinstance(request, dict) or not isinstance(request.get('path'), str):
+                    return self.sendJson(400, {'error': 'send {"path": "/path/to/scc"}, or the archive with ?name=<archive name>'})
+                return self.sendJson(*self.check(request['path']))
+            report_name = os.path.basename(report_name)
+            if not report_name.endswith(ARCHIVE_EXTENSIONS):
+                return self.sendJson(400, {'error': f'the uploaded report must be an archive ({", ".join(ARCHIVE_EXTENSIONS)})'})
+            if content_length > SERVE_MAX_UPLOAD:
+                return self.sendJson(413, {'error': f'the archive is bigger than {SERVE_MAX_UPLOAD} bytes'})
+            upload_dir = tempfile.mkdtemp(prefix='cluster-checker-upload-')
+            try:
+                upload_path = os.path.join(upload_dir, report_name)
+                with open(upload_path, 'wb') as upload_file:
+                    remaining = content_length
+                    while remaining:
+                        chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                        if not chunk:
+                            return self.sendJson(400, {'error': f'the upload ended after {content_length - remaining} of {content_length} bytes'})
+                        upload_file.write(chunk)
+                        remaining -= len(chunk)
+                status, report_result = self.check(upload_path)
+                if status == 200:
+                    report_result['report'] = report_name
+                self.sendJson(status, report_result)
+            finally:
+                shutil.rmtree(upload_dir, ignore_errors=True)
+
+        def check(self, path_to_scc):
+            """
+            Returns the http status and the body of the check of a report, a broken pool (a worker killed or out of memory)
+            is started again for the next requests
+            """
+            nonlocal executor
+            logger.info('Checking %s for %s', path_to_scc, self.address_string())
+            pool = executor
+            try:
+                return 200, pool.submit(serveCheck, path_to_scc, cache, history_path).result()
+            except BrokenProcessPool as e:
+                logger.warning('The pool of workers is broken checking %s: %s', path_to_scc, e)
+                with pool_lock:
+                    if executor is pool:
+                        print('\033[33m' + 'A worker stopped unexpectedly, starting the workers again' + '\033[0m')
+                        executor = startWorkers()
+                        pool.shutdown(wait=False)
+                return 503, {'error': f'the worker checking the report stopped unexpectedly ({e}), the workers are started again, retry the report'}
+            except Exception as e:
+                logger.warning('exception:%s', traceback.format_exc())
+                return 500, {'error': f'checking the report failed: {e!r}'}
+
+        def sendJson(self, status, body):
+            response = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def address_string(self):
+            # the clients of a Unix socket have no address
+            return self.client_address[0] if self.client_address else 'unix socket'
+
+        def log_message(self, format, *args):
+            logger.info('%s %s', self.address_string(), format % args)
+
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    def startWorkers():
+        # the workers are started and warmed up before they get a report, they write to the log files of the service
+        log_paths = [handler.baseFilename for handler in logger.handlers if isinstance(handler, logging.FileHandler)]
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=processContext(), initializer=serveWorkerInit, initargs=(log_level, log_paths))
+        wait([pool.submit(codeDigest) for _ in range(workers)])
+        return pool
+
+    pool_lock = threading.Lock()
+    executor = startWorkers()
+    if address.startswith('/') or address.startswith('.'):
+        if os.path.exists(address):
+            os.remove(address)
+        server = UnixHTTPServer(address, CheckRequestHandler)
+        os.chmod(address, 0o600)
+        url = f'unix:{address}'
+    else:
+        host, _, port = address.rpartition(':')
+        server = http.server.ThreadingHTTPServer((host or '127.0.0.1', int(port)), CheckRequestHandler)
+        url = f'http://{host or "127.0.0.1"}:{server.server_address[1]}'
+    def stopService(signum, frame):
+        raise KeyboardInterrupt
+
+    # stopping the service (systemctl stop, kill) ends it like Ctrl-C
+    signal.signal(signal.SIGTERM, stopService)
+    logger.info('Serving the checks on %s with %s workers', url, workers)
+    print(f'Serving the checks on {url} with {workers} workers, press Ctrl-C to stop')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('Stopping the service ..')
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        server.server_close()
+        executor.shutdown(cancel_futures=True)
+        if isinstance(server, UnixHTTPServer) and os.path.exists(address):
+            os.remove(address)
+
+
+class FolderEvents:
+    """
+    inotify watch of a folder (Linux, through ctypes), used to wake up the scan of --watch as soon as a file is written or moved in it.
+    open() returns None when inotify is not available, the folder is then only scanned every poll interval.
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    @classmethod
+    def open(cls, folder):
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(cls.IN_NONBLOCK | cls.IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+            if libc.inotify_add_watch(fd, os.fsencode(folder), cls.IN_CLOSE_WRITE | cls.IN_MOVED_TO | cls.IN_CREATE) < 0:
+                errno = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(errno, os.strerror(errno))
+        except (OSError, AttributeError) as e:
+            logger.info('inotify is not available for %s (%s), the folder is polled', folder, e)
+            return None
+        return cls(fd)
+
+    def wait(self, timeout):
+        """
+        Waits up to timeout seconds for a change in the folder, returns True when there was one
+        """
+        import select
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        changed = False
+        while readable:
+            try:
+                changed = bool(os.read(self.fd, 64 * 1024)) or changed
+            except BlockingIOError:
+                break
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProcessedReports:
+    """
+    The archives already checked by --watch, kept in a JSONL file so a restart does not check them again.
+    An archive is known by its name, size and modification time, an archive uploaded again with other content is checked again.
+    """
+
+    def __init__(self, path):
+        self.keys = set()
+        if os.path.exists(path):
+            with open(path) as processed_file:
+                for line in processed_file:
+                    try:
+                        self.keys.add(json.loads(line)['key'])
+                    except (ValueError, KeyError, TypeError):
+                        logger.info('Skipping the invalid line of %s: %s', path, line)
+        self.writer = JsonlWriter(path, mode='a')
+
+    @staticmethod
+    def reportKey(report_path, report_stat):
+        return f'{os.path.basename(report_path)}:{report_stat.st_size}:{report_stat.st_mtime_ns}'
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, key, report_path, status):
+        self.keys.add(key)
+        self.writer.write({'key': key, 'report': report_path, 'status': status, 'checked': round(time.time(), 3)})
+
+    def close(self):
+        self.writer.close()
+
+def settledReports(watch_dir, seen, settle_time):
+    """
+    Scans the watched folder and returns the archives that did not change for settle_time seconds as (path, key),
+    oldest first. seen keeps (key, time it was first seen with this size and modification time) of the archives between two scans.
+    """
+    now = time.time()
+    current = {}
+    for entry in os.scandir(watch_dir):
+        # uploads in progress are often hidden files renamed at the end
+        if entry.name.startswith('.') or not entry.name.endswith(ARCHIVE_EXTENSIONS):
+            continue
+        try:
+            if not entry.is_file():
+                continue
+            entry_stat = entry.stat()
+        except OSError:
+            continue
+        key = ProcessedReports.reportKey(entry.path, entry_stat)
+        previous = seen.get(entry.path)
+        current[entry.path] = (key, previous[1] if previous is not None and previous[0] == key else now, entry_stat.st_mtime)
+    seen.clear()
+    seen.update(current)
+    settled = [(mtime, path, key) for path, (key, since, mtime) in current.items() if now - since >= settle_time and now - mtime >= settle_time]
+    return [(path, key) for _, path, key in sorted(settled)]
+
+@profiled
+def watchChecker(watch_dir, output_dir, workers, jsonl_path=None, cache=None, log_level='INFO', profile=False, cprofile=False, history_path=None,
+        poll_interval=WATCH_POLL_INTERVAL, settle_time=WATCH_SETTLE_TIME):
+    """
+    Checks the archives dropped in watch_dir (--watch) as they arrive, until Ctrl-C or SIGTERM.
+    An archive is checked once it did not change for settle_time seconds, at most workers reports are checked at the same time
+    and the other archives wait in the folder. Every result is appended to the JSONL file (<output_dir>/results.jsonl by default)
+    and the checked archives to <output_dir>/processed.jsonl.
+    """
+    import signal
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+    os.makedirs(output_dir, exist_ok=True)
+    jsonl_path = jsonl_path or os.path.join(output_dir, 'results.jsonl')
+    processed = ProcessedReports(os.path.join(output_dir, 'processed.jsonl'))
+    folder_events = FolderEvents.open(watch_dir)
+    seen = {}
+    running = {} # future -> (path, key)
+
+    def stopWatching(signum, frame):
+        raise KeyboardInterrupt
+
+    def collectReport(future, results_writer):
+        """
+        Writes the result of a finished check, a check whose worker failed (killed, out of memory) is recorded as failed.
+        Returns False when the pool is broken and has to be started again.
+        """
+        nonlocal checked
+        path_to_scc, key = running.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.warning('Checking %s failed: %s', path_to_scc, traceback.format_exc())
+            print('\033[91m' + f'Checking {path_to_scc} failed: {e!r}' + '\033[0m')
+            processed.add(key, path_to_scc, 'failed')
+            return not isinstance(e, BrokenProcessPool)
+        results_writer.write(result)
+        processed.add(key, path_to_scc, result['status'])
+        severity_counts = {severity: sum(1 for finding in result['findings'] if finding['severity'] == severity) for severity in SEVERITIES}
+        checked += 1
+        print(f'[{checked}] {result["report"]}: {result["status"]} in {result["duration"]}s, findings: {findingsText(severity_counts)}, output: {result["output"]}')
+        return True
+
+    signal.signal(signal.SIGTERM, stopWatching)
+    logger.info('Watching %s for new reports with %s workers, %s', watch_dir, workers, 'inotify' if folder_events is not None else f'polling every {poll_interval}s')
+    print(f'Watching {watch_dir} for new supportconfig archives, checking them using {workers} workers, press Ctrl-C to stop ..')
+    checked = 0
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=processContext(), initializer=workerInit)
+    try:
+        with JsonlWriter(jsonl_path, mode='a') as results_writer:
+            try:
+                while True:
+                    running_keys = {key for _, key in running.values()}
+                    ready = [(path, key) for path, key in settledReports(watch_dir, seen, settle_time) if key not in processed and key not in running_keys]
+                    pool_broken = False
+                    # the reports that do not fit in the pool stay in the folder until a worker is free
+                    for path_to_scc, key in ready[:workers - len(running)]:
+                        report_name = SupportconfigReport(path_to_scc).name
+                        report_output_dir = os.path.join(output_dir, report_name)
+                        counter = 1
+                        while os.path.exists(report_output_dir):
+                            counter += 1
+                            report_output_dir = os.path.join(output_dir, f'{report_name}-{counter}')
+                        logger.info('Checking the new report %s', path_to_scc)
+                        try:
+                            running[executor.submit(checkReportIsolated, path_to_scc, report_output_dir, cache, log_level, profile, cprofile, history_path)] = (path_to_scc, key)
+                        except BrokenProcessPool:
+                            # the report stays in the folder and is submitted again to the new pool
+                            pool_broken = True
+                            break
+                    # the folder is scanned again every second while archives are being written, waiting or checked
+                    running_keys = {key for _, key in running.values()}
+                    timeout = 1 if running or any(key not in processed and key not in running_keys for key, _, _ in seen.values()) else poll_interval
+                    done = ()
+                    if running:
+                        done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    elif folder_events is not None and not pool_broken:
+                        folder_events.wait(timeout)
+                    elif not pool_broken:
+                        time.sleep(timeout)
+                    for future in done:
+                        pool_broken = not collectReport(future, results_writer) or pool_broken
+                    if pool_broken:
+                        # a broken pool fails all its checks, they are recorded and the pool is started again
+                        for future in list(running):
+                            collectReport(future, results_writer)
+                        logger.warning('The pool of workers is broken, starting a new one')
+                        print('\033[33m' + 'A worker stopped unexpectedly, starting the workers again' + '\033[0m')
+                        executor.shutdown(wait=False)
+                        executor = ProcessPoolExecutor(max_workers=workers, mp_context=processContext(), initializer=workerInit)
+            except KeyboardInterrupt:
+                print(f'Stopping, waiting for the {len(running)} reports being checked ..')
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                for future in list(running):
+                    collectReport(future, results_writer)
+    finally:
+        executor.shutdown()
+        processed.close()
+        if folder_events is not None:
+            folder_events.close()
+    print(f'Checked {checked} reports, their results are written to {jsonl_path}')
+    return checked
+
+
+class UpdateCheck(threading.Thread):
+    """
+    Looks up the latest version of the tool in the background while the report is checked.
+    The result (also a failed lookup, so air-gapped hosts do not retry on every run) is cached on disk
+    and reused for UPDATE_CHECK_TTL seconds without any network call.
+    """
+
+    def __init__(self, cache_file=UPDATE_CACHE_FILE, ttl=UPDATE_CHECK_TTL, timeout=UPDATE_CHECK_TIMEOUT):
+        super().__init__(name='update-check', daemon=True)
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.timeout = timeout
+        self.latest_version = None
+
+    def run(self):
+        import requests
+        try:
+            with open(self.cache_file) as cache:
+                cached = json.load(cache)
+            if time.time() - cached['checked'] < self.ttl:
+                logger.info('Using the cached version check from %s', time.ctime(cached["checked"]))
+                self.latest_version = cached['latest_version']
+                return
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        try:
+            response = requests.get(f'{REPO_URL}/version.txt', timeout=self.timeout)
+            response.raise_for_status()
+            self.latest_version = response.text.strip()
+        except requests.RequestException as e:
+            logger.info('Checking for the latest version failed: %s', e)
+        logger.info('The latest version available is %s', self.latest_version)
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, 'w') as cache:
+                json.dump({'checked': time.time(), 'latest_version': self.latest_version}, cache)
+        except OSError as e:
+            logger.info('Cannot write the version check cache %s: %s', self.cache_file, e)
+
+    @profiled
+    def result(self):
+        """
+        Waits at most timeout seconds for the lookup and returns the latest version, None if it is not known
+        """
+        self.join(self.timeout)
+        return self.latest_version
+
+
+@profiled
+def selfUpdate(latest_version):
+    import requests
+    import subprocess
+    URL_1 = f'{REPO_URL}/cluster-checker.py'
+    try:
+        download_file = requests.get(URL_1, timeout=UPDATE_CHECK_TIMEOUT * 10)
+        download_file.raise_for_status()
+        rules_file = requests.get(f'{REPO_URL}/rules.json', timeout=UPDATE_CHECK_TIMEOUT * 10)
+    except requests.RequestException as e:
+        logger.info('Downloading version %s failed: %s', latest_version, e)
+        print(f'Downloading version {latest_version} failed, please update the script manually')
+        return
+    new_file_name = f'cluster-checker-{latest_version}.py'
+    open(new_file_name, "wb").write(download_file.content)
+    if rules_file.status_code == 200:
+        open(RULES_FILE, "wb").write(rules_file.content)
+    copy_command = f'cp {new_file_name} cluster-checker.py'
+    output = subprocess.run([copy_command], stdout=subprocess.PIPE, shell=True)
+    print(f'Done updating, the next execution of the script will use version {latest_version}')
 
 
 if __name__ == '__main__':
     VERSION = '1.9.6'
+    arg_parser = argparse.ArgumentParser(description='Checks the cluster configuration of SUSE cluster from supportconfig reports')
+    arg_parser.add_argument('path_to_scc', nargs='?', help='path to the supportconfig report, either the extracted folder or the compressed file')
+    arg_parser.add_argument('--batch', nargs='+', metavar='PATH', help='directories or glob patterns of supportconfig reports to check in parallel')
+    arg_parser.add_argument('--watch', metavar='DIR', help='check the supportconfig archives dropped in this folder as they arrive, until stopped (results under --output-dir)')
+    arg_parser.add_argument('--watch-interval', type=float, default=WATCH_POLL_INTERVAL, help=f'seconds between two scans of the --watch folder when inotify is not available or misses the writes of other hosts (default {WATCH_POLL_INTERVAL})')
+    arg_parser.add_argument('--settle-time', type=float, default=WATCH_SETTLE_TIME, help=f'seconds an archive of the --watch folder must stay unchanged before it is checked (default {WATCH_SETTLE_TIME})')
+    arg_parser.add_argument('--serve', nargs='?', const=SERVE_ADDRESS, metavar='ADDRESS', help=f'run as a local service checking the reports sent over HTTP on host:port or a Unix socket path (default {SERVE_ADDRESS})')
+    arg_parser.add_argument('--output-dir', default='./cluster-checker-results', help='folder for the per report output and the summary of batch and watch mode')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of reports checked at the same time in batch, watch and service mode')
+    arg_parser.add_argument('--log-level', default='INFO', choices=LOG_LEVELS, type=str.upper, help='verbosity of the log file, DEBUG also logs the parsed configuration (default INFO)')
+    arg_parser.add_argument('--log-file', help='log file of the run, {report} is replaced by the name of the report (default ./cluster-checker.log, <output-dir>/cluster-checker.log in batch mode)')
+    arg_parser.add_argument('--no-update-check', action='store_true', help='do not check github for a newer version of the script')
+    arg_parser.add_argument('--no-cache', action='store_true', help='always run the checks, do not use or store results in the cache')
+    arg_parser.add_argument('--cache-dir', default=RESULT_CACHE_DIR, help='folder of the cache of the check results')
+    arg_parser.add_argument('--cache-size', type=int, default=RESULT_CACHE_MAX_SIZE // (1024 * 1024), help='maximum size of the cache in MB, the least recently used results are removed above it')
+    arg_parser.add_argument('--profile', action='store_true', help='record the wall time, cpu time and memory of every stage and checker, printed as a table and written as json (slows down the run)')
+    arg_parser.add_argument('--profile-file', help='json file of the profile, {report} is replaced by the name of the report (default ./cluster-checker-profile.json, <output-dir>/profile.json in batch mode, where every report also has its own in its output folder)')
+    arg_parser.add_argument('--cprofile', action='store_true', help='with --profile, also write the cProfile statistics of every report next to its profile (.prof)')
+    arg_parser.add_argument('--history', metavar='PATH', help='SQLite database of the checked reports, the report is compared with the last report of the same cluster in it and added to it')
+    arg_parser.add_argument('--jsonl', metavar='PATH', help='append the result of the report with its findings as one JSON line to this file (batch mode writes all the reports, default <output-dir>/results.jsonl)')
+    args = arg_parser.parse_args()
+    if args.serve and (args.profile or args.cprofile):
+        arg_parser.error('--profile cannot be used with --serve, profile the reports with a single or batch run instead')
+    logger.setLevel(args.log_level)
+    args.profile = args.profile or args.cprofile
+    if args.profile:
+        profiler = StageProfiler()
+    if args.batch or args.watch:
+        os.makedirs(args.output_dir, exist_ok=True)
+        logger.addHandler(logHandler(args.log_file or os.path.join(args.output_dir, 'cluster-checker.log')))
+    else:
+        report_name = SupportconfigReport(args.path_to_scc).name if args.path_to_scc else 'cluster-checker'
+        logger.addHandler(logHandler((args.log_file or './cluster-checker.log').replace('{report}', report_name)))
     print(f'Tool version is {VERSION}')
-    print('Checking if the this is the latest version')
-    URL = 'https://raw.githubusercontent.com/imabedalghafer/cluster-checker/master/version.txt'
-    myrequest = requests.get(URL)
-    logger.info(myrequest.text)
-    if myrequest.text == VERSION:
-        print('Using the latest version, no further action needed, proceeding with execution')
+    update_check = None
+    if not args.no_update_check:
+        # the version check runs while the report is checked and its result is only looked at after the checks
+        update_check = UpdateCheck()
+        update_check.start()
+    cache = None if args.no_cache else ResultCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.serve:
+        serveChecks(args.serve, args.workers, VERSION, cache, args.history, args.log_level)
+    elif args.watch:
+        watchChecker(args.watch, args.output_dir, args.workers, args.jsonl, cache, args.log_level, args.profile, args.cprofile, args.history, args.watch_interval, args.settle_time)
+    elif args.batch:
+        batchChecker(args.batch, args.output_dir, args.workers, args.jsonl, cache, args.log_level, args.profile, args.cprofile, args.history)
     else:
-        print(f'The latest version available is {myrequest.text}, updating ..')
-        URL_1 = 'https://raw.githubusercontent.com/imabedalghafer/cluster-checker/master/cluster-checker.py'
-        download_file = requests.get(URL_1)
-        new_file_name = f'cluster-checker-{myrequest.text}.py'
-        open(new_file_name, "wb").write(download_file.content)
-        copy_command = f'cp {new_file_name} cluster-checker.py'
-        output = subprocess.run([copy_command], stdout=subprocess.PIPE, shell=True)
-        print('Done updating, please try to execute the script again')
-        exit()
-    raw_args = sys.argv
-    while True:
-        if len(raw_args) <= 1 :
+        path_to_scc = args.path_to_scc
+        while path_to_scc is None:
             logger.info('Please provide the path to scc report')
             path_to_scc= input('Please provide the path to scc report (either relative or absolute)')
             if path_to_scc is None or len(path_to_scc.split('/')) < 2:
-                continue
-            break
+                path_to_scc = None
+        #sr_num = collect_sr()
+        logger.info(path_to_scc)
+        #log_case_scc(sr_num, path_to_scc)
+        report_cprofile = None
+        if args.cprofile:
+            import cProfile
+            report_cprofile = cProfile.Profile()
+            report_cprofile.enable()
+        history = ReportHistory(args.history) if args.history else None
+        result = runChecks(path_to_scc, cache, history)
+        if history is not None:
+            history.close()
+        if report_cprofile is not None:
+            report_cprofile.disable()
+        logger.debug('Findings of the report: %s', result.findings)
+        if args.jsonl:
+            with JsonlWriter(args.jsonl, mode='a') as results_writer:
+                results_writer.write(result.toDict())
+            print(f'The result of the report with {findingsText(result.severityCounts())} findings is written to {args.jsonl}')
+    if cache is not None:
+        cache.evict()
+    if update_check is not None:
+        latest_version = update_check.result()
+        if latest_version is None:
+            print('Could not check if this is the latest version')
+        elif latest_version == VERSION:
+            print('Using the latest version, no further action needed')
         else:
-            path_to_scc = raw_args[1]
-            break
-    if path_to_scc.find('.txz') != -1:
-        logger.info('This is a compressed file, extracting it')
-        print('Extracting scc report ...')
-        extract_file = 'tar xf '+path_to_scc
-        output = subprocess.Popen([extract_file], stdout=subprocess.PIPE, shell=True)
-        logger.info(output.communicate())
-        path_to_scc = path_to_scc.split('.')[0]
-        logger.info(f'Path to scc is {path_to_scc}')
-    #sr_num = collect_sr()
-    logger.info(path_to_scc)
-    #log_case_scc(sr_num, path_to_scc)
-    if checkFileExistance(path_to_scc):
-        version_id = osVersion(path_to_scc)
-        readingCib(path_to_scc)
-        root_xml = readingCib(path_to_scc)
-        azure_fence_agent, sbd_fence_agent = propertyChecker(root_xml)
-        cluster_type = getClusterType(root_xml)
-        constrainsChecker(root_xml, cluster_type)
-        totemChecker(path_to_scc)
-        quorumChecker(path_to_scc)
-        rpmChecker(path_to_scc, version_id, azure_fence_agent, sbd_fence_agent)
-        
-
-
-
-    
-    
-
-
+            print(f'The latest version available is {latest_version}, updating ..')
+            selfUpdate(latest_version)
+    if profiler is not None:
+        if args.batch or args.watch:
+            profile_path = args.profile_file or os.path.join(args.output_dir, 'profile.json')
+        else:
+            profile_path = (args.profile_file or './cluster-checker-profile.json').replace('{report}', SupportconfigReport(path_to_scc).name)
+        writeProfile(profiler, profile_path, None if args.batch or args.watch else report_cprofile)
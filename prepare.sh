@@ -6,7 +6,7 @@ prepareVenv()
     python3 -m venv dev
     source dev/bin/activate
     dev/bin/pip install --upgrade pip
-    dev/bin/pip install opencensus lxml xmltodict
+    dev/bin/pip install opencensus lxml
     echo 'Ready to go, please ensure to activate the dev before you run the script, to activate it use source dev/bin/activate'
 }
 
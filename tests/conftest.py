@@ -0,0 +1,18 @@
+import importlib.util
+import logging
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+
+@pytest.fixture
+def checker():
+    spec = importlib.util.spec_from_file_location('cluster_checker', os.path.join(ROOT_DIR, 'cluster-checker.py'))
+    checker = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(checker)
+    checker.logger.setLevel(logging.WARNING)
+    return checker
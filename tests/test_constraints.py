@@ -0,0 +1,45 @@
+"""
+Checks the constraints of a SAPHana cluster with constraints besides the documented ones.
+
+usage: python3 -m pytest tests
+"""
+import contextlib
+import io
+import os
+
+from generate_scc import generateReport
+
+EXTRA_CONSTRAINTS = '''      <rsc_colocation id="col_saphana_secip" score="4000" rsc="g_ip_HN1_HDB03" rsc-role="Started" with-rsc="msl_SAPHana_HN1_HDB03" with-rsc-role="Slave"/>
+      <rsc_order id="ord_fencing" kind="Optional" first="rsc_st_azure" then="msl_SAPHana_HN1_HDB03"/>
+      <rsc_colocation id="col_wrong_score" score="3000" rsc="g_ip_HN1_HDB03" with-rsc="msl_SAPHana_HN1_HDB03" with-rsc-role="Master"/>
+      <rsc_order id="ord_loop" kind="Mandatory"><resource_set id="ord_loop-0"><resource_ref id="msl_SAPHana_HN1_HDB03"/><resource_ref id="cln_SAPHanaTopology_HN1_HDB03"/></resource_set></rsc_order>
+'''
+
+
+def checkConstraints(checker, report_path, extra_constraints):
+    ha_path = os.path.join(report_path, 'ha.txt')
+    with open(ha_path) as ha_file:
+        ha_text = ha_file.read()
+    with open(ha_path, 'w') as ha_file:
+        ha_file.write(ha_text.replace('</constraints>', extra_constraints + '    </constraints>', 1))
+    report = checker.SupportconfigReport(report_path)
+    cluster_model = checker.readingCib(checker.SupportconfigIndex(report, 'ha.txt'))
+    result = checker.ReportResult(report_path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        checker.constrainsChecker(cluster_model, 'SAPCluster', result)
+    report.close()
+    return {(finding.check_id, finding.resource_id) for finding in result.findings}
+
+
+def test_documented_constraints(checker, tmp_path):
+    report_path = generateReport(str(tmp_path), 'saphana', resources=5, ha_size=0.1, rpms=200)
+    assert checkConstraints(checker, report_path, '') == set()
+
+
+def test_only_documented_pairs_are_checked(checker, tmp_path):
+    report_path = generateReport(str(tmp_path), 'saphana', resources=5, ha_size=0.1, rpms=200)
+    assert checkConstraints(checker, report_path, EXTRA_CONSTRAINTS) == {
+        ('constraints.sapcluster.colocation', 'col_wrong_score'),
+        ('constraints.sapcluster.order', 'ord_loop'),
+        ('constraints.order.cycle', 'cln_SAPHanaTopology_HN1_HDB03, msl_SAPHana_HN1_HDB03'),
+    }
@@ -0,0 +1,51 @@
+"""
+Runs --history with the checks of the report on several threads, the history is only used by the thread that opened it.
+
+usage: python3 -m pytest tests
+"""
+import contextlib
+import io
+import os
+
+from generate_scc import generateReport
+
+
+def test_history_with_check_threads(checker, tmp_path):
+    report_path = generateReport(str(tmp_path), 'saphana', resources=5, ha_size=0.1, rpms=200)
+    results = []
+    for _ in range(2):
+        history = checker.ReportHistory(str(tmp_path / 'history.db'))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                results.append((checker.runChecks(report_path, history=history, check_threads=4), output.getvalue()))
+        finally:
+            history.close()
+    for result, _ in results:
+        assert not [finding.message for finding in result.findings if finding.check_id == 'checker.error']
+        assert result.status in ('checked', 'stonith disabled')
+    assert 'first report of the cluster' in results[0][1]
+    assert 'No change in the corosync, cib and rpm configuration since the last report' in results[1][1]
+
+
+def test_history_cib_changes_parse_cib_once(checker, tmp_path):
+    report_path = generateReport(str(tmp_path), 'saphana', resources=5, ha_size=0.1, rpms=200)
+    cib_parses = []
+    reading_cib = checker.readingCib
+    checker.readingCib = lambda ha_index: cib_parses.append(ha_index) or reading_cib(ha_index)
+    outputs = []
+    for stonith_timeout in ('144s', '900s'):
+        ha_path = os.path.join(report_path, 'ha.txt')
+        with open(ha_path) as ha_file:
+            ha_text = ha_file.read()
+        with open(ha_path, 'w') as ha_file:
+            ha_file.write(ha_text.replace('name="stonith-timeout" value="144s"', f'name="stonith-timeout" value="{stonith_timeout}"'))
+        history = checker.ReportHistory(str(tmp_path / 'history.db'))
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                result = checker.runChecks(report_path, history=history)
+        finally:
+            history.close()
+        outputs.append(output.getvalue())
+    assert len(cib_parses) == 2
+    assert 'property.stonith-timeout: 144s -> 900s' in outputs[1]
+    assert [finding.observed for finding in result.findings if finding.check_id == 'history.cib.changed'] == [{'property.stonith-timeout': '900s'}]
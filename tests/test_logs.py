@@ -0,0 +1,33 @@
+"""
+The cache key of the log scan samples big logs instead of hashing them whole, a log that got more lines is scanned again.
+
+usage: python3 -m pytest tests
+"""
+import contextlib
+import io
+import os
+
+from generate_scc import generateReport
+
+
+def logFindings(checker, report_path, cache):
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = checker.runChecks(report_path, cache=cache)
+    return sorted(finding.message for finding in result.findings if finding.check_id.startswith('logs.'))
+
+
+def test_log_cache_key_samples_big_logs(checker, tmp_path):
+    report_path = generateReport(str(tmp_path), 'saphana', resources=5, ha_size=0.1, rpms=200, messages_size=8)
+    report = checker.SupportconfigReport(report_path)
+    assert os.path.getsize(os.path.join(report_path, 'messages.txt')) > checker.LOG_DIGEST_SAMPLES * checker.LOG_DIGEST_BLOCK
+    assert report.fileSampleDigest('messages.txt') != report.fileDigest('messages.txt')
+    assert report.fileSampleDigest('messages.txt') == checker.SupportconfigReport(report_path).fileSampleDigest('messages.txt')
+
+    cache = checker.ResultCache(str(tmp_path / 'cache'))
+    findings = logFindings(checker, report_path, cache)
+    assert findings
+    assert logFindings(checker, report_path, cache) == findings
+
+    with open(os.path.join(report_path, 'messages.txt'), 'a') as messages_file:
+        messages_file.write('Oct 18 04:00:00 node1 corosync[2211]:   [TOTEM ] Retransmit List: 1d\n')
+    assert logFindings(checker, report_path, cache) != findings